@@ -0,0 +1,83 @@
+"""Section and library dependency graph: post_sections, section_calls, file_libraries.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "002"
+down_revision: str | None = "001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _package_and_file_columns() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "package_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("post_packages.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "file_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("post_files.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "post_sections",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        *_package_and_file_columns(),
+        sa.Column("name", sa.Text, nullable=False),
+        sa.Column("kind", sa.Text, nullable=False),
+        sa.Column("start_line", sa.Integer, nullable=False),
+        sa.Column("end_line", sa.Integer, nullable=False),
+        sa.Column("template_lines", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.create_index("ix_post_sections_package_id", "post_sections", ["package_id"])
+
+    op.create_table(
+        "section_calls",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        *_package_and_file_columns(),
+        sa.Column("caller", sa.Text, nullable=False),
+        sa.Column("callee", sa.Text, nullable=False),
+    )
+    op.create_index("ix_section_calls_package_id", "section_calls", ["package_id"])
+
+    op.create_table(
+        "file_libraries",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        *_package_and_file_columns(),
+        sa.Column("position", sa.Integer, nullable=False),
+        sa.Column("library", sa.Text, nullable=False),
+    )
+    op.create_index("ix_file_libraries_package_id", "file_libraries", ["package_id"])
+    op.create_index("ix_file_libraries_library", "file_libraries", ["library"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_libraries_library", table_name="file_libraries")
+    op.drop_index("ix_file_libraries_package_id", table_name="file_libraries")
+    op.drop_table("file_libraries")
+    op.drop_index("ix_section_calls_package_id", table_name="section_calls")
+    op.drop_table("section_calls")
+    op.drop_index("ix_post_sections_package_id", table_name="post_sections")
+    op.drop_table("post_sections")
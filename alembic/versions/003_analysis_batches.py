@@ -0,0 +1,85 @@
+"""Batch copilot analysis: analysis_batches and analysis_results.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: str | None = "002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_batches",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column("question", sa.Text, nullable=False),
+        sa.Column(
+            "package_filter",
+            postgresql.JSONB,
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+        sa.Column("status", sa.Text, nullable=False, server_default="pending"),
+        sa.Column("total", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("completed", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer, nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+
+    op.create_table(
+        "analysis_results",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "batch_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("analysis_batches.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "package_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("post_packages.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("status", sa.Text, nullable=False),
+        sa.Column("answer", sa.Text, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="1"),
+        sa.Column("latency_ms", sa.Integer, nullable=True),
+        sa.Column("input_tokens", sa.Integer, nullable=True),
+        sa.Column("output_tokens", sa.Integer, nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_analysis_results_batch_id", "analysis_results", ["batch_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_results_batch_id", table_name="analysis_results")
+    op.drop_table("analysis_results")
+    op.drop_table("analysis_batches")
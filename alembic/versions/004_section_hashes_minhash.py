@@ -0,0 +1,62 @@
+"""Section body hashes and per-package MinHash/LSH signatures.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: str | None = "003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _package_id(primary_key: bool) -> sa.Column:
+    return sa.Column(
+        "package_id",
+        postgresql.UUID(as_uuid=True),
+        sa.ForeignKey("post_packages.id", ondelete="CASCADE"),
+        primary_key=primary_key,
+        nullable=False,
+    )
+
+
+def upgrade() -> None:
+    op.add_column("post_sections", sa.Column("body_hash", sa.Text, nullable=True))
+    op.create_index("ix_post_sections_body_hash", "post_sections", ["body_hash"])
+
+    op.create_table(
+        "package_signatures",
+        _package_id(primary_key=True),
+        sa.Column("signature", sa.LargeBinary, nullable=False),
+        sa.Column("shingle_count", sa.Integer, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+    op.create_table(
+        "package_lsh_bands",
+        _package_id(primary_key=True),
+        sa.Column("band", sa.SmallInteger, primary_key=True),
+        sa.Column("bucket", sa.BigInteger, nullable=False),
+    )
+    op.create_index("ix_package_lsh_bands_bucket", "package_lsh_bands", ["band", "bucket"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_package_lsh_bands_bucket", table_name="package_lsh_bands")
+    op.drop_table("package_lsh_bands")
+    op.drop_table("package_signatures")
+    op.drop_index("ix_post_sections_body_hash", table_name="post_sections")
+    op.drop_column("post_sections", "body_hash")
@@ -0,0 +1,80 @@
+"""Durable ingestion jobs: ingest_jobs and ingest_steps.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: str | None = "004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_jobs",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column(
+            "package_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("post_packages.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("task_id", sa.Text, nullable=True),
+        sa.Column("status", sa.Text, nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index("ix_ingest_jobs_package_id", "ingest_jobs", ["package_id", "created_at"])
+
+    op.create_table(
+        "ingest_steps",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "job_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("ingest_jobs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("stage", sa.Text, nullable=False),
+        sa.Column("target", sa.Text, nullable=False, server_default=""),
+        sa.Column("status", sa.Text, nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="1"),
+        sa.Column("duration_ms", sa.Integer, nullable=True),
+        sa.Column("detail", postgresql.JSONB, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column(
+            "finished_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint("job_id", "stage", "target"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_steps")
+    op.drop_index("ix_ingest_jobs_package_id", table_name="ingest_jobs")
+    op.drop_table("ingest_jobs")
@@ -0,0 +1,186 @@
+"""ASGI middleware.
+
+Written as plain ASGI callables rather than ``BaseHTTPMiddleware`` so they
+add no extra task or body buffering per request. Each is only installed
+when its feature is enabled, so a disabled feature costs nothing.
+"""
+
+import logging
+import re
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics, profiling
+from app.core.models.post_processor import ErrorResponse
+from app.services.admission import AdmissionController, AdmissionRejectedError
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# (method, path pattern, admission policy, boolean query parameter that makes
+# the request cheap when false). Requests whose cost depends on the JSON body
+# (``/locate`` with ``confirm``) are admitted in the route instead.
+ADMISSION_RULES: tuple[tuple[str, re.Pattern[str], str, str | None], ...] = (
+    ("POST", re.compile(r"/api/v1/(packages|posts)/upload"), "upload", None),
+    ("POST", re.compile(r"/api/v1/analysis/batches"), "copilot", None),
+    (
+        "GET",
+        re.compile(r"/api/v1/packages/[^/]+/customizations"),
+        "copilot",
+        "summarize",
+    ),
+)
+FALSE_VALUES = frozenset({"0", "f", "false", "n", "no", "off"})
+
+
+class MetricsMiddleware:
+    """Record request latency per route template (not raw path) and status."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=route,
+                status=str(status),
+            )
+
+
+class ProfilingMiddleware:
+    """Profile opted-in requests and store the flamegraph input in MinIO.
+
+    A request is profiled when it sends ``X-VeriPost-Profile: 1`` or wins the
+    ``profiling_sample_rate`` draw. The response carries
+    ``X-VeriPost-Profile-Id``; fetch the profile from ``/debug/profiles/{id}``.
+    The flag is also exposed as ``request.state.profile`` so routes can
+    propagate it to the Celery tasks they enqueue.
+    """
+
+    def __init__(self, app: ASGIApp, interval: float) -> None:
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        forced = any(
+            name == profiling.PROFILE_HEADER.encode() and value not in (b"", b"0")
+            for name, value in scope["headers"]
+        )
+        if not profiling.wanted(forced):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = profiling.new_profile_id("http")
+        scope.setdefault("state", {})["profile"] = True
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-veripost-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with profiling.StackSampler(threading.get_ident(), self.interval) as sampler:
+            await self.app(scope, receive, send_wrapper)
+
+        collapsed_key, meta_key = profiling.profile_keys(profile_id)
+        try:
+            await storage.upload_file(
+                collapsed_key, sampler.collapsed(), content_type=profiling.COLLAPSED_CONTENT_TYPE
+            )
+            await storage.upload_file(
+                meta_key,
+                sampler.metadata(profile_id, method=scope["method"], path=scope["path"]),
+                content_type="application/json",
+            )
+        except Exception as exc:
+            logger.warning("Could not store profile %s - %s", profile_id, exc)
+
+
+def admission_error(exc: AdmissionRejectedError) -> dict:
+    """``ErrorResponse`` body for a rejected request (429 or 503)."""
+    if exc.status == 429:
+        message = "Too many requests. Please slow down and try again shortly."
+        code = "RATE_LIMITED"
+    else:
+        message = "The server is busy. Please try again in a moment."
+        code = "SERVER_BUSY"
+    return ErrorResponse(
+        message=message, detail=f"{exc.policy}: {exc.reason}", code=code
+    ).model_dump()
+
+
+def _admission_policy(scope: Scope) -> str | None:
+    for method, pattern, policy, cheap_param in ADMISSION_RULES:
+        if scope["method"] != method or not pattern.fullmatch(scope["path"]):
+            continue
+        if cheap_param:
+            query = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+            if query.get(cheap_param, "").lower() in FALSE_VALUES:
+                return None
+        return policy
+    return None
+
+
+class AdmissionMiddleware:
+    """Rate-limit and cap expensive requests before their bodies are read.
+
+    Matching requests (``ADMISSION_RULES``) are admitted by the
+    ``AdmissionController`` and hold their semaphore slot until the response
+    is sent. Rejections are answered here with 429 or 503 and Retry-After,
+    so an overloaded upload is refused before its ZIP is received.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policy = _admission_policy(scope)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            token = await self.controller.acquire(policy, self.controller.client_of(scope))
+        except AdmissionRejectedError as exc:
+            response = JSONResponse(
+                {"detail": admission_error(exc)},
+                status_code=exc.status,
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(token)
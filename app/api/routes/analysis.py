@@ -0,0 +1,104 @@
+"""Batch copilot analysis: one question across many packages.
+
+``POST /analysis/batches`` starts a batch in the background and returns
+202. ``GET .../stream`` streams each package's answer as NDJSON as it is
+persisted, and ``GET /analysis/batches/{id}`` returns everything so far.
+"""
+
+import json
+import uuid
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.models.post_processor import (
+    AnalysisBatchResponse,
+    AnalysisResultResponse,
+    BatchAnalysisRequest,
+    ErrorResponse,
+)
+from app.db.database import get_db
+from app.services import analysis_service
+from app.services.analysis_service import BatchRunner
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+
+
+def get_batch_runner(request: Request) -> BatchRunner:
+    return request.app.state.batch_runner
+
+
+@router.post("/batches", status_code=202)
+async def create_batch(
+    body: BatchAnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+    runner: BatchRunner = Depends(get_batch_runner),
+) -> dict:
+    """Start answering ``question`` for every matching ready package."""
+    if not get_settings().anthropic_api_key:
+        raise HTTPException(
+            status_code=503,
+            detail=ErrorResponse(
+                message="The copilot is not configured on this server.",
+                detail="ANTHROPIC_API_KEY is not set.",
+                code="COPILOT_UNAVAILABLE",
+            ).model_dump(),
+        )
+    package_filter = body.model_dump(mode="json", exclude={"question"})
+    packages = await analysis_service.select_packages(db, body.model_dump(exclude={"question"}))
+    if not packages:
+        raise HTTPException(
+            status_code=422,
+            detail=ErrorResponse(
+                message="No ready packages match the filter.",
+                detail=json.dumps(package_filter),
+                code="NO_PACKAGES",
+            ).model_dump(),
+        )
+    batch = await analysis_service.create_batch(db, body.question, package_filter, packages)
+    runner.start(batch, packages)
+    return {
+        "batch_id": str(batch.id),
+        "status": batch.status,
+        "total": batch.total,
+        "stream_url": f"/api/v1/analysis/batches/{batch.id}/stream",
+    }
+
+
+@router.get("/batches/{batch_id}", response_model=AnalysisBatchResponse)
+async def get_batch(batch_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """Batch progress and every result persisted so far."""
+    batch, rows = await analysis_service.get_batch(db, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return AnalysisBatchResponse(
+        batch_id=batch.id,
+        question=batch.question,
+        status=batch.status,
+        total=batch.total,
+        completed=batch.completed,
+        failed=batch.failed,
+        created_at=batch.created_at,
+        finished_at=batch.finished_at,
+        results=[
+            AnalysisResultResponse(**analysis_service.result_payload(result, name))
+            for result, name in rows
+        ],
+    )
+
+
+@router.get("/batches/{batch_id}/stream")
+async def stream_batch(batch_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """NDJSON: one ``result`` line per package as it finishes, then a ``batch`` line."""
+    batch, _ = await analysis_service.get_batch(db, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for event in analysis_service.stream_results(batch_id):
+            yield json.dumps(event).encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,60 @@
+"""Debug endpoints for stored request/task profiles.
+
+Only mounted when ``profiling_enabled`` is set. Profiles are collapsed-stack
+text: open them in https://www.speedscope.app or pipe them into
+``flamegraph.pl``.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.core import profiling
+from app.services.storage import storage
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/profiles")
+async def list_profiles() -> dict:
+    """List stored profiles, newest first, with links to their artifacts."""
+    keys = await storage.list_files(profiling.PROFILE_PREFIX)
+    ids = sorted(
+        (k[len(profiling.PROFILE_PREFIX) : -len(".collapsed")] for k in keys
+         if k.endswith(".collapsed")),
+        reverse=True,
+    )
+    return {
+        "profiles": [
+            {
+                "id": pid,
+                "collapsed": f"/debug/profiles/{pid}",
+                "metadata": f"/debug/profiles/{pid}/metadata",
+            }
+            for pid in ids
+        ],
+        "count": len(ids),
+    }
+
+
+async def _download(key: str) -> bytes:
+    try:
+        return await storage.download_file(key)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str) -> Response:
+    """Collapsed-stack profile, importable into speedscope."""
+    collapsed_key, _ = profiling.profile_keys(profile_id)
+    return Response(
+        content=await _download(collapsed_key),
+        media_type=profiling.COLLAPSED_CONTENT_TYPE,
+        headers={"Content-Disposition": f'inline; filename="{profile_id}.collapsed"'},
+    )
+
+
+@router.get("/profiles/{profile_id}/metadata")
+async def get_profile_metadata(profile_id: str) -> Response:
+    _, meta_key = profiling.profile_keys(profile_id)
+    return Response(content=await _download(meta_key), media_type="application/json")
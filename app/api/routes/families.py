@@ -0,0 +1,77 @@
+"""Post families (MACH-03): groups of near-duplicate packages.
+
+Backed by the MinHash/LSH signatures the ingest worker stores per package;
+see ``app.services.family_service``.
+"""
+
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.models.post_processor import (
+    ErrorResponse,
+    FamilyMember,
+    NearDuplicatesResponse,
+    PostFamiliesResponse,
+    PostFamily,
+)
+from app.db.database import get_read_db
+from app.services import family_service
+
+router = APIRouter(prefix="/families", tags=["families"])
+
+
+@router.get("", response_model=PostFamiliesResponse)
+async def list_families(
+    threshold: float | None = Query(default=None, ge=0.0, le=1.0),
+    min_size: int = Query(default=2, ge=2),
+    db: AsyncSession = Depends(get_read_db),
+) -> PostFamiliesResponse:
+    """Group ready packages into families of near-duplicates, largest first."""
+    threshold = get_settings().family_similarity_threshold if threshold is None else threshold
+    families = await family_service.post_families(db, threshold, min_size)
+    return PostFamiliesResponse(
+        threshold=threshold,
+        family_count=len(families),
+        families=[
+            PostFamily(
+                size=len(members),
+                members=[FamilyMember(package_id=str(pid), package_name=n) for pid, n in members],
+            )
+            for members in families
+        ],
+    )
+
+
+@router.get(
+    "/{package_id}",
+    response_model=NearDuplicatesResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_near_duplicates(
+    package_id: uuid.UUID,
+    threshold: float | None = Query(default=None, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_read_db),
+) -> NearDuplicatesResponse:
+    """Packages whose .SRC sections mostly match this one's, most similar first."""
+    threshold = get_settings().family_similarity_threshold if threshold is None else threshold
+    matches = await family_service.near_duplicates(db, package_id, threshold)
+    if matches is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="This package has no similarity signature yet.",
+                detail="Signatures are written when a package with a .SRC finishes ingesting",
+                code="SIGNATURE_NOT_FOUND",
+            ).model_dump(),
+        )
+    return NearDuplicatesResponse(
+        package_id=str(package_id),
+        threshold=threshold,
+        matches=[
+            FamilyMember(package_id=str(pid), package_name=name, similarity=round(score, 4))
+            for pid, name, score in matches
+        ],
+    )
@@ -0,0 +1,38 @@
+"""Dependency-graph queries: impact analysis across the package corpus.
+
+Answers "which posts break if this library section changes" from the
+process-wide ``SectionGraph`` cache, reloaded only when the ingest worker
+reports new graph rows.
+"""
+
+from fastapi import APIRouter
+
+from app.core.models.post_processor import ImpactedSection, ImpactResponse, PackageImpact
+from app.services.graph_service import get_section_graph
+
+router = APIRouter(prefix="/graph", tags=["graph"])
+
+
+@router.get("/impact", response_model=ImpactResponse)
+async def library_section_impact(library: str, section: str) -> ImpactResponse:
+    """List every package and section transitively affected by ``library:section``.
+
+    Packages whose .SRC (or an earlier library) overrides the section are
+    not affected; within the rest, callers are followed through ``CALL(...)``.
+    """
+    graph = await get_section_graph()
+    impacts = graph.affected(library, section)
+    return ImpactResponse(
+        library=library.upper(),
+        section=section,
+        package_count=len(impacts),
+        section_count=sum(len(i.sections) for i in impacts),
+        packages=[
+            PackageImpact(
+                package_id=i.package_id,
+                package_name=i.package_name,
+                sections=[ImpactedSection(file=f, name=n) for f, n in i.sections],
+            )
+            for i in impacts
+        ],
+    )
@@ -1,10 +1,40 @@
-"""Health check endpoints."""
+"""Health check endpoints.
 
-from fastapi import APIRouter
+- ``/health``: process health plus background-initialization state
+- ``/health/live``: liveness; never touches a dependency
+- ``/health/ready``: readiness; concurrent, cached dependency checks
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.config import get_settings
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
-async def health_check() -> dict:
-    return {"status": "healthy", "service": "veripost"}
+async def health_check(request: Request) -> dict:
+    """Process health plus background-initialization readiness (e.g. MinIO bucket)."""
+    readiness = getattr(request.app.state, "readiness", {})
+    return {"status": "healthy", "service": "veripost", "readiness": dict(readiness)}
+
+
+@router.get("/health/live")
+async def liveness() -> dict:
+    return {"status": "alive", "service": "veripost"}
+
+
+@router.get("/health/ready")
+async def readiness(request: Request) -> JSONResponse:
+    """Check DB, Redis, MinIO and worker heartbeat; 503 if any check fails."""
+    probe = getattr(request.app.state, "readiness_probe", None)
+    if probe is None:  # built on first use; it pulls in SQLAlchemy and the DB engine
+        from app.services.health import ReadinessProbe
+
+        probe = request.app.state.readiness_probe = ReadinessProbe.from_settings(get_settings())
+    report, cached = await probe.check()
+    return JSONResponse(
+        content={**report, "cached": cached},
+        status_code=200 if report["status"] == "ready" else 503,
+    )
@@ -0,0 +1,21 @@
+"""Prometheus scrape endpoint."""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.core import metrics
+from app.db.database import pool_status
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    if not metrics.is_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    # Pool occupancy is sampled at scrape time rather than on every checkout.
+    for pool, states in pool_status().items():
+        for state, value in states.items():
+            metrics.set_gauge("db_pool_connections", value, pool=pool, state=state)
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
@@ -6,22 +6,43 @@ lets clients poll for ingestion progress.
 """
 
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import nullcontext
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.models.post_processor import ErrorResponse, StatusResponse
-from app.db.database import get_db
-from app.services import post_service
+from app.api.middleware import admission_error
+from app.api.routes.parsing import get_parse_executor, pooled
+from app.config import get_settings
+from app.core.ai.copilot import Copilot
+from app.core.models.post_processor import (
+    AttributeOverridesResponse,
+    CustomizationResponse,
+    ErrorResponse,
+    IngestJobResponse,
+    IngestStepResponse,
+    LocatedSection,
+    LocateRequest,
+    LocateResponse,
+    StatusResponse,
+    TemplateMatch,
+)
+from app.db.database import get_db, get_read_db
+from app.services import customization_service, locator_service, post_service
+from app.services.admission import AdmissionRejectedError
 from app.services.storage import storage
-from app.workers.tasks import ingest_package
 
 router = APIRouter(prefix="/packages", tags=["packages"])
 
+# Streamed NDJSON is flushed in chunks of about this size, not per line
+STREAM_CHUNK_BYTES = 64 * 1024
+
 
 @router.post("/upload", status_code=202)
 async def upload_package(
+    request: Request,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
@@ -66,8 +87,7 @@ async def upload_package(
     package_id = uuid.uuid4()
 
     # 6. Derive package name from SRC filename
-    src_names = [fn for fn, _ in extracted_files if fn.upper().endswith(".SRC")]
-    package_name = src_names[0].rsplit(".", 1)[0] if src_names else file.filename or "unknown"
+    package_name = post_service.package_name(extracted_files, file.filename or "unknown")
 
     # 7. Create package + file records and upload to MinIO
     await post_service.create_package_with_files(
@@ -77,8 +97,14 @@ async def upload_package(
         files=extracted_files,
     )
 
-    # 8. Enqueue Celery ingestion task
-    task = ingest_package.delay(str(package_id))
+    # 8. Enqueue Celery ingestion task (profiled too if this request is).
+    # Imported here: the worker module pulls in Celery, which the API only
+    # needs once something is actually enqueued.
+    from app.workers.tasks import ingest_package
+
+    task = ingest_package.delay(
+        str(package_id), profile=getattr(request.state, "profile", False)
+    )
 
     return {
         "package_id": str(package_id),
@@ -90,7 +116,7 @@ async def upload_package(
 @router.get("/{package_id}/status", response_model=StatusResponse)
 async def get_package_status(
     package_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> StatusResponse:
     """Poll the current status of a package ingestion job.
 
@@ -118,11 +144,337 @@ async def get_package_status(
     )
 
 
+def _job_response(job) -> IngestJobResponse:  # type: ignore[no-untyped-def]
+    return IngestJobResponse(
+        job_id=str(job.id),
+        package_id=str(job.package_id),
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        steps=[
+            IngestStepResponse(
+                stage=step.stage,
+                target=step.target,
+                status=step.status,
+                attempts=step.attempts,
+                duration_ms=step.duration_ms,
+                error=step.error,
+                finished_at=step.finished_at,
+            )
+            for step in job.steps
+        ],
+    )
+
+
+@router.get(
+    "/{package_id}/ingest",
+    response_model=IngestJobResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_ingest_job(
+    package_id: uuid.UUID,
+    db: AsyncSession = Depends(get_read_db),
+) -> IngestJobResponse:
+    """The package's latest ingest job: per-stage (and per-file) status and timing."""
+    job = await post_service.latest_ingest_job(db, package_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="No ingest job recorded for this package yet.",
+                detail=f"Package '{package_id}' has not been picked up by a worker",
+                code="JOB_NOT_FOUND",
+            ).model_dump(),
+        )
+    return _job_response(job)
+
+
+@router.post(
+    "/{package_id}/ingest/resume",
+    status_code=202,
+    responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}},
+)
+async def resume_ingest(
+    package_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Re-enqueue a failed ingestion; steps that already completed are skipped."""
+    package = await post_service.get_package(db, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+    if package.status != "error":
+        raise HTTPException(
+            status_code=409,
+            detail=ErrorResponse(
+                message="Only a failed ingestion can be resumed.",
+                detail=f"Package status is '{package.status}'",
+                code="NOT_RESUMABLE",
+            ).model_dump(),
+        )
+
+    package.status = "pending"
+    package.error_message = package.error_detail = None
+    await db.commit()
+    await post_service.invalidate_cached_responses(package_id)
+    from app.workers.tasks import ingest_package
+
+    task = ingest_package.delay(str(package_id))
+    return {"package_id": str(package_id), "job_id": task.id, "status": "pending"}
+
+
+@router.get(
+    "/{package_id}/attributes/overrides",
+    response_model=AttributeOverridesResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_attribute_overrides(
+    package_id: uuid.UUID,
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """List the ATTRIDs this package's .ATR adds, changes or drops versus MASTER.ATR.
+
+    Each distinct ATR is parsed once and shared through the ATR registry
+    index, so repeated queries are lookups rather than re-parses. Once the
+    package is ready the response is served from the result cache.
+    """
+    kind = f"atr_overrides:{get_settings().atr_master_hash[:16]}"
+    payload, generation = await post_service.cached_response(package_id, kind)
+    if payload is not None:
+        return Response(payload, media_type="application/json")
+    package = await post_service.get_package(db, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+
+    try:
+        result = await post_service.get_attribute_overrides(db, package)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=f"File storage is temporarily unavailable: {exc}",
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="No attribute registry to compare.",
+                detail="The package has no .ATR file or the master ATR is not configured",
+                code="ATR_NOT_FOUND",
+            ).model_dump(),
+        )
+
+    index, master, overrides = result
+    response = AttributeOverridesResponse(
+        package_id=str(package.id),
+        atr_hash=index.digest,
+        master_hash=master.digest,
+        identical=overrides.identical,
+        added=list(overrides.added),
+        changed=list(overrides.changed),
+        removed=list(overrides.removed),
+    )
+    payload = await post_service.cache_response(package, kind, response, generation)
+    return Response(payload, media_type="application/json")
+
+
+@router.get(
+    "/{package_id}/customizations",
+    response_model=CustomizationResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_customizations(
+    request: Request,
+    package_id: uuid.UUID,
+    template_id: uuid.UUID | None = None,
+    summarize: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+) -> CustomizationResponse:
+    """Diff the package's .SRC against the template it was created from.
+
+    The template is ``template_id`` if given, else the post's ``Created From:``
+    header, else the nearest ready post by section overlap. With
+    ``summarize``, only the rendered delta is sent to the copilot.
+    """
+    package = await post_service.get_package(db, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+
+    executor = get_parse_executor(request)
+    try:
+        result = await pooled(
+            executor,
+            customization_service.analyze_customization(db, package, executor, template_id),
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=f"File storage is temporarily unavailable: {exc}",
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="No template to compare against.",
+                detail="The package has no .SRC file, or no ready package matches its template",
+                code="TEMPLATE_NOT_FOUND",
+            ).model_dump(),
+        )
+
+    summary = None
+    if summarize:
+        summary = await customization_service.summarize(result, package.platform, Copilot())
+    return CustomizationResponse(
+        package_id=str(package.id),
+        filename=result.post_file.filename,
+        created_from=result.post.created_from,
+        template=TemplateMatch(
+            package_id=str(result.template_package.id),
+            package_name=result.template_package.name,
+            filename=result.template_file.filename,
+            matched_by=result.matched_by,
+            similarity=round(result.similarity, 4),
+        ),
+        delta=result.delta,
+        prompt_chars=len(result.prompt),
+        summary=summary,
+    )
+
+
+@router.post(
+    "/{package_id}/locate",
+    response_model=LocateResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def locate_requirement(
+    request: Request,
+    package_id: uuid.UUID,
+    body: LocateRequest,
+    db: AsyncSession = Depends(get_read_db),
+) -> LocateResponse:
+    """Find the sections a customer requirement would change.
+
+    Sections are ranked locally from keyword, cross-reference and vector
+    indexes; with ``confirm``, only the top ``k`` bodies go to the copilot.
+    """
+    package = await post_service.get_package(db, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+
+    executor = get_parse_executor(request)
+    admission = request.app.state.admission
+    try:
+        # Only confirmation calls the copilot, so only then is it admitted.
+        async with (
+            admission.admit("copilot", admission.client_of(request.scope))
+            if body.confirm
+            else nullcontext()
+        ):
+            result = await pooled(
+                executor,
+                locator_service.locate(
+                    db, package, body.requirement, executor,
+                    Copilot() if body.confirm else None, body.k,
+                ),
+            )
+    except AdmissionRejectedError as exc:
+        raise HTTPException(
+            status_code=exc.status,
+            detail=admission_error(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=f"File storage is temporarily unavailable: {exc}",
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="The package has no .SRC file to search.",
+                code="SRC_NOT_FOUND",
+            ).model_dump(),
+        )
+
+    sections = []
+    for c in result.candidates:
+        verdict = result.verdicts.get(c.entry.name)
+        sections.append(
+            LocatedSection(
+                filename=c.entry.file,
+                name=c.entry.name,
+                kind=c.entry.kind,
+                start_line=c.entry.start_line,
+                end_line=c.entry.end_line,
+                score=round(c.score, 4),
+                keyword=round(c.keyword, 4),
+                vector=round(c.vector, 4),
+                xref=round(c.xref, 4),
+                matched_terms=c.matched,
+                confirmed=verdict[0] if verdict else None,
+                reason=verdict[1] if verdict else None,
+            )
+        )
+    return LocateResponse(
+        package_id=str(package.id),
+        requirement=body.requirement,
+        sections=sections,
+        model_confirmed=result.model_confirmed,
+        model_error=result.model_error,
+        prompt_tokens=result.prompt_tokens,
+        whole_post_tokens=result.whole_post_tokens,
+        elapsed_ms=round(result.elapsed_ms, 1),
+    )
+
+
+@router.get(
+    "/{package_id}/sections",
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One section per line"},
+        404: {"model": ErrorResponse},
+    },
+)
+async def stream_sections(
+    package_id: uuid.UUID,
+    q: str | None = None,
+    kind: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> StreamingResponse:
+    """NDJSON: the package's sections in file and line order.
+
+    ``q`` keeps sections whose name contains it (case-insensitive) and
+    ``kind`` filters by section kind. Rows go from a server-side cursor
+    straight to orjson, so thousands of sections stream in constant memory.
+    """
+    package = await post_service.get_package(db, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+
+    async def lines() -> AsyncIterator[bytes]:
+        chunk = bytearray()
+        async for row in post_service.stream_section_rows(package_id, q, kind):
+            chunk += post_service.to_json(row)
+            chunk += b"\n"
+            if len(chunk) >= STREAM_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/{package_id}/files/{file_id}/download")
 async def download_file(
     package_id: uuid.UUID,
     file_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Download a file from a package via MinIO.
 
@@ -145,7 +497,7 @@ async def download_file(
 
     # Download from MinIO
     try:
-        data = await storage.download_file(target_file.minio_key)
+        data = await storage.download_file(target_file.minio_key, target_file.content_hash)
     except Exception as exc:
         raise HTTPException(
             status_code=502,
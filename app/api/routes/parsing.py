@@ -1,17 +1,163 @@
 """Parsing and AI analysis endpoints.
 
-Stub returning 501 until Phase 2 implements the UPG parser.
+Parsing is CPU-bound, so every parse is dispatched to the shared
+``ParseExecutor`` process pool created in the app lifespan. When the pool
+queue is full the route fails fast with 503 + Retry-After instead of
+letting requests pile up behind it.
+
+The ``/parsing/documents`` endpoints back the code viewer: a document is
+parsed once in the pool, then each editor change re-parses only the
+sections it touches (``app.core.parsing.incremental``) and returns a delta.
 """
 
-from fastapi import APIRouter, HTTPException
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+
+from app.core.models.post_processor import (
+    DocumentResponse,
+    EditRequest,
+    EditResponse,
+    ErrorResponse,
+    ParsedPost,
+)
+from app.core.parsing import detect_parser, get_parser
+from app.core.parsing.executor import ParseExecutor, ParserSaturatedError, ParseTimeoutError
+from app.core.parsing.incremental import DocumentStore, EditRangeError, IncrementalDocument
+
+T = TypeVar("T")
 
 router = APIRouter(prefix="/parsing", tags=["parsing"])
 
 
-@router.post("/analyze")
-async def analyze_post():
-    """Parse and analyze a post processor — not yet implemented."""
-    raise HTTPException(
-        status_code=501,
-        detail="Parsing not implemented. Available in Phase 2.",
+def get_parse_executor(request: Request) -> ParseExecutor:
+    return request.app.state.parse_executor
+
+
+def get_document_store(request: Request) -> DocumentStore:
+    return request.app.state.documents
+
+
+async def pooled(executor: ParseExecutor, work: Awaitable[T]) -> T:
+    """Await pool work, mapping saturation to 503 and timeouts to 504."""
+    try:
+        return await work
+    except ParserSaturatedError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=ErrorResponse(
+                message="The parser is busy. Please try again in a moment.",
+                detail=f"{executor.in_flight} parses in flight (capacity {executor.capacity})",
+                code="PARSER_SATURATED",
+            ).model_dump(),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    except ParseTimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail=ErrorResponse(
+                message="Parsing took too long and was abandoned.",
+                detail=str(exc),
+                code="PARSE_TIMEOUT",
+            ).model_dump(),
+        )
+
+
+@router.post("/analyze", response_model=ParsedPost, response_model_exclude={"raw_content"})
+async def analyze_post(
+    request: Request,
+    file: UploadFile = File(...),
+    platform: str | None = None,
+) -> ParsedPost:
+    """Parse a single post processor file and return its structure."""
+    filename = file.filename or "unknown"
+    content = (await file.read()).decode("utf-8", errors="replace")
+
+    if platform:
+        try:
+            parser = get_parser(platform)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=422,
+                detail=ErrorResponse(
+                    message="Unknown CAM platform.", detail=str(exc), code="UNKNOWN_PLATFORM"
+                ).model_dump(),
+            )
+    else:
+        parser = detect_parser(content, filename)
+        if parser is None:
+            raise HTTPException(
+                status_code=422,
+                detail=ErrorResponse(
+                    message="We could not recognise this post processor format.",
+                    detail=f"No parser matched '{filename}'",
+                    code="UNKNOWN_FORMAT",
+                ).model_dump(),
+            )
+
+    executor = get_parse_executor(request)
+    return await pooled(
+        executor,
+        executor.parse(parser.platform, content, post_id=filename, filename=filename),
     )
+
+
+@router.post(
+    "/documents",
+    response_model=DocumentResponse,
+    response_model_exclude={"parsed": {"raw_content"}},
+    status_code=201,
+)
+async def open_document(request: Request, file: UploadFile = File(...)) -> DocumentResponse:
+    """Parse a .SRC / .LIB for editing and keep it open for incremental edits."""
+    filename = file.filename or "unknown"
+    content = (await file.read()).decode("utf-8", errors="replace")
+    executor = get_parse_executor(request)
+    doc = await pooled(
+        executor, executor.submit(IncrementalDocument.from_text, content, filename)
+    )
+    document_id = get_document_store(request).add(doc)
+    return DocumentResponse(document_id=document_id, version=doc.version, parsed=doc.to_parsed())
+
+
+@router.post("/documents/{document_id}/edits", response_model=EditResponse)
+async def edit_document(request: Request, document_id: str, body: EditRequest) -> EditResponse:
+    """Apply editor changes and return what changed structurally.
+
+    Cost is proportional to the sections an edit touches, not the file size.
+    ``version`` must match the document's current version (409 otherwise);
+    the client then re-opens the document. An edit whose range lies outside
+    the document is rejected with 422; the edits before it stay applied.
+    """
+    doc = get_document_store(request).get(document_id)
+    if doc is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                message="This document is no longer open.",
+                detail=f"No open document '{document_id}' on this server",
+                code="DOCUMENT_NOT_FOUND",
+            ).model_dump(),
+        )
+    if body.version != doc.version:
+        raise HTTPException(
+            status_code=409,
+            detail=ErrorResponse(
+                message="The document changed since these edits were made.",
+                detail=f"Edits are against version {body.version}, document is at {doc.version}",
+                code="VERSION_CONFLICT",
+            ).model_dump(),
+        )
+    try:
+        deltas = doc.apply_all(body.edits)
+    except EditRangeError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=ErrorResponse(
+                message="An edit does not fit the document.",
+                detail=f"{exc}; document is at version {doc.version}",
+                code="EDIT_OUT_OF_RANGE",
+            ).model_dump(),
+        ) from exc
+    return EditResponse(document_id=document_id, version=doc.version, deltas=deltas)
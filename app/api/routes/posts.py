@@ -7,35 +7,49 @@ is eliminated. Routes use dependency-injected DB sessions.
 import uuid
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models.post_processor import (
     PackageListResponse,
     PackageResponse,
 )
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 from app.services import post_service
 
 router = APIRouter(prefix="/posts", tags=["post-processors"])
 
 
 @router.get("/", response_model=PackageListResponse)
-async def list_packages(db: AsyncSession = Depends(get_db)):
-    """List all registered post processor packages."""
-    packages = await post_service.list_packages(db)
-    return PackageListResponse(
-        packages=[PackageResponse.model_validate(p) for p in packages],
-        count=len(packages),
+async def list_packages(db: AsyncSession = Depends(get_read_db)) -> Response:
+    """List all registered post processor packages.
+
+    Serialized straight from SQL rows, without ORM objects or pydantic models.
+    """
+    packages = await post_service.list_package_rows(db)
+    return Response(
+        post_service.to_json({"packages": packages, "count": len(packages)}),
+        media_type="application/json",
     )
 
 
 @router.get("/{package_id}", response_model=PackageResponse)
-async def get_package(package_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
-    """Get details for a specific post processor package with its files."""
-    package = await post_service.get_package(db, package_id)
-    if not package:
-        raise HTTPException(status_code=404, detail="Package not found")
-    return PackageResponse.model_validate(package)
+async def get_package(
+    package_id: uuid.UUID, db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    """Get details for a specific post processor package with its files.
+
+    Served from the result cache once the package is ready.
+    """
+    payload, generation = await post_service.cached_response(package_id, "detail")
+    if payload is None:
+        package = await post_service.get_package(db, package_id)
+        if not package:
+            raise HTTPException(status_code=404, detail="Package not found")
+        payload = await post_service.cache_response(
+            package, "detail", PackageResponse.model_validate(package), generation
+        )
+    return Response(payload, media_type="application/json")
 
 
 @router.post("/upload", response_model=PackageResponse, status_code=201)
@@ -0,0 +1,362 @@
+"""Bulk import of delivery ZIPs (e.g. the SharePoint archive) without the HTTP API.
+
+Usage::
+
+    python -m app.cli.bulk_import /mnt/archive/deliveries
+    python -m app.cli.bulk_import --manifest zips.txt --concurrency 16 --batch-size 200
+
+Every ZIP goes through ``validate_zip_contents`` and ``extract_zip_files``,
+exactly as an upload does. For each valid package:
+
+- its files are uploaded to MinIO, with at most ``--uploads`` objects in
+  flight across all packages;
+- its ``post_packages`` and ``post_files`` rows are bulk-inserted
+  ``--batch-size`` packages at a time;
+- each committed batch is enqueued for ingestion over one broker
+  connection.
+
+Progress is appended to a JSONL checkpoint once a batch has been committed
+and enqueued. Rerunning the same command skips every ZIP recorded there.
+Package ids are derived from the ZIP's SHA-256. Work redone after a crash
+therefore overwrites the same MinIO keys, and the insert skips packages
+that already exist, so a resume never duplicates rows. A package that was
+committed but never enqueued (the run died in between) is found on the
+rerun still ``pending`` and enqueued then.
+
+The database, MinIO and broker come from the usual settings
+(``DATABASE_URL``, ``MINIO_ENDPOINT``, ``CELERY_BROKER_URL``). Pointing
+those at local stand-ins is all a test run needs; ``--no-enqueue`` skips
+Celery entirely.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.services import post_service
+
+logger = logging.getLogger(__name__)
+
+# Package ids are uuid5(IMPORT_NAMESPACE, zip sha256), stable across runs.
+IMPORT_NAMESPACE = uuid.UUID("5d0f8c52-3f7e-4b8a-9a56-2d1c6f0e9b41")
+
+Upload = Callable[[str, bytes, str], Awaitable[None]]
+# Returns (inserted ids, ids that already existed and are still pending)
+Commit = Callable[[list[dict], list[dict]], Awaitable[tuple[set[uuid.UUID], set[uuid.UUID]]]]
+Enqueue = Callable[[list[uuid.UUID]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class PreparedPackage:
+    """An uploaded package waiting for its batch to be committed."""
+
+    path: str
+    sha256: str
+    size: int
+    package: dict
+    files: list[dict]
+
+    @property
+    def package_id(self) -> uuid.UUID:
+        return self.package["id"]
+
+
+@dataclass
+class ImportStats:
+    imported: int = 0
+    requeued: int = 0  # committed by an earlier run that never enqueued them
+    duplicate: int = 0
+    invalid: int = 0
+    failed: int = 0
+    skipped: int = 0  # already in the checkpoint
+    bytes: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Packages committed per second."""
+        committed = self.imported + self.requeued + self.duplicate
+        return committed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.imported} imported, {self.requeued} requeued, {self.duplicate} duplicate, "
+            f"{self.invalid} invalid, {self.failed} failed, {self.skipped} skipped "
+            f"in {self.elapsed:.1f}s "
+            f"({self.rate:.1f} packages/s, {self.bytes / 1e6 / (self.elapsed or 1):.1f} MB/s)"
+        )
+
+
+class Checkpoint:
+    """Append-only JSONL record of finished ZIPs, keyed by resolved path."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            with path.open() as fh:
+                for line in fh:
+                    try:
+                        self.done.add(json.loads(line)["path"])
+                    except (ValueError, KeyError):
+                        continue  # torn last line from a crash
+
+    def __contains__(self, zip_path: str) -> bool:
+        return zip_path in self.done
+
+    def record(self, entries: list[dict]) -> None:
+        if not entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as fh:
+            fh.writelines(json.dumps(entry) + "\n" for entry in entries)
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.done.update(entry["path"] for entry in entries)
+
+
+def discover(root: Path | None = None, manifest: Path | None = None) -> Iterator[Path]:
+    """ZIPs under ``root`` (recursively), then those listed in ``manifest``."""
+    if root is not None:
+        yield from sorted(p for p in root.rglob("*") if p.suffix.lower() == ".zip")
+    if manifest is not None:
+        for line in manifest.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                path = Path(line)
+                yield path if path.is_absolute() else manifest.parent / path
+
+
+def _read_zip(path: Path) -> tuple[bytes, str, list[str], list[tuple[str, bytes]]]:
+    """Read, hash, validate and extract one ZIP (runs in a thread)."""
+    content = path.read_bytes()
+    errors = post_service.validate_zip_contents(content)
+    files = [] if errors else post_service.extract_zip_files(content)
+    return content, hashlib.sha256(content).hexdigest(), errors, files
+
+
+async def _upload(key: str, data: bytes, content_hash: str) -> None:
+    from app.services.storage import storage
+
+    await storage.upload_file(key, data, content_hash=content_hash)
+
+
+async def _commit(
+    packages: list[dict], files: list[dict]
+) -> tuple[set[uuid.UUID], set[uuid.UUID]]:
+    from app.db.database import async_session
+
+    async with async_session() as db:
+        return await post_service.bulk_create_packages(db, packages, files)
+
+
+async def _enqueue(package_ids: list[uuid.UUID]) -> None:
+    from app.workers.celery_app import celery_app
+    from app.workers.tasks import ingest_package
+
+    def send() -> None:
+        with celery_app.producer_or_acquire() as producer:
+            for package_id in package_ids:
+                ingest_package.apply_async((str(package_id),), producer=producer)
+
+    await asyncio.to_thread(send)
+
+
+async def _no_enqueue(package_ids: list[uuid.UUID]) -> None:
+    return None
+
+
+class BulkImporter:
+    """Bounded-concurrency import pipeline; see the module docstring."""
+
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        *,
+        concurrency: int = 8,
+        uploads: int = 32,
+        batch_size: int = 100,
+        upload: Upload = _upload,
+        commit: Commit = _commit,
+        enqueue: Enqueue = _enqueue,
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self._upload_slots = asyncio.Semaphore(uploads)
+        self._upload_fn = upload
+        self._commit_fn = commit
+        self._enqueue_fn = enqueue
+        self._pending: list[PreparedPackage] = []
+        self._flush_lock = asyncio.Lock()
+        self._claimed: set[uuid.UUID] = set()
+        self.stats = ImportStats()
+
+    async def _upload_one(self, key: str, data: bytes, content_hash: str) -> None:
+        async with self._upload_slots:
+            await self._upload_fn(key, data, content_hash)
+
+    async def _prepare(self, path: Path) -> PreparedPackage | None:
+        content, digest, errors, files = await asyncio.to_thread(_read_zip, path)
+        if errors:
+            self.stats.invalid += 1
+            logger.warning("%s: rejected - %s", path, "; ".join(errors))
+            self.checkpoint.record([{"path": str(path), "status": "invalid", "errors": errors}])
+            return None
+
+        package_id = uuid.uuid5(IMPORT_NAMESPACE, digest)
+        if package_id in self._claimed:  # same bytes under another name in this run
+            self.stats.duplicate += 1
+            self.checkpoint.record(
+                [{"path": str(path), "status": "duplicate", "package_id": str(package_id)}]
+            )
+            return None
+        self._claimed.add(package_id)
+
+        minio_prefix = f"packages/{package_id}/"
+        rows = [post_service.file_row(package_id, minio_prefix, fn, data) for fn, data in files]
+        await asyncio.gather(
+            *(
+                self._upload_one(row["minio_key"], data, row["content_hash"])
+                for row, (_, data) in zip(rows, files)
+            )
+        )
+        package = {
+            "id": package_id,
+            "name": post_service.package_name(files, path.stem),
+            "platform": "camworks",
+            "minio_prefix": minio_prefix,
+            "status": "pending",
+            "file_count": len(files),
+        }
+        return PreparedPackage(str(path), digest, len(content), package, rows)
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            inserted, pending = await self._commit_fn(
+                [p.package for p in batch], [f for p in batch for f in p.files]
+            )
+            await self._enqueue_fn(
+                [p.package_id for p in batch if p.package_id in inserted | pending]
+            )
+            statuses = {}
+            for p in batch:
+                if p.package_id in inserted:
+                    statuses[p.path] = "imported"
+                    self.stats.imported += 1
+                    self.stats.bytes += p.size
+                elif p.package_id in pending:
+                    statuses[p.path] = "requeued"
+                    self.stats.requeued += 1
+                else:
+                    statuses[p.path] = "duplicate"
+                    self.stats.duplicate += 1
+            self.checkpoint.record(
+                [
+                    {
+                        "path": p.path,
+                        "status": statuses[p.path],
+                        "package_id": str(p.package_id),
+                        "sha256": p.sha256,
+                    }
+                    for p in batch
+                ]
+            )
+            logger.info("Committed %d packages; %s", len(batch), self.stats.summary())
+
+    async def _worker(self, paths: Iterator[Path]) -> None:
+        # ``paths`` is shared by all workers; each next() hands out a distinct ZIP.
+        for path in paths:
+            try:
+                prepared = await self._prepare(path)
+            except Exception as exc:  # one bad ZIP or upload must not stop the import
+                self.stats.failed += 1
+                logger.error("%s: failed - %s", path, exc)
+                continue
+            if prepared is not None:
+                self._pending.append(prepared)
+                if len(self._pending) >= self.batch_size:
+                    await self._flush()
+
+    async def run(self, paths: Iterable[Path]) -> ImportStats:
+        """Import every ZIP not already in the checkpoint; returns the counters.
+
+        A failed batch commit or enqueue aborts the run. Batches before it are
+        in the checkpoint and are skipped by a rerun; the failed batch is
+        redone, and those of its packages already committed but still
+        ``pending`` are enqueued.
+        """
+        todo = []
+        for path in paths:
+            resolved = path.resolve()
+            if str(resolved) in self.checkpoint:
+                self.stats.skipped += 1
+            else:
+                todo.append(resolved)
+        shared = iter(todo)
+        workers = [asyncio.create_task(self._worker(shared)) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        await self._flush()
+        return self.stats
+
+
+async def _main(args: argparse.Namespace) -> ImportStats:
+    from app.db.database import dispose_engine, init_engine
+    from app.services.storage import storage
+
+    init_engine()
+    await storage.init_bucket()
+    importer = BulkImporter(
+        Checkpoint(args.checkpoint),
+        concurrency=args.concurrency,
+        uploads=args.uploads,
+        batch_size=args.batch_size,
+        enqueue=_no_enqueue if args.no_enqueue else _enqueue,
+    )
+    try:
+        return await importer.run(discover(args.root, args.manifest))
+    finally:
+        await dispose_engine()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Import a directory tree or manifest of ZIPs.")
+    ap.add_argument("root", type=Path, nargs="?", help="directory searched for *.zip")
+    ap.add_argument("--manifest", type=Path, help="file with one ZIP path per line")
+    ap.add_argument("--checkpoint", type=Path, default=Path(".cache/bulk-import.jsonl"))
+    ap.add_argument("--concurrency", type=int, default=8, help="packages in flight")
+    ap.add_argument("--uploads", type=int, default=32, help="MinIO uploads in flight")
+    ap.add_argument("--batch-size", type=int, default=100, help="packages per DB commit")
+    ap.add_argument("--no-enqueue", action="store_true", help="do not queue ingestion")
+    args = ap.parse_args(argv)
+    if args.root is None and args.manifest is None:
+        ap.error("give a directory, --manifest, or both")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = asyncio.run(_main(args))
+    print(stats.summary())
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Corpus accuracy runner for the PARS-03 gate.
+
+Walks ``corpus/<platform>/``, parses every file with that platform's parser
+in a process pool and scores each file on its structure: sections found,
+unknown directive lines, and unbalanced ``:ATTRNAME``/``:ATTREND`` and
+``:IF``/``:ENDIF`` blocks. A file passes when the parser returned some
+structure, every block is balanced, and unknown directives stay under
+``--max-unknown-ratio`` of its directive lines. The gate passes when at
+least ``--gate`` (80%) of files pass.
+
+Scores are cached by content hash, together with a fingerprint of the
+``app.core.parsing`` sources and of this module. A rerun therefore only parses files that
+changed since the last run, and a parser edit invalidates the whole cache.
+The cache holds only the measured counts; pass/fail is decided on every
+run, so changing ``--max-unknown-ratio`` takes effect on cached files too.
+
+Usage::
+
+    python -m app.cli.corpus_accuracy corpus --out corpus-accuracy.json
+    python -m app.cli.corpus_accuracy corpus --platform camworks --jobs 8 --slowest 50
+
+The exit status is 1 when the gate fails, so the runner can be used in CI.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path, PureWindowsPath
+
+from app.core.parsing import PARSER_MAP, companion, get_parser, upg
+
+DEFAULT_GATE = 0.8
+DEFAULT_MAX_UNKNOWN_RATIO = 0.05
+
+ATTR_BLOCK_ERROR = re.compile(r":ATTR(?:NAME|END)\b")
+IF_BLOCK_ERROR = re.compile(r":(?:IF|ELSE|ELSEIF|ENDIF)\b")
+
+
+@dataclass(slots=True)
+class FileScore:
+    path: str  # relative to the corpus root, POSIX separators
+    platform: str
+    sha256: str
+    lines: int = 0
+    sections: int = 0
+    structure: int = 0  # sections + attributes + variables + settings + labels
+    directives: int = 0
+    unknown_directives: int = 0
+    unbalanced_attr: int = 0
+    unbalanced_if: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    exception: str | None = None
+    passed: bool = False
+    cached: bool = False
+
+
+def parser_fingerprint() -> str:
+    """Digest of the parser and scoring sources, so cached scores follow edits."""
+    digest = hashlib.sha256()
+    package = Path(upg.__file__).parent
+    for path in [*sorted(package.glob("*.py")), Path(__file__)]:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def discover(root: Path, platforms: list[str] | None = None) -> list[tuple[str, str]]:
+    """``(platform, relative path)`` for every parseable file under ``root``."""
+    found: list[tuple[str, str]] = []
+    for platform_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        platform = platform_dir.name
+        if platform not in PARSER_MAP or (platforms and platform not in platforms):
+            continue
+        extensions = {ext.upper() for ext in PARSER_MAP[platform].extensions}
+        for path in sorted(platform_dir.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            if extensions and path.suffix.upper() not in extensions:
+                continue
+            found.append((platform, path.relative_to(root).as_posix()))
+    return found
+
+
+def _count_unknown(platform: str, filename: str, content: str) -> tuple[int, int]:
+    """``(directive lines, unknown directive lines)`` for UPG source files."""
+    if platform != "camworks" or PureWindowsPath(filename).suffix.upper() in (
+        companion.TABLE_PARSERS
+    ):
+        return 0, 0
+    directives = unknown = 0
+    for lineno, raw in enumerate(content.splitlines(), start=1):
+        if raw.lstrip().startswith(":"):
+            directives += 1
+            if upg.tokenize_line(raw, lineno).kind is upg.Kind.UNKNOWN:
+                unknown += 1
+    return directives, unknown
+
+
+def score_file(root: str, platform: str, relpath: str, digest: str) -> FileScore:
+    """Parse one file and measure it. Runs inside a pool worker."""
+    score = FileScore(path=relpath, platform=platform, sha256=digest)
+    content = (Path(root) / relpath).read_bytes().decode("utf-8", errors="replace")
+    filename = PureWindowsPath(relpath).name
+    score.lines = content.count("\n") + (not content.endswith("\n") and bool(content))
+    start = time.perf_counter()
+    try:
+        parsed = get_parser(platform).parse(content, relpath, filename)
+    except Exception as exc:  # a crash is a failed file, not a failed run
+        score.seconds = time.perf_counter() - start
+        score.exception = f"{type(exc).__name__}: {exc}"
+        return score
+    score.seconds = time.perf_counter() - start
+
+    score.sections = len(parsed.sections) or len(parsed.section_names)
+    score.structure = (
+        score.sections
+        + len(parsed.attributes)
+        + len(parsed.variables)
+        + len(parsed.settings)
+        + len(parsed.labels)
+    )
+    score.errors = len(parsed.errors)
+    for error in parsed.errors:
+        if ATTR_BLOCK_ERROR.search(error):
+            score.unbalanced_attr += 1
+        elif IF_BLOCK_ERROR.search(error):
+            score.unbalanced_if += 1
+    score.directives, score.unknown_directives = _count_unknown(platform, filename, content)
+    return score
+
+
+def file_passes(score: FileScore, max_unknown_ratio: float) -> bool:
+    """The per-file pass criteria, applied to fresh and cached scores alike."""
+    if score.exception is not None:
+        return False
+    unknown_ratio = score.unknown_directives / score.directives if score.directives else 0.0
+    return (
+        score.structure > 0
+        and score.unbalanced_attr == 0
+        and score.unbalanced_if == 0
+        and unknown_ratio <= max_unknown_ratio
+    )
+
+
+def _score_task(task: tuple[str, str, str, str]) -> FileScore:
+    return score_file(*task)
+
+
+class ScoreCache:
+    """JSON file of scores keyed by path; entries are valid for one sha256."""
+
+    def __init__(self, path: Path | None, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries: dict[str, dict] = {}
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            if data.get("fingerprint") == fingerprint:
+                self.entries = data.get("files", {})
+
+    def lookup(self, relpath: str, digest: str) -> FileScore | None:
+        entry = self.entries.get(relpath)
+        if entry is None or entry["sha256"] != digest:
+            return None
+        known = {f.name for f in fields(FileScore)}
+        return FileScore(**{k: v for k, v in entry["score"].items() if k in known}, cached=True)
+
+    def store(self, score: FileScore) -> None:
+        record = asdict(score)
+        record.pop("cached")
+        record.pop("passed")  # depends on the run's criteria, not on the file
+        self.entries[score.path] = {"sha256": score.sha256, "score": record}
+
+    def save(self, keep: set[str]) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        files = {k: v for k, v in self.entries.items() if k in keep}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"fingerprint": self.fingerprint, "files": files}))
+        os.replace(tmp, self.path)
+
+
+def _rate(passed: int, total: int) -> float:
+    return round(passed / total, 4) if total else 0.0
+
+
+def run(
+    root: Path,
+    *,
+    platforms: list[str] | None = None,
+    jobs: int | None = None,
+    cache_path: Path | None = None,
+    gate: float = DEFAULT_GATE,
+    max_unknown_ratio: float = DEFAULT_MAX_UNKNOWN_RATIO,
+    slowest: int = 20,
+) -> dict:
+    """Score the corpus under ``root`` and return the report as a dict."""
+    started = time.perf_counter()
+    cache = ScoreCache(cache_path, parser_fingerprint())
+    files = discover(root, platforms)
+
+    scores: list[FileScore] = []
+    tasks: list[tuple[str, str, str, str]] = []
+    for platform, relpath in files:
+        # Hashing is far cheaper than parsing, and unlike mtimes it survives
+        # checkouts and copies of the corpus.
+        digest = hashlib.sha256((root / relpath).read_bytes()).hexdigest()
+        cached = cache.lookup(relpath, digest)
+        if cached is not None:
+            scores.append(cached)
+        else:
+            tasks.append((str(root), platform, relpath, digest))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) < 2:
+        fresh = [_score_task(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            fresh = list(pool.map(_score_task, tasks, chunksize=chunksize))
+    for score in fresh:
+        cache.store(score)
+    scores.extend(fresh)
+    scores.sort(key=lambda s: s.path)
+    cache.save({s.path for s in scores})
+    for score in scores:
+        score.passed = file_passes(score, max_unknown_ratio)
+
+    passed = sum(s.passed for s in scores)
+    by_platform: dict[str, dict] = {}
+    for score in scores:
+        stats = by_platform.setdefault(score.platform, {"files": 0, "passed": 0})
+        stats["files"] += 1
+        stats["passed"] += score.passed
+    for stats in by_platform.values():
+        stats["pass_rate"] = _rate(stats["passed"], stats["files"])
+
+    pass_rate = _rate(passed, len(scores))
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "parser_fingerprint": cache.fingerprint,
+        "criteria": {"gate": gate, "max_unknown_ratio": max_unknown_ratio},
+        "summary": {
+            "files": len(scores),
+            "passed": passed,
+            "pass_rate": pass_rate,
+            "gate_passed": bool(scores) and pass_rate >= gate,
+            "parsed": len(fresh),
+            "cached": len(scores) - len(fresh),
+            "parse_seconds": round(sum(s.seconds for s in scores), 4),
+            "wall_seconds": round(time.perf_counter() - started, 4),
+        },
+        "platforms": by_platform,
+        "slowest": [
+            {"path": s.path, "seconds": round(s.seconds, 6), "lines": s.lines}
+            for s in sorted(scores, key=lambda s: s.seconds, reverse=True)[:slowest]
+        ],
+        "files": [asdict(s) for s in scores],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Score parser accuracy over the corpus (PARS-03).")
+    ap.add_argument("root", type=Path, nargs="?", default=Path("corpus"))
+    ap.add_argument("--out", type=Path, default=Path("corpus-accuracy.json"))
+    ap.add_argument("--platform", action="append", help="limit to a platform (repeatable)")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPUs)")
+    ap.add_argument("--cache", type=Path, default=Path(".cache/corpus-accuracy.json"))
+    ap.add_argument("--no-cache", action="store_true", help="re-parse every file")
+    ap.add_argument("--slowest", type=int, default=20)
+    ap.add_argument("--gate", type=float, default=DEFAULT_GATE)
+    ap.add_argument("--max-unknown-ratio", type=float, default=DEFAULT_MAX_UNKNOWN_RATIO)
+    args = ap.parse_args(argv)
+
+    report = run(
+        args.root,
+        platforms=args.platform,
+        jobs=args.jobs,
+        cache_path=None if args.no_cache else args.cache,
+        gate=args.gate,
+        max_unknown_ratio=args.max_unknown_ratio,
+        slowest=args.slowest,
+    )
+    args.out.write_text(json.dumps(report, indent=2))
+
+    summary = report["summary"]
+    print(
+        f"{summary['passed']}/{summary['files']} files passed "
+        f"({summary['pass_rate']:.1%}, gate {args.gate:.0%}) -- "
+        f"{summary['parsed']} parsed, {summary['cached']} cached, "
+        f"{summary['wall_seconds']:.2f}s; report: {args.out}"
+    )
+    return 0 if summary["gate_passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
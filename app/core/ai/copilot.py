@@ -5,39 +5,71 @@ The copilot assists CAM engineers with understanding, modifying, and troubleshoo
 post processors without replacing their expertise.
 """
 
+from dataclasses import dataclass
+
 from app.config import get_settings
+from app.core import metrics
 from app.core.ai.prompts import SYSTEM_PROMPT
 
+# Context beyond this many characters is cut off before it is sent.
+MAX_CONTEXT_CHARS = 8000
+
+
+class CopilotUnavailableError(RuntimeError):
+    """No API key is configured."""
+
+
+@dataclass(slots=True)
+class Completion:
+    text: str
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+
+
+def estimate_tokens(context: str, question: str) -> int:
+    """Rough input size of a request (about four characters per token)."""
+    chars = min(len(context), MAX_CONTEXT_CHARS) + len(question) + len(SYSTEM_PROMPT)
+    return chars // 4 + 1
+
 
 class Copilot:
-    """AI-powered assistant for post processor tasks."""
+    """AI-powered assistant for post processor tasks.
 
-    async def ask(
+    ``max_retries`` is passed to the SDK client; batch analysis sets it to 0
+    and retries through its own scheduler instead.
+    """
+
+    def __init__(self, max_retries: int | None = None) -> None:
+        self.max_retries = max_retries
+        self._client = None
+
+    def _get_client(self, api_key: str):  # type: ignore[no-untyped-def]
+        if self._client is None:
+            import anthropic
+
+            kwargs = {} if self.max_retries is None else {"max_retries": self.max_retries}
+            self._client = anthropic.AsyncAnthropic(api_key=api_key, **kwargs)
+        return self._client
+
+    async def complete(
         self,
         context: str,
         question: str,
         platform: str = "camworks",
-    ) -> str:
-        """Ask the copilot a question about a post processor.
-
-        Args:
-            context: The raw post processor content or parsed summary.
-            question: The engineer's question.
-            platform: The CAM platform (camworks, delmia, mastercam).
+        subject: str = "post processor file",
+    ) -> Completion:
+        """Ask a question and return the answer with token usage.
 
-        Returns:
-            The AI-generated response.
+        Unlike ``ask``, API errors propagate to the caller, and so does
+        ``CopilotUnavailableError`` when no API key is configured. ``subject``
+        names what the context is in the prompt.
         """
         settings = get_settings()
-
         if not settings.anthropic_api_key:
-            return "[Copilot unavailable — ANTHROPIC_API_KEY not configured]"
-
-        try:
-            import anthropic
-
-            client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+            raise CopilotUnavailableError("ANTHROPIC_API_KEY not configured")
 
+        client = self._get_client(settings.anthropic_api_key)
+        with metrics.timed("copilot_request_duration_seconds", model=settings.ai_model):
             message = await client.messages.create(
                 model=settings.ai_model,
                 max_tokens=2048,
@@ -46,15 +78,50 @@ class Copilot:
                     {
                         "role": "user",
                         "content": (
-                            f"Here is a {platform} post processor file:\n\n"
-                            f"```\n{context[:8000]}\n```\n\n"
+                            f"Here is a {platform} {subject}:\n\n"
+                            f"```\n{context[:MAX_CONTEXT_CHARS]}\n```\n\n"
                             f"Question: {question}"
                         ),
                     }
                 ],
             )
 
-            return message.content[0].text
+        completion = Completion(message.content[0].text)
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            completion.input_tokens = usage.input_tokens
+            completion.output_tokens = usage.output_tokens
+            metrics.inc(
+                "copilot_tokens_total", usage.input_tokens,
+                model=settings.ai_model, direction="in",
+            )
+            metrics.inc(
+                "copilot_tokens_total", usage.output_tokens,
+                model=settings.ai_model, direction="out",
+            )
+        return completion
+
+    async def ask(
+        self,
+        context: str,
+        question: str,
+        platform: str = "camworks",
+        subject: str = "post processor file",
+    ) -> str:
+        """Ask the copilot a question about a post processor.
+
+        Args:
+            context: The raw post processor content or parsed summary.
+            question: The engineer's question.
+            platform: The CAM platform (camworks, delmia, mastercam).
+            subject: What the context is, e.g. "customization delta".
 
+        Returns:
+            The AI-generated response.
+        """
+        try:
+            return (await self.complete(context, question, platform, subject)).text
+        except CopilotUnavailableError:
+            return "[Copilot unavailable — ANTHROPIC_API_KEY not configured]"
         except Exception as e:
             return f"[Copilot error: {e}]"
@@ -0,0 +1,148 @@
+"""Concurrency- and rate-limit-aware scheduling of model calls.
+
+Batch analysis fires one model call per package. Awaited one by one, the
+wall-clock time is the sum of call latencies. ``CallScheduler`` keeps up to
+``concurrency`` calls in flight and starts them no faster than the account's
+request and input-token limits refill. The batch then runs close to the rate
+limit rather than the latency.
+
+Retries:
+
+- Transient failures are retried with capped exponential backoff and
+  jitter, outside the concurrency slot so other calls keep going. These are
+  429, 408/409, 5xx, 529 overloaded, and connection errors or timeouts.
+- A 429 pauses every caller of the scheduler until its ``retry-after`` has
+  passed, since they all share the exhausted limit.
+- Anything else (400, 401, a bad prompt) raises on the first attempt.
+
+Exceptions are classified by ``status_code`` and class name, so this module
+never imports ``anthropic``.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+RETRYABLE_ERRORS = frozenset({"APIConnectionError", "APITimeoutError"})
+
+
+def retry_after(exc: BaseException) -> tuple[bool, float | None]:
+    """``(retryable, server-requested delay in seconds)`` for a failed call."""
+    if isinstance(exc, (ConnectionError, TimeoutError)) or any(
+        cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__
+    ):
+        return True, None
+    if getattr(exc, "status_code", None) not in RETRYABLE_STATUS:
+        return False, None
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return True, float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return True, None
+
+
+class TokenBucket:
+    """Continuously refilled budget of ``per_minute`` units, up to ``capacity``.
+
+    The capacity defaults to a full minute's budget, mirroring how the API
+    enforces its own limits. Waiters are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)  # an oversized request waits for a full bucket
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+class CallScheduler:
+    """Runs async calls with bounded concurrency, rate limits and retries.
+
+    One scheduler is shared by everything that spends the same API key in
+    this process. ``requests_per_minute`` or ``tokens_per_minute`` of 0
+    disables that limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._slots = asyncio.Semaphore(concurrency)
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._resume_at = 0.0
+
+    def _backoff(self, attempt: int, hint: float | None) -> float:
+        if hint is not None:
+            return min(hint, self.max_delay)
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        tokens: int = 0,
+        on_retry: Callable[[int, BaseException, float], object] | None = None,
+    ) -> T:
+        """Await ``fn()`` within the limits, retrying transient failures.
+
+        ``tokens`` is the call's estimated input size. ``on_retry(attempt,
+        exc, delay)`` is called before each backoff sleep. The last
+        exception is re-raised once ``max_attempts`` is exhausted.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            async with self._slots:
+                while (pause := self._resume_at - time.monotonic()) > 0:
+                    await asyncio.sleep(pause)
+                if self._requests is not None:
+                    await self._requests.acquire()
+                if self._tokens is not None and tokens:
+                    await self._tokens.acquire(tokens)
+                try:
+                    return await fn()
+                except Exception as exc:
+                    retryable, hint = retry_after(exc)
+                    if not retryable or attempt >= self.max_attempts:
+                        raise
+                    delay = self._backoff(attempt, hint)
+                    if getattr(exc, "status_code", None) == 429:
+                        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                    if on_retry is not None:
+                        on_retry(attempt, exc, delay)
+            await asyncio.sleep(delay)
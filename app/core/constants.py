@@ -1,7 +1,15 @@
-"""Constants for UPG file validation.
+"""Shared constants.
 
-The 7 extensions below are confirmed complete from corpus scan
+The 7 UPG extensions below are confirmed complete from corpus scan
 (see 01-RESEARCH.md). No unknown UPG extensions exist.
 """
 
 VALID_UPG_EXTENSIONS = frozenset({".SRC", ".LIB", ".CTL", ".KIN", ".ATR", ".PINF", ".LNG"})
+
+# Redis sorted set of Celery worker ids scored by last heartbeat (unix seconds).
+# Written by the worker, read by the API readiness probe.
+WORKER_HEARTBEAT_KEY = "veripost:workers:heartbeat"
+
+# Redis counter bumped by the ingest worker whenever section-graph rows change;
+# the API rebuilds its cached SectionGraph when the value moves.
+SECTION_GRAPH_VERSION_KEY = "veripost:graph:version"
@@ -0,0 +1,228 @@
+"""Structural delta between a customer post and the template it was created from.
+
+Customer posts start as a copy of a base HRS template (the ``Created From:``
+header names it) and are then customized. Diffing both whole files, or
+sending both to the model, is mostly noise. ``fingerprint`` reduces a .SRC
+to what can differ:
+
+- one hash per section of its normalized body (comments, blank lines and
+  whitespace runs dropped), plus the normalized lines for diffing;
+- defines, header settings, ``:ATTRNAME`` blocks and the library list.
+
+``diff`` compares two fingerprints. ``render`` turns the result into a
+compact text that fits the copilot's context budget. ``similarity``
+(Jaccard overlap of ``(section, hash)`` pairs) ranks template candidates
+when a post has no usable ``Created From:`` header.
+
+Fingerprints are plain picklable dataclasses, so they can be built in the
+parse process pool and cached by content hash. The ingest worker stores the
+same section hashes in ``post_sections.body_hash`` (``buffer_section_hashes``)
+for near-duplicate detection (``app.core.minhash``).
+"""
+
+import difflib
+import hashlib
+import mmap
+import re
+from dataclasses import dataclass, field
+from pathlib import PureWindowsPath
+
+from app.core.ai.copilot import MAX_CONTEXT_CHARS
+from app.core.models.post_processor import (
+    CustomizationDelta,
+    ParsedSection,
+    SectionChange,
+    ValueChange,
+)
+from app.core.parsing import upg
+
+WHITESPACE_RUN = re.compile(r"\s+")
+# Diff lines kept per changed section, in the delta and in the prompt.
+MAX_DIFF_LINES = 40
+
+
+@dataclass(slots=True)
+class PostFingerprint:
+    filename: str
+    created_from: str | None = None
+    sections: dict[str, str] = field(default_factory=dict)  # name -> body hash
+    bodies: dict[str, list[str]] = field(default_factory=dict)  # name -> normalized lines
+    defines: dict[str, str] = field(default_factory=dict)
+    settings: dict[str, str] = field(default_factory=dict)
+    attributes: dict[str, dict[str, str]] = field(default_factory=dict)
+    libraries: list[str] = field(default_factory=list)
+
+
+def normalize_lines(lines: list[str]) -> list[str]:
+    """Drop comments and blank lines and collapse whitespace, keeping line order."""
+    normalized = []
+    for raw in lines:
+        text = raw.strip()
+        if text and text[0] not in "*;":
+            normalized.append(WHITESPACE_RUN.sub(" ", text))
+    return normalized
+
+
+def section_hash(lines: list[str]) -> str:
+    """Hash of already-normalized section lines."""
+    return hashlib.blake2b("\n".join(lines).encode(), digest_size=16).hexdigest()
+
+
+def buffer_section_hashes(
+    buffer: bytes | mmap.mmap, index: upg.LineIndex, sections: list[ParsedSection]
+) -> list[str]:
+    """``section_hash`` of each section body, read line by line from a buffer.
+
+    Equal to the hashes ``fingerprint`` computes from the decoded text; used
+    by the ingest worker, which parses from an ``mmap``.
+    """
+    hashes = []
+    for s in sections:
+        lines = [
+            buffer[slice(*index.span(n))].decode("utf-8", errors="replace")
+            for n in range(s.start_line + 1, s.end_line + 1)
+        ]
+        hashes.append(section_hash(normalize_lines(lines)))
+    return hashes
+
+
+def fingerprint(content: str, filename: str) -> PostFingerprint:
+    """Parse a UPG .SRC and reduce it to a ``PostFingerprint``."""
+    parsed = upg.parse_upg(content, filename)
+    lines = content.splitlines()
+    fp = PostFingerprint(
+        filename=filename,
+        created_from=parsed.metadata.get("Created From"),
+        defines=dict(parsed.defines),
+        settings=dict(parsed.settings),
+        attributes={a.name: dict(a.fields) for a in parsed.attributes if a.name},
+        libraries=list(parsed.libraries),
+    )
+    for section in parsed.sections:
+        # A repeated section name overrides the earlier one, as in UPG itself.
+        body = normalize_lines(lines[section.start_line : section.end_line])
+        fp.bodies[section.name] = body
+        fp.sections[section.name] = section_hash(body)
+    return fp
+
+
+def template_filename(created_from: str) -> str:
+    """``Created From:`` value -> the template's .SRC filename, upper-cased."""
+    name = PureWindowsPath(created_from.strip().strip('"')).name.upper()
+    return name if name.endswith(".SRC") else name + ".SRC"
+
+
+def similarity(a: PostFingerprint, b: PostFingerprint) -> float:
+    """Jaccard overlap of identical sections (same name and normalized body)."""
+    pairs_a, pairs_b = set(a.sections.items()), set(b.sections.items())
+    union = len(pairs_a | pairs_b)
+    return len(pairs_a & pairs_b) / union if union else 0.0
+
+
+def _dict_changes(
+    post: dict[str, str], template: dict[str, str]
+) -> tuple[dict[str, str], list[str], dict[str, ValueChange]]:
+    added = {k: v for k, v in post.items() if k not in template}
+    removed = [k for k in template if k not in post]
+    changed = {
+        k: ValueChange(old=template[k], new=v)
+        for k, v in post.items()
+        if k in template and template[k] != v
+    }
+    return added, removed, changed
+
+
+def _section_change(name: str, old: list[str], new: list[str]) -> SectionChange:
+    lines = [
+        line
+        for line in difflib.unified_diff(old, new, n=0, lineterm="")
+        if not line.startswith(("---", "+++", "@@"))
+    ]
+    return SectionChange(
+        name=name,
+        lines_added=sum(line.startswith("+") for line in lines),
+        lines_removed=sum(line.startswith("-") for line in lines),
+        diff=lines[:MAX_DIFF_LINES],
+        truncated=len(lines) > MAX_DIFF_LINES,
+    )
+
+
+def diff(post: PostFingerprint, template: PostFingerprint) -> CustomizationDelta:
+    """What ``post`` adds, removes or changes relative to ``template``."""
+    defines_added, defines_removed, defines_changed = _dict_changes(
+        post.defines, template.defines
+    )
+    settings_added, settings_removed, settings_changed = _dict_changes(
+        post.settings, template.settings
+    )
+    attributes_changed: dict[str, dict[str, ValueChange]] = {}
+    for name, fields in post.attributes.items():
+        if name in template.attributes and template.attributes[name] != fields:
+            old = template.attributes[name]
+            attributes_changed[name] = {
+                key: ValueChange(old=old.get(key), new=fields.get(key))
+                for key in dict.fromkeys([*old, *fields])
+                if old.get(key) != fields.get(key)
+            }
+    return CustomizationDelta(
+        sections_added=[s for s in post.sections if s not in template.sections],
+        sections_removed=[s for s in template.sections if s not in post.sections],
+        sections_changed=[
+            _section_change(name, template.bodies[name], post.bodies[name])
+            for name, digest in post.sections.items()
+            if name in template.sections and template.sections[name] != digest
+        ],
+        sections_unchanged=sum(
+            template.sections.get(name) == digest for name, digest in post.sections.items()
+        ),
+        defines_added=defines_added,
+        defines_removed=defines_removed,
+        defines_changed=defines_changed,
+        settings_added=settings_added,
+        settings_removed=settings_removed,
+        settings_changed=settings_changed,
+        attributes_added=[a for a in post.attributes if a not in template.attributes],
+        attributes_removed=[a for a in template.attributes if a not in post.attributes],
+        attributes_changed=attributes_changed,
+        libraries_added=[lib for lib in post.libraries if lib not in template.libraries],
+        libraries_removed=[lib for lib in template.libraries if lib not in post.libraries],
+    )
+
+
+def render(delta: CustomizationDelta, limit: int = MAX_CONTEXT_CHARS) -> str:
+    """The delta as prompt text: header-level changes first, then section diffs."""
+    out = [
+        f"Sections: {len(delta.sections_added)} added, {len(delta.sections_removed)} removed, "
+        f"{len(delta.sections_changed)} changed, {delta.sections_unchanged} unchanged"
+    ]
+
+    def values(title: str, added: dict, removed: list, changed: dict) -> None:
+        out.extend(f"{title} added: {k} = {v}" for k, v in added.items())
+        out.extend(f"{title} removed: {k}" for k in removed)
+        out.extend(f"{title} changed: {k}: {c.old} -> {c.new}" for k, c in changed.items())
+
+    values("Define", delta.defines_added, delta.defines_removed, delta.defines_changed)
+    values("Setting", delta.settings_added, delta.settings_removed, delta.settings_changed)
+    out.extend(f"Library added: {lib}" for lib in delta.libraries_added)
+    out.extend(f"Library removed: {lib}" for lib in delta.libraries_removed)
+    out.extend(f"Attribute added: {a}" for a in delta.attributes_added)
+    out.extend(f"Attribute removed: {a}" for a in delta.attributes_removed)
+    for name, fields in delta.attributes_changed.items():
+        out.extend(f"Attribute changed: {name}.{k}: {c.old} -> {c.new}" for k, c in fields.items())
+    if delta.sections_added:
+        out.append("Sections added: " + ", ".join(delta.sections_added))
+    if delta.sections_removed:
+        out.append("Sections removed: " + ", ".join(delta.sections_removed))
+
+    text = "\n".join(out)
+    for change in delta.sections_changed:
+        block = (
+            f"\n\n:SECTION={change.name} (+{change.lines_added} -{change.lines_removed})\n"
+            + "\n".join(change.diff)
+            + ("\n..." if change.truncated else "")
+        )
+        if len(text) + len(block) > limit:
+            text += f"\n\n({len(delta.sections_changed)} changed sections; diffs truncated)"
+            break
+        text += block
+    return text[:limit]
@@ -0,0 +1,375 @@
+"""Locate the sections a customer requirement touches, without the whole post.
+
+Sending whole posts to the model to answer "which sections need changing
+for this request?" costs tens of thousands of tokens per question.
+``LocatorIndex`` does most of the work locally, over a package's parsed
+sections, combining three cheap signals:
+
+- keyword: BM25 over section names and bodies. Names count ``NAME_BOOST``
+  times. Identifiers are split on ``_`` and lightly stemmed, and G/M codes
+  add the concept they stand for, so that "coolant" finds ``M08``.
+- cross-reference: words that exactly name a section or an identifier used
+  in bodies (``CALC_INIT_MCODES``, ``COOLANT_TYPE``) hit the sections that
+  define or mention it. The callers of the best hits are pulled in through
+  the call graph.
+- vector: cosine similarity of feature-hashed embeddings (words plus
+  character trigrams), which catches word variants the other two miss.
+
+``shortlist`` unions the best hits of each signal, and ``rank`` re-ranks
+that shortlist by a weighted sum. Only the top ``k`` bodies
+(``confirm_prompt``) are sent to the model for confirmation.
+
+Sections shadowed by an earlier file in the namespace (a library section
+overridden in the .SRC) are not indexed: changing them has no effect. The
+index is a plain picklable object, so it can be built in the parse pool
+and cached by content hash. Embeddings use ``zlib.crc32``, not ``hash``,
+so they are the same in every process.
+"""
+
+import math
+import re
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+from app.core.ai.copilot import MAX_CONTEXT_CHARS, Copilot
+from app.core.parsing import upg
+
+DIM = 256
+NAME_BOOST = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Re-rank weights of the normalized keyword, vector and cross-reference scores.
+W_KEYWORD = 0.55
+W_VECTOR = 0.25
+W_XREF = 0.2
+# Hits taken from each signal into the shortlist.
+SHORTLIST_PER_SIGNAL = 40
+# Share of a callee's score passed on to the sections calling it.
+CALLER_SHARE = 0.5
+# Body lines kept per section in the confirmation prompt.
+MAX_PROMPT_LINES = 60
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+IDENT_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_]*[A-Za-z0-9]")
+CODE_PATTERN = re.compile(r"^([GM])0*(\d+)$")
+STOPWORDS = frozenset(
+    {"AN", "AS", "AT", "BE", "BY", "IN", "IS", "IT", "OF", "OR", "TO", "ONE", "AND", "THE",
+     "FOR", "HOW", "WHAT", "WHICH", "WHEN", "WITH", "THIS", "THAT", "FROM", "INTO", "ONTO",
+     "SHOULD", "MUST", "WANT", "WANTS", "NEED", "NEEDS", "CUSTOMER", "PLEASE", "INSTEAD",
+     "BEFORE", "AFTER", "ALWAYS", "NEVER", "ONLY", "ALSO", "THEY", "THEIR", "THEN", "ARE",
+     "NOT", "BUT", "USE", "USING", "ADD", "MAKE", "POST", "MACHINE"}
+)
+# Words for the same thing in requirements and in code.
+SYNONYMS = {
+    "TOOLCHANGE": ("TOOL", "CHANGE"),
+    "COOLING": ("COOLANT",),
+    "PAUSE": ("DWELL",),
+    "RPM": ("SPINDLE",),
+    "ROTARY": ("ROTATE",),
+    "THREAD": ("TAP",),
+    "CANNED": ("CYCLE",),
+}
+# G/M codes and the concept each stands for.
+CODE_CONCEPTS = {
+    "G00": ("RAPID",), "G01": ("FEED",), "G02": ("ARC",), "G03": ("ARC",),
+    "G04": ("DWELL",), "G28": ("HOME",), "G43": ("LENGTH", "OFFSET"),
+    "G54": ("WORK", "OFFSET"), "G73": ("PECK",), "G80": ("CANCEL", "CYCLE"),
+    "G81": ("DRILL",), "G82": ("DRILL", "DWELL"), "G83": ("PECK",), "G84": ("TAP",),
+    "G85": ("BORE",), "G86": ("BORE",), "G76": ("BORE",), "G93": ("FEED",),
+    "G94": ("FEED",), "G95": ("FEED",), "M00": ("STOP",), "M01": ("STOP",),
+    "M03": ("SPINDLE",), "M04": ("SPINDLE",), "M05": ("SPINDLE",), "M06": ("TOOL", "CHANGE"),
+    "M07": ("COOLANT",), "M08": ("COOLANT",), "M09": ("COOLANT",), "M29": ("RIGID", "TAP"),
+    "M30": ("END",), "M88": ("COOLANT",), "M89": ("COOLANT",),
+}
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping; applied to both sides, so it only has to be consistent.
+
+    ``BORE``, ``BORED``, ``BORES`` and ``BORING`` all become ``BOR``.
+    """
+    for suffix in ("ING", "ED", "S"):
+        if word.endswith(suffix) and not word.endswith("SS") and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            break
+    if len(word) > 3 and word[-1] == "E":
+        word = word[:-1]
+    if len(word) > 3 and word[-1] == word[-2]:
+        word = word[:-1]  # TAPP(ING) -> TAP
+    return word
+
+
+def terms(text: str) -> list[str]:
+    """Normalized search terms of requirement text or section source."""
+    out = []
+    for raw in WORD_PATTERN.findall(text):
+        word = raw.upper()
+        code = CODE_PATTERN.match(word)
+        if code:
+            word = f"{code[1]}{int(code[2]):02d}"
+            out.append(word)
+            out.extend(stem(w) for w in CODE_CONCEPTS.get(word, ()))
+            continue
+        if len(word) < 2 or word.isdigit() or word in STOPWORDS:
+            continue
+        out.extend(stem(w) for w in SYNONYMS.get(word, (word,)))
+    return out
+
+
+def identifiers(text: str) -> set[str]:
+    """Multi-word identifiers (``COOLANT_TYPE``) for exact cross-reference lookup."""
+    return {m.upper() for m in IDENT_PATTERN.findall(text) if "_" in m}
+
+
+def _features(words: list[str]) -> Counter:
+    features: Counter = Counter()
+    for word in words:
+        features[word] += 1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[padded[i : i + 3]] += 0.5
+    return features
+
+
+def embed(words: list[str], dim: int = DIM) -> dict[int, float]:
+    """Sparse L2-normalized feature-hashed embedding of search terms."""
+    vector: dict[int, float] = {}
+    for feature, count in _features(words).items():
+        h = zlib.crc32(feature.encode())
+        slot = h % dim
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[slot] = vector.get(slot, 0.0) + sign * (1.0 + math.log(count))
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {k: v / norm for k, v in vector.items()} if norm else {}
+
+
+@dataclass(slots=True)
+class SectionEntry:
+    file: str
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+    body: str
+
+
+@dataclass(slots=True)
+class Candidate:
+    entry: SectionEntry
+    score: float
+    keyword: float = 0.0
+    vector: float = 0.0
+    xref: float = 0.0
+    matched: list[str] = field(default_factory=list)
+
+
+class LocatorIndex:
+    """Keyword, cross-reference and vector indexes over one package's sections."""
+
+    def __init__(self, entries: list[SectionEntry], calls: dict[str, list[str]]) -> None:
+        self.entries = entries
+        self.chars = 0
+        self._by_name = {e.name: i for i, e in enumerate(entries)}
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._mentions: dict[str, list[int]] = {}
+        self._lengths = array("f")
+        self._vectors = array("f", bytes(4 * DIM * len(entries)))
+        for doc, entry in enumerate(entries):
+            name_terms = terms(entry.name)
+            body_terms = terms(entry.body)
+            counts = Counter(body_terms)
+            for term in name_terms:
+                counts[term] += NAME_BOOST
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc, tf))
+            self._lengths.append(sum(counts.values()))
+            for ident in identifiers(entry.body):
+                self._mentions.setdefault(ident, []).append(doc)
+            for slot, value in embed(name_terms * NAME_BOOST + body_terms).items():
+                self._vectors[doc * DIM + slot] = value
+        self._avg_length = sum(self._lengths) / len(entries) if entries else 0.0
+        # callee -> indexes of the sections calling it
+        self._callers: dict[str, list[int]] = {}
+        for caller, callees in calls.items():
+            if caller in self._by_name:
+                for callee in set(callees):
+                    self._callers.setdefault(callee, []).append(self._by_name[caller])
+
+    @classmethod
+    def build(cls, files: list[tuple[str, str]]) -> "LocatorIndex":
+        """Index ``(filename, content)`` pairs given in namespace order (.SRC first)."""
+        entries: list[SectionEntry] = []
+        calls: dict[str, list[str]] = {}
+        seen: set[str] = set()
+        chars = 0
+        for filename, content in files:
+            chars += len(content)
+            lines = content.splitlines()
+            for section in upg.parse_upg(content, filename).sections:
+                if section.name in seen:
+                    continue  # shadowed by an earlier file (or a repeated name)
+                seen.add(section.name)
+                entries.append(
+                    SectionEntry(
+                        file=filename,
+                        name=section.name,
+                        kind=section.kind,
+                        start_line=section.start_line,
+                        end_line=section.end_line,
+                        body="\n".join(lines[section.start_line : section.end_line]),
+                    )
+                )
+                if section.calls:
+                    calls[section.name] = list(section.calls)
+        index = cls(entries, calls)
+        index.chars = chars
+        return index
+
+    # -- signals ------------------------------------------------------------------
+
+    def _keyword(self, query: list[str]) -> tuple[dict[int, float], dict[int, list[str]]]:
+        """BM25 score and matched terms per section."""
+        scores: dict[int, float] = {}
+        matched: dict[int, list[str]] = {}
+        n = len(self.entries)
+        for term in dict.fromkeys(query):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = 1 - BM25_B + BM25_B * self._lengths[doc] / self._avg_length
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * norm
+                )
+                matched.setdefault(doc, []).append(term)
+        return scores, matched
+
+    def _vector(self, query: list[str]) -> list[float]:
+        q = embed(query)
+        vectors = self._vectors
+        return [
+            max(0.0, sum(v * vectors[base + slot] for slot, v in q.items()))
+            for base in range(0, DIM * len(self.entries), DIM)
+        ]
+
+    def _xref(self, requirement: str) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        for ident in identifiers(requirement):
+            if ident in self._by_name:
+                scores[self._by_name[ident]] = 1.0
+            mentions = self._mentions.get(ident, ())
+            for doc in mentions:
+                # an identifier used everywhere says little about any one section
+                weight = 1.0 / (1.0 + math.log(len(mentions)))
+                scores[doc] = max(scores.get(doc, 0.0), weight)
+        return scores
+
+    # -- ranking ------------------------------------------------------------------
+
+    def shortlist(self, requirement: str) -> list[Candidate]:
+        """Top hits of each signal, unranked, with their normalized signal scores."""
+        query = terms(requirement)
+        keyword, matched = self._keyword(query)
+        vector = self._vector(query)
+        xref = self._xref(requirement)
+        top = max(keyword.values(), default=0.0) or 1.0
+
+        by_keyword = sorted(keyword, key=keyword.__getitem__, reverse=True)
+        by_vector = sorted(range(len(vector)), key=vector.__getitem__, reverse=True)
+        picked = dict.fromkeys(by_keyword[:SHORTLIST_PER_SIGNAL])
+        picked.update(dict.fromkeys(d for d in by_vector[:SHORTLIST_PER_SIGNAL] if vector[d]))
+        picked.update(dict.fromkeys(xref))
+        return [
+            Candidate(
+                entry=self.entries[doc],
+                score=0.0,
+                keyword=keyword.get(doc, 0.0) / top,
+                vector=vector[doc],
+                xref=xref.get(doc, 0.0),
+                matched=matched.get(doc, []),
+            )
+            for doc in picked
+        ]
+
+    def rank(self, requirement: str, k: int = 5) -> list[Candidate]:
+        """The ``k`` best sections for the requirement, best first."""
+        candidates = self.shortlist(requirement)
+        for c in candidates:
+            c.score = W_KEYWORD * c.keyword + W_VECTOR * c.vector + W_XREF * c.xref
+        by_index = {self._by_name[c.entry.name]: c for c in candidates}
+        # A CALC section worth changing drags in the sections that call it.
+        best = sorted(candidates, key=lambda c: c.score, reverse=True)[:k]
+        for c in best:
+            for caller in self._callers.get(c.entry.name, ()):
+                other = by_index.get(caller)
+                if other is None:
+                    other = by_index[caller] = Candidate(entry=self.entries[caller], score=0.0)
+                    candidates.append(other)
+                other.xref = max(other.xref, CALLER_SHARE * c.score)
+        for c in candidates:
+            c.score = W_KEYWORD * c.keyword + W_VECTOR * c.vector + W_XREF * c.xref
+        candidates.sort(key=lambda c: (-c.score, c.entry.name))
+        return candidates[:k]
+
+
+CONFIRM_QUESTION = (
+    "The text above is not a whole post: it is a customer requirement followed by the "
+    "sections a local search ranked most likely to need changing for it. For each section, "
+    "reply with one line `SECTION_NAME: yes - reason` if it must change to meet the "
+    "requirement, or `SECTION_NAME: no - reason` if not. Do not list other sections."
+)
+
+
+def confirm_prompt(
+    requirement: str, candidates: list[Candidate], limit: int = MAX_CONTEXT_CHARS
+) -> str:
+    """The candidate bodies as prompt text, best first, within ``limit`` characters."""
+    text = f"Requirement: {requirement}"
+    for n, c in enumerate(candidates, 1):
+        lines = c.entry.body.splitlines()
+        body = "\n".join(lines[:MAX_PROMPT_LINES])
+        if len(lines) > MAX_PROMPT_LINES:
+            body += "\n..."
+        block = (
+            f"\n\n--- [{n}] {c.entry.file} :SECTION={c.entry.name} "
+            f"lines {c.entry.start_line}-{c.entry.end_line}\n{body}"
+        )
+        if len(text) + len(block) > limit:
+            text += block[: max(limit - len(text) - 4, 0)] + "\n..."
+            break
+        text += block
+    return text
+
+
+VERDICT_PATTERN = re.compile(r"^[\W_]*([A-Za-z]\w*)\W*?[:\-]\s*(yes|no)\b\W*(.*)$", re.I)
+
+
+def parse_verdicts(text: str, names: list[str]) -> dict[str, tuple[bool, str]]:
+    """``NAME: yes|no - reason`` lines from the model; unknown names are ignored."""
+    known = {name.upper(): name for name in names}
+    verdicts: dict[str, tuple[bool, str]] = {}
+    for line in text.splitlines():
+        m = VERDICT_PATTERN.match(line.strip())
+        if m and m[1].upper() in known:
+            verdicts[known[m[1].upper()]] = (m[2].lower() == "yes", m[3].strip())
+    return verdicts
+
+
+async def confirm(
+    model: Copilot, requirement: str, candidates: list[Candidate], platform: str = "camworks"
+) -> dict[str, tuple[bool, str]]:
+    """Ask the model which candidates really need changing; errors propagate.
+
+    ``model`` is anything with ``Copilot.complete``'s signature, such as the
+    offline evaluation's stub.
+    """
+    completion = await model.complete(
+        confirm_prompt(requirement, candidates),
+        CONFIRM_QUESTION,
+        platform,
+        subject="requirement and candidate sections",
+    )
+    return parse_verdicts(completion.text, [c.entry.name for c in candidates])
@@ -0,0 +1,33 @@
+"""Small per-process LRU used by the services' parsed-artifact caches."""
+
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+from app.core import metrics
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Bounded ``str``-keyed LRU; lookups are counted under ``cache_requests_total``."""
+
+    def __init__(self, name: str, max_entries: int) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> V | None:
+        value = self._entries.get(key)
+        metrics.record_cache(self.name, hit=value is not None)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: V) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,174 @@
+"""Prometheus metrics for the API, Celery worker and storage hot paths.
+
+Instrumentation goes through ``timed`` (context manager), ``timed_call``
+(decorator, sync or async), ``observe`` and ``inc``. Until ``configure(True)``
+is called every helper is a single boolean check: ``timed`` hands back a
+shared ``nullcontext`` and ``prometheus_client`` is never imported, so
+disabled metrics cost effectively nothing on the hot path.
+
+The API exposes the default registry at ``/metrics``; the worker serves
+its own registry on ``metrics_worker_port`` (see ``app.workers.celery_app``).
+"""
+
+import inspect
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
+from functools import wraps
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PREFIX = "veripost_"
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+_STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# name -> (type, help text, label names, histogram buckets)
+DEFINITIONS: dict[str, tuple[str, str, tuple[str, ...], tuple[float, ...] | None]] = {
+    "http_request_duration_seconds": (
+        "histogram", "API request latency by route", ("method", "route", "status"),
+        _LATENCY_BUCKETS,
+    ),
+    "ingest_stage_duration_seconds": (
+        "histogram", "Time spent in each package ingest stage", ("stage",), _STAGE_BUCKETS,
+    ),
+    "parse_duration_seconds": (
+        "histogram", "Parse duration per parser", ("parser",), _LATENCY_BUCKETS,
+    ),
+    "parse_bytes_total": ("counter", "Source bytes parsed per parser", ("parser",), None),
+    "storage_operation_duration_seconds": (
+        "histogram", "MinIO operation latency", ("operation",), _LATENCY_BUCKETS,
+    ),
+    "storage_bytes_total": ("counter", "Bytes moved to/from MinIO", ("operation",), None),
+    "db_pool_checkout_wait_seconds": (
+        "histogram", "Time waiting for a DB pool connection", ("pool",), _WAIT_BUCKETS,
+    ),
+    "copilot_request_duration_seconds": (
+        "histogram", "Copilot model call latency", ("model",), _LATENCY_BUCKETS,
+    ),
+    "copilot_tokens_total": (
+        "counter", "Copilot tokens by direction", ("model", "direction"), None,
+    ),
+    "locator_rank_duration_seconds": (
+        "histogram", "Local requirement-to-section ranking latency", (), _LATENCY_BUCKETS,
+    ),
+    "admission_requests_total": (
+        "counter", "Admission checks by policy and result", ("policy", "result"), None,
+    ),
+    "cache_requests_total": (
+        "counter", "Cache lookups by cache and result", ("cache", "result"), None,
+    ),
+    "db_pool_connections": (
+        "gauge", "DB pool connections by pool and state", ("pool", "state"), None,
+    ),
+}
+
+_NULL = nullcontext()
+_enabled = False
+_metrics: dict[str, Any] = {}
+
+
+def configure(enabled: bool) -> None:
+    """Turn metrics on or off for this process. Safe to call repeatedly."""
+    global _enabled
+    if enabled and not _metrics:
+        import prometheus_client
+
+        factories = {
+            "histogram": prometheus_client.Histogram,
+            "counter": prometheus_client.Counter,
+            "gauge": prometheus_client.Gauge,
+        }
+        for name, (kind, doc, labels, buckets) in DEFINITIONS.items():
+            kwargs: dict[str, Any] = {"buckets": buckets} if buckets else {}
+            _metrics[name] = factories[kind](PREFIX + name, doc, labels, **kwargs)
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _child(name: str, labels: dict[str, str]) -> Any:
+    metric = _metrics[name]
+    return metric.labels(**labels) if labels else metric
+
+
+class _Timer:
+    __slots__ = ("_metric", "_start")
+
+    def __init__(self, metric: Any) -> None:
+        self._metric = metric
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._metric.observe(time.perf_counter() - self._start)
+
+
+def timed(name: str, **labels: str) -> Any:
+    """Context manager observing elapsed seconds into histogram ``name``."""
+    if not _enabled:
+        return _NULL
+    return _Timer(_child(name, labels))
+
+
+def timed_call(name: str, **labels: str) -> Callable[[F], F]:
+    """Decorator form of ``timed`` for sync and async functions."""
+
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with _Timer(_child(name, labels)):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(_child(name, labels)):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    if _enabled:
+        _child(name, labels).observe(value)
+
+
+def inc(name: str, amount: float = 1.0, **labels: str) -> None:
+    if _enabled:
+        _child(name, labels).inc(amount)
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    if _enabled:
+        _child(name, labels).set(value)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; hit ratio = hit / (hit + miss) per ``cache``."""
+    if _enabled:
+        result = "hit" if hit else "miss"
+        _metrics["cache_requests_total"].labels(cache=cache, result=result).inc()
+
+
+def render() -> tuple[bytes, str]:
+    """Serialize the default registry in Prometheus text format."""
+    import prometheus_client
+
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
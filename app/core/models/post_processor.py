@@ -7,7 +7,7 @@ Uses from_attributes for direct ORM-to-response serialization.
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class FileResponse(BaseModel):
@@ -55,6 +55,127 @@ class ErrorResponse(BaseModel):
     code: str | None = None
 
 
+class ParsedSection(BaseModel):
+    """A ``:SECTION=`` block; line numbers are 1-based and inclusive."""
+
+    name: str
+    kind: str  # "template" | "calc" | "ini"
+    start_line: int
+    end_line: int
+    template_lines: int = 0
+    calls: list[str] = []
+
+
+class ParsedAttribute(BaseModel):
+    """An ``:ATTRNAME=`` ... ``:ATTREND`` block (or an ``:ATTRID=`` registry entry)."""
+
+    name: str
+    attr_id: int | None = None
+    start_line: int
+    end_line: int | None = None
+    fields: dict[str, str] = {}
+
+
+class ParsedPost(BaseModel):
+    """Normalized result of parsing a single post processor file."""
+
+    post_id: str
+    raw_content: str = ""
+    summary: str = ""
+    section_names: list[str] = []
+    variables: dict[str, str] = {}
+    errors: list[str] = []
+    sections: list[ParsedSection] = []
+    defines: dict[str, str] = {}
+    attributes: list[ParsedAttribute] = []
+    libraries: list[str] = []
+    settings: dict[str, str] = {}
+    metadata: dict[str, str] = {}
+    operations: list[str] = []
+    labels: dict[int, str] = {}  # .LNG label id -> text
+
+
+class TextEdit(BaseModel):
+    """One editor change: Monaco range (1-based, end column exclusive) + new text."""
+
+    start_line: int = Field(ge=1)
+    start_column: int = Field(ge=1)
+    end_line: int = Field(ge=1)
+    end_column: int = Field(ge=1)
+    text: str = ""
+
+
+class ParseDelta(BaseModel):
+    """Structure changes caused by one edit, in absolute line numbers."""
+
+    version: int
+    first_line: int
+    old_line_count: int  # lines the re-parsed region spanned before the edit
+    new_line_count: int  # ... and after it
+    line_shift: int  # add to every line after the region
+    sections: list[ParsedSection] = []  # the region's sections after the edit
+    removed_sections: list[str] = []
+    defines: dict[str, str] = {}  # added or changed in the region
+    removed_defines: list[str] = []
+    attributes: list[ParsedAttribute] = []
+    removed_attributes: list[str] = []
+    errors: list[str] = []  # whole document
+
+
+class DocumentResponse(BaseModel):
+    """An open incremental-parse document."""
+
+    document_id: str
+    version: int
+    parsed: ParsedPost
+
+
+class EditRequest(BaseModel):
+    version: int  # the version the edits were made against
+    edits: list[TextEdit]
+
+
+class EditResponse(BaseModel):
+    document_id: str
+    version: int
+    deltas: list[ParseDelta]
+
+
+class AttributeOverridesResponse(BaseModel):
+    """ATTRIDs where a package's .ATR differs from the master registry."""
+
+    package_id: str
+    atr_hash: str
+    master_hash: str
+    identical: bool
+    added: list[int] = []
+    changed: list[int] = []
+    removed: list[int] = []
+
+
+class ImpactedSection(BaseModel):
+    """A section whose effective definition or callee chain includes the change."""
+
+    file: str  # defining .SRC filename or library name
+    name: str
+
+
+class PackageImpact(BaseModel):
+    package_id: str
+    package_name: str
+    sections: list[ImpactedSection]
+
+
+class ImpactResponse(BaseModel):
+    """Reverse-reachability result for one library section."""
+
+    library: str
+    section: str
+    package_count: int
+    section_count: int
+    packages: list[PackageImpact]
+
+
 class StatusResponse(BaseModel):
     """Response schema for package ingestion status polling."""
 
@@ -64,3 +185,175 @@ class StatusResponse(BaseModel):
     error_detail: str | None = None
     file_count: int | None = None
     section_count: int | None = None
+
+
+class IngestStepResponse(BaseModel):
+    stage: str
+    target: str  # filename for per-file stages, else ""
+    status: str  # "done" or "failed"
+    attempts: int
+    duration_ms: int | None = None
+    error: str | None = None
+    finished_at: datetime | None = None
+
+
+class IngestJobResponse(BaseModel):
+    """One ingestion run of a package and its recorded steps, in completion order."""
+
+    job_id: str
+    package_id: str
+    status: str  # running | retrying | succeeded | failed
+    attempts: int
+    error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    steps: list[IngestStepResponse] = []
+
+
+class BatchAnalysisRequest(BaseModel):
+    """One question asked across every ready package matching the filter."""
+
+    question: str = Field(min_length=3, max_length=4000)
+    package_ids: list[UUID] = []
+    platform: str | None = None
+    search: str | None = None  # substring of the package name, machine or controller
+    limit: int = Field(default=100, ge=1, le=1000)
+
+
+class AnalysisResultResponse(BaseModel):
+    package_id: UUID
+    package_name: str
+    status: str  # "ok" or "error"
+    answer: str | None = None
+    error: str | None = None
+    attempts: int
+    latency_ms: int | None = None
+
+
+class AnalysisBatchResponse(BaseModel):
+    """A batch and the per-package results persisted so far."""
+
+    batch_id: UUID
+    question: str
+    status: str  # pending, running, done, cancelled or failed
+    total: int
+    completed: int
+    failed: int
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+    results: list[AnalysisResultResponse] = []
+
+
+class ValueChange(BaseModel):
+    old: str | None = None
+    new: str | None = None
+
+
+class SectionChange(BaseModel):
+    """A section present in both files whose normalized body differs."""
+
+    name: str
+    lines_added: int
+    lines_removed: int
+    diff: list[str] = []  # "+"/"-" lines, template -> post
+    truncated: bool = False
+
+
+class CustomizationDelta(BaseModel):
+    """What a customer post adds, removes or changes relative to its template."""
+
+    sections_added: list[str] = []
+    sections_removed: list[str] = []
+    sections_changed: list[SectionChange] = []
+    sections_unchanged: int = 0
+    defines_added: dict[str, str] = {}
+    defines_removed: list[str] = []
+    defines_changed: dict[str, ValueChange] = {}
+    settings_added: dict[str, str] = {}
+    settings_removed: list[str] = []
+    settings_changed: dict[str, ValueChange] = {}
+    attributes_added: list[str] = []
+    attributes_removed: list[str] = []
+    attributes_changed: dict[str, dict[str, ValueChange]] = {}
+    libraries_added: list[str] = []
+    libraries_removed: list[str] = []
+
+
+class TemplateMatch(BaseModel):
+    package_id: str
+    package_name: str
+    filename: str
+    matched_by: str  # "requested", "created_from" or "nearest"
+    similarity: float
+
+
+class CustomizationResponse(BaseModel):
+    """A post's structural delta against its template, and the copilot's summary of it."""
+
+    package_id: str
+    filename: str
+    created_from: str | None = None
+    template: TemplateMatch
+    delta: CustomizationDelta
+    prompt_chars: int
+    summary: str | None = None
+
+
+class FamilyMember(BaseModel):
+    package_id: str
+    package_name: str
+    similarity: float | None = None  # estimated, to the queried package
+
+
+class PostFamily(BaseModel):
+    """Packages linked by estimated section similarity at or above the threshold."""
+
+    size: int
+    members: list[FamilyMember]
+
+
+class PostFamiliesResponse(BaseModel):
+    threshold: float
+    family_count: int
+    families: list[PostFamily]
+
+
+class NearDuplicatesResponse(BaseModel):
+    package_id: str
+    threshold: float
+    matches: list[FamilyMember]
+
+
+class LocateRequest(BaseModel):
+    """A customer requirement to map onto the sections that implement it."""
+
+    requirement: str = Field(min_length=3, max_length=4000)
+    k: int = Field(default=5, ge=1, le=20)  # sections sent to the model
+    confirm: bool = True
+
+
+class LocatedSection(BaseModel):
+    filename: str
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+    score: float
+    keyword: float
+    vector: float
+    xref: float
+    matched_terms: list[str] = []
+    confirmed: bool | None = None  # None when the model was not asked
+    reason: str | None = None
+
+
+class LocateResponse(BaseModel):
+    package_id: str
+    requirement: str
+    sections: list[LocatedSection]
+    model_confirmed: bool
+    model_error: str | None = None
+    prompt_tokens: int  # estimated, sent for confirmation
+    whole_post_tokens: int  # estimated, for the indexed .SRC and libraries
+    elapsed_ms: float
@@ -3,9 +3,10 @@
 from app.core.parsing.base import BaseParser
 from app.core.parsing.camworks import CAMWorksParser
 from app.core.parsing.delmia import DELMIAParser
+from app.core.parsing.detection import DETECTION_THRESHOLD, Detection, DetectionEngine
 from app.core.parsing.mastercam import MastercamParser
 
-# All registered parsers, in priority order
+# All registered parsers, in priority order (used as the detection tie-breaker)
 PARSERS: list[BaseParser] = [
     CAMWorksParser(),
     DELMIAParser(),
@@ -14,6 +15,16 @@ PARSERS: list[BaseParser] = [
 
 PARSER_MAP: dict[str, BaseParser] = {p.platform: p for p in PARSERS}
 
+_engine = DetectionEngine(PARSERS)
+
+
+def register_parser(parser: BaseParser) -> None:
+    """Add a platform parser and rebuild the detection pattern."""
+    global _engine
+    PARSERS.append(parser)
+    PARSER_MAP[parser.platform] = parser
+    _engine = DetectionEngine(PARSERS)
+
 
 def get_parser(platform: str) -> BaseParser:
     """Get a parser by explicit platform name."""
@@ -22,9 +33,16 @@ def get_parser(platform: str) -> BaseParser:
     return PARSER_MAP[platform]
 
 
-def detect_parser(content: str) -> BaseParser | None:
-    """Auto-detect the correct parser from file content."""
-    for parser in PARSERS:
-        if parser.detect(content):
-            return parser
-    return None
+def rank_parsers(content: str, filename: str | None = None) -> list[Detection]:
+    """Score every registered parser against the content, best first."""
+    return _engine.rank(content, filename)
+
+
+def detect_parser(
+    content: str,
+    filename: str | None = None,
+    threshold: float = DETECTION_THRESHOLD,
+) -> BaseParser | None:
+    """Auto-detect the correct parser from file content and optional filename."""
+    detection = _engine.best(content, filename, threshold)
+    return detection.parser if detection else None
@@ -1,8 +1,10 @@
 """Base parser interface for post processor files."""
 
 from abc import ABC, abstractmethod
+from functools import cached_property
 
 from app.core.models.post_processor import ParsedPost
+from app.core.parsing.detection import DETECTION_THRESHOLD, DetectionEngine
 
 
 class BaseParser(ABC):
@@ -10,12 +12,28 @@ class BaseParser(ABC):
 
     platform: str = "unknown"
 
+    # Literal content markers -> confidence contributed when the marker is seen.
+    signatures: dict[str, float] = {}
+    # File extensions (".SRC", ".PST", ...) -> confidence contributed by the filename.
+    extensions: dict[str, float] = {}
+
     @abstractmethod
-    async def parse(self, content: str, post_id: str) -> ParsedPost:
-        """Parse raw post processor content into a structured representation."""
+    def parse(self, content: str, post_id: str, filename: str | None = None) -> ParsedPost:
+        """Parse raw post processor content into a structured representation.
+
+        ``filename`` is a hint only; parsers that handle several file types
+        (e.g. CAMWorks ``.SRC`` vs ``.KIN``) use its extension to pick a format.
+
+        Parsing is synchronous, CPU-bound work. Async callers must go through
+        ``app.core.parsing.executor.ParseExecutor`` rather than calling this
+        on the event loop.
+        """
         ...
 
-    @abstractmethod
-    def detect(self, content: str) -> bool:
+    @cached_property
+    def _detector(self) -> DetectionEngine:
+        return DetectionEngine([self])
+
+    def detect(self, content: str, filename: str | None = None) -> bool:
         """Return True if this parser can handle the given content."""
-        ...
+        return self._detector.best(content, filename, DETECTION_THRESHOLD) is not None
@@ -1,14 +1,18 @@
 """Parser for CAMWorks Universal Post Generator (UPG) format.
 
 The UPG format is CAMWorks' proprietary post processor definition format.
-This parser extracts sections, variables, and structure from .ctl / .post files.
-
-TODO: Expand with real UPG format knowledge once corpus is collected (Week 1-2).
+This parser extracts sections, variables, and structure from .SRC / .LIB files
+using the line tokenizer in ``app.core.parsing.upg``. Legacy INI-style
+``[SECTION]`` headers are still recognised. The tabular companion files
+(.KIN, .PINF, .LNG, .ATR) are routed by extension to
+``app.core.parsing.companion``.
 """
 
-import re
+from pathlib import PureWindowsPath
 
+from app.core.constants import VALID_UPG_EXTENSIONS
 from app.core.models.post_processor import ParsedPost
+from app.core.parsing import companion, upg
 from app.core.parsing.base import BaseParser
 
 
@@ -17,40 +21,47 @@ class CAMWorksParser(BaseParser):
 
     platform = "camworks"
 
-    # Common UPG section markers (preliminary — refine with real corpus data)
-    SECTION_PATTERN = re.compile(r"^\s*\[(\w+)\]", re.MULTILINE)
-    VARIABLE_PATTERN = re.compile(r"^\s*(\w+)\s*=\s*(.+)$", re.MULTILINE)
-
-    def detect(self, content: str) -> bool:
-        """Detect if content looks like a CAMWorks UPG file."""
-        indicators = [
-            "Universal Post Generator",
-            "CAMWorks",
-            ".ctl",
-            "[GENERAL]",
-            "[FORMAT]",
-        ]
-        return any(marker in content for marker in indicators)
-
-    async def parse(self, content: str, post_id: str) -> ParsedPost:
+    # A bare ".ctl" mention is weak evidence on its own -- it must be backed
+    # by a UPG directive or banner before CAMWorks claims the file. The legacy
+    # INI headers sit exactly at DETECTION_THRESHOLD, so either one alone
+    # still identifies the file, as it always has.
+    signatures = {
+        "Universal Post Generator": 0.9,
+        "CAMWorks": 0.7,
+        ":SECTION=": 0.6,
+        ":ATTRNAME=": 0.5,
+        ":LIBRARY=": 0.5,
+        ":DEFINE ": 0.3,
+        "[GENERAL]": 0.5,
+        "[FORMAT]": 0.5,
+        ".ctl": 0.15,
+    }
+    extensions = {ext: 0.6 for ext in VALID_UPG_EXTENSIONS}
+
+    def parse(self, content: str, post_id: str, filename: str | None = None) -> ParsedPost:
         """Parse a CAMWorks UPG post processor file."""
-        sections = self.SECTION_PATTERN.findall(content)
-        variables = dict(self.VARIABLE_PATTERN.findall(content))
+        suffix = PureWindowsPath(filename).suffix.upper() if filename else ""
+        table_parser = companion.TABLE_PARSERS.get(suffix)
+        if table_parser is not None:
+            return table_parser(content).to_post(post_id, content)
+
+        parsed = upg.parse_upg(content, post_id)
+        variables = parsed.variables
+        metadata = parsed.metadata
 
         summary_parts = []
-        if "GENERAL" in sections:
+        if "GENERAL" in parsed.section_names:
             summary_parts.append("Contains general configuration")
-        if variables.get("Machine"):
-            summary_parts.append(f"Machine: {variables['Machine']}")
-        if variables.get("Controller"):
-            summary_parts.append(f"Controller: {variables['Controller']}")
-
-        summary = "; ".join(summary_parts) if summary_parts else "CAMWorks post processor file"
-
-        return ParsedPost(
-            post_id=post_id,
-            raw_content=content,
-            summary=summary,
-            section_names=sections,
-            variables=variables,
+        if parsed.sections and not summary_parts:
+            summary_parts.append(f"{len(parsed.sections)} sections")
+        machine = metadata.get("Machine") or variables.get("Machine")
+        if machine:
+            summary_parts.append(f"Machine: {machine}")
+        controller = metadata.get("Controller") or variables.get("Controller")
+        if controller:
+            summary_parts.append(f"Controller: {controller}")
+
+        parsed.summary = (
+            "; ".join(summary_parts) if summary_parts else "CAMWorks post processor file"
         )
+        return parsed
@@ -0,0 +1,379 @@
+"""Parsers for the UPG companion files: ``.KIN``, ``.PINF``, ``.LNG`` and ``.ATR``.
+
+Unlike ``.SRC`` / ``.LIB`` these are flat tables, so each gets a dedicated
+single-pass parser producing a compact, lookup-oriented structure instead of
+going through the UPG tokenizer:
+
+- ``.KIN``  -- fixed ``<value> * <description>`` lines. Numeric values go into
+  an ``array('d')`` (NaN where the value is text, e.g. the simulation name),
+  so direction vectors and axis limits are contiguous doubles.
+- ``.PINF`` -- ``Key = value`` post information.
+- ``.LNG``  -- 70-character label column followed by a ``:NNNN:`` id.
+- ``.ATR``  -- the attribute registry: ``:ATTRID=`` blocks in the
+  18000-18999 range, capped by ``:IDHIGH=``.
+
+LNG and ATR tables keep their ids in a sorted ``array('i')`` with parallel
+columns, so lookup by id is a binary search and lookup by name is a dict hit.
+Each table converts to the wire-level ``ParsedPost`` with ``to_post``.
+"""
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from app.core.models.post_processor import ParsedAttribute, ParsedPost
+
+LNG_LABEL_WIDTH = 70
+ATTR_ID_MIN = 18000
+ATTR_ID_HIGH = 19000
+
+LNG_ID_PATTERN = re.compile(r":(\d+):\s*$")
+_NAN = float("nan")
+
+
+def _is_comment(text: str) -> bool:
+    return not text or text[0] in "*;"
+
+
+# --- .KIN -------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class KinematicsTable:
+    """Machine kinematics: one numeric (or text) value per described entry."""
+
+    descriptions: list[str] = field(default_factory=list)
+    values: array = field(default_factory=lambda: array("d"))
+    lines: array = field(default_factory=lambda: array("i"))
+    text: dict[int, str] = field(default_factory=dict)  # row -> non-numeric value
+    errors: list[str] = field(default_factory=list)
+    _index: dict[str, int] = field(default_factory=dict)
+
+    def row(self, description: str) -> int | None:
+        return self._index.get(description.casefold())
+
+    def get(self, description: str) -> float | str | None:
+        row = self.row(description)
+        if row is None:
+            return None
+        return self.text.get(row, self.values[row])
+
+    def vector(self, prefix: str) -> array:
+        """``prefix X/Y/Z`` as ``array('d')`` (NaN for missing components)."""
+        out = array("d")
+        for axis in "XYZ":
+            row = self.row(f"{prefix} {axis}")
+            out.append(self.values[row] if row is not None else _NAN)
+        return out
+
+    def limits(self) -> array:
+        """Axis limits as a flat ``array('d')`` of ``min, max`` pairs in file order."""
+        out = array("d")
+        for row, desc in enumerate(self.descriptions):
+            if desc.casefold().endswith("limit min"):
+                high = self.row(desc[:-3] + "Max")
+                out.append(self.values[row])
+                out.append(self.values[high] if high is not None else _NAN)
+        return out
+
+    def raw_value(self, row: int) -> str:
+        if row in self.text:
+            return self.text[row]
+        return f"{self.values[row]:.6f}"
+
+    def to_post(self, post_id: str, content: str) -> ParsedPost:
+        five_axis = self.get("5 Axis Type 0-TABLE_TABLE,1-HEAD_HEAD,2-HEAD_TABLE")
+        summary = f"{len(self.descriptions)} kinematic entries"
+        if isinstance(five_axis, float) and not math.isnan(five_axis):
+            kind = ("table/table", "head/head", "head/table")
+            summary += f"; 5-axis {kind[int(five_axis)] if 0 <= five_axis <= 2 else five_axis}"
+        return ParsedPost(
+            post_id=post_id,
+            raw_content=content,
+            summary=summary,
+            errors=self.errors,
+            settings={d: self.raw_value(i) for i, d in enumerate(self.descriptions)},
+        )
+
+
+def parse_kin(content: str) -> KinematicsTable:
+    table = KinematicsTable()
+    for lineno, raw in enumerate(content.splitlines(), start=1):
+        text = raw.strip()
+        if not text:
+            continue
+        value, sep, desc = text.partition("*")
+        value, desc = value.strip(), desc.strip()
+        if not sep or not value:
+            if not value:
+                continue  # whole-line comment
+            table.errors.append(f"Line {lineno}: expected '<value> * <description>'")
+            continue
+        row = len(table.descriptions)
+        try:
+            table.values.append(float(value))
+        except ValueError:
+            table.values.append(_NAN)
+            table.text[row] = value
+        table.descriptions.append(desc)
+        table.lines.append(lineno)
+        key = desc.casefold()
+        if key in table._index:
+            table.errors.append(f"Line {lineno}: duplicate kinematic entry '{desc}'")
+        else:
+            table._index[key] = row
+    return table
+
+
+# --- .PINF ------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class PostInfo:
+    """``Key = value`` post information (name, output extension, info files)."""
+
+    fields: dict[str, str] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    def to_post(self, post_id: str, content: str) -> ParsedPost:
+        name = self.fields.get("PostName")
+        return ParsedPost(
+            post_id=post_id,
+            raw_content=content,
+            summary=f"Post info for {name}" if name else "Post info",
+            errors=self.errors,
+            settings=self.fields,
+        )
+
+
+def parse_pinf(content: str) -> PostInfo:
+    info = PostInfo()
+    for lineno, raw in enumerate(content.splitlines(), start=1):
+        text = raw.strip()
+        if _is_comment(text):
+            continue
+        key, sep, value = text.partition("=")
+        if not sep or not key.strip():
+            info.errors.append(f"Line {lineno}: expected 'Key = value'")
+            continue
+        info.fields[key.strip()] = value.strip()
+    return info
+
+
+# --- .LNG -------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class LanguageTable:
+    """Operation label table sorted by numeric id."""
+
+    ids: array = field(default_factory=lambda: array("i"))
+    labels: list[str] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    _by_label: dict[str, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def label(self, label_id: int) -> str | None:
+        pos = bisect_left(self.ids, label_id)
+        if pos < len(self.ids) and self.ids[pos] == label_id:
+            return self.labels[pos]
+        return None
+
+    def id_of(self, label: str) -> int | None:
+        return self._by_label.get(label.casefold())
+
+    def to_post(self, post_id: str, content: str) -> ParsedPost:
+        return ParsedPost(
+            post_id=post_id,
+            raw_content=content,
+            summary=f"{len(self.ids)} language labels",
+            errors=self.errors,
+            labels=dict(zip(self.ids, self.labels)),
+        )
+
+
+def parse_lng(content: str) -> LanguageTable:
+    rows: dict[int, str] = {}
+    errors: list[str] = []
+    for lineno, raw in enumerate(content.splitlines(), start=1):
+        text = raw.rstrip()
+        if _is_comment(text.lstrip()):
+            continue
+        match = LNG_ID_PATTERN.search(text)
+        if match is None:
+            errors.append(f"Line {lineno}: missing ':NNNN:' label id")
+            continue
+        if match.start() > LNG_LABEL_WIDTH:
+            errors.append(f"Line {lineno}: label exceeds {LNG_LABEL_WIDTH} characters")
+        label_id = int(match.group(1))
+        if label_id in rows:
+            errors.append(f"Line {lineno}: duplicate label id {label_id:04d}")
+            continue
+        rows[label_id] = text[: match.start()].rstrip()
+
+    table = LanguageTable(errors=errors)
+    for label_id in sorted(rows):
+        table.ids.append(label_id)
+        table.labels.append(rows[label_id])
+        table._by_label.setdefault(rows[label_id].casefold(), label_id)
+    return table
+
+
+# --- .ATR -------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class AttributeRegistry:
+    """``MASTER.ATR`` attribute registry, column-oriented and sorted by ATTRID."""
+
+    id_high: int = ATTR_ID_HIGH
+    ids: array = field(default_factory=lambda: array("i"))
+    start_lines: array = field(default_factory=lambda: array("i"))
+    end_lines: array = field(default_factory=lambda: array("i"))
+    names: list[str] = field(default_factory=list)
+    fields: list[dict[str, str]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    _by_name: dict[str, int] = field(default_factory=dict)  # casefolded name -> row
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, attr_id: int) -> int | None:
+        """Column index of ``attr_id`` (binary search over the sorted ids)."""
+        pos = bisect_left(self.ids, attr_id)
+        if pos < len(self.ids) and self.ids[pos] == attr_id:
+            return pos
+        return None
+
+    def record(self, row: int) -> ParsedAttribute:
+        return ParsedAttribute(
+            name=self.names[row],
+            attr_id=self.ids[row],
+            start_line=self.start_lines[row],
+            end_line=self.end_lines[row],
+            fields=self.fields[row],
+        )
+
+    def by_id(self, attr_id: int) -> ParsedAttribute | None:
+        row = self.row_of(attr_id)
+        return self.record(row) if row is not None else None
+
+    def by_name(self, name: str) -> ParsedAttribute | None:
+        row = self._by_name.get(name.casefold())
+        return self.record(row) if row is not None else None
+
+    def next_free_id(self) -> int | None:
+        """Lowest unused ATTRID below ``id_high`` (for authoring new attributes)."""
+        expected = ATTR_ID_MIN
+        for attr_id in self.ids:
+            if attr_id > expected:
+                break
+            expected = attr_id + 1
+        return expected if expected < self.id_high else None
+
+    def to_post(self, post_id: str, content: str) -> ParsedPost:
+        return ParsedPost(
+            post_id=post_id,
+            raw_content=content,
+            summary=f"{len(self.ids)} registered attributes (IDHIGH {self.id_high})",
+            errors=self.errors,
+            attributes=[self.record(row) for row in range(len(self.ids))],
+            settings={"IDHIGH": str(self.id_high)},
+        )
+
+
+def parse_atr(content: str) -> AttributeRegistry:
+    """Single pass over ``:KEY=value`` lines; rows are sorted by ATTRID at the end."""
+    id_high = ATTR_ID_HIGH
+    errors: list[str] = []
+    rows: list[tuple[int, int, int, str, dict[str, str]]] = []
+    seen: dict[int, int] = {}  # attr id -> start line
+
+    start = 0
+    attr_id: int | None = None
+    has_id = False  # the open block has an :ATTRID line (numeric or not)
+    name = ""
+    fields: dict[str, str] = {}
+
+    def unterminated() -> str:
+        label = f"'{name}'" if name else f"ATTRID {attr_id}"
+        return f"Line {start}: attribute {label} has no matching :ATTREND"
+
+    for lineno, raw in enumerate(content.splitlines(), start=1):
+        text = raw.strip()
+        if not text.startswith(":"):
+            continue
+        key, sep, value = text[1:].partition("=")
+        key = key.strip().upper()
+        value = value.strip()
+
+        if key == "ATTREND":
+            if not start:
+                errors.append(f"Line {lineno}: :ATTREND without a matching :ATTRID")
+                continue
+            if attr_id is None:
+                errors.append(f"Line {start}: attribute '{name}' has no numeric :ATTRID")
+            elif attr_id in seen:
+                errors.append(
+                    f"Line {start}: duplicate ATTRID {attr_id} "
+                    f"(first defined on line {seen[attr_id]})"
+                )
+            else:
+                seen[attr_id] = start
+                rows.append((attr_id, start, lineno, name, fields))
+            start, attr_id, has_id, name, fields = 0, None, False, "", {}
+        elif key == "IDHIGH" and not start:
+            if value.isdigit():
+                id_high = int(value)
+            else:
+                errors.append(f"Line {lineno}: :IDHIGH must be an integer")
+        elif key in ("ATTRID", "ATTRNAME") and not start:
+            start = lineno
+            if key == "ATTRID":
+                attr_id, has_id = (int(value) if value.isdigit() else None), True
+            else:
+                name = value
+        elif not start:
+            continue  # header directives outside any block
+        elif key == "ATTRID":
+            if has_id:  # the open block was never closed; this line starts the next one
+                errors.append(unterminated())
+                start, name, fields = lineno, "", {}
+            attr_id, has_id = (int(value) if value.isdigit() else None), True
+        elif key == "ATTRNAME":
+            if name:
+                errors.append(unterminated())
+                start, attr_id, has_id, fields = lineno, None, False, {}
+            name = value
+        elif sep:
+            fields[key] = value
+    if start:
+        errors.append(unterminated())
+
+    rows.sort()
+    registry = AttributeRegistry(id_high=id_high, errors=errors)
+    for attr_id, first, last, attr_name, attr_fields in rows:
+        if not ATTR_ID_MIN <= attr_id < id_high:
+            errors.append(
+                f"Line {first}: ATTRID {attr_id} outside {ATTR_ID_MIN}-{id_high - 1}"
+            )
+        registry._by_name.setdefault(attr_name.casefold(), len(registry.ids))
+        registry.ids.append(attr_id)
+        registry.start_lines.append(first)
+        registry.end_lines.append(last)
+        registry.names.append(attr_name)
+        registry.fields.append(attr_fields)
+    return registry
+
+
+# Extension -> parser for files the UPG tokenizer does not handle.
+TABLE_PARSERS = {
+    ".KIN": parse_kin,
+    ".PINF": parse_pinf,
+    ".LNG": parse_lng,
+    ".ATR": parse_atr,
+}
@@ -12,11 +12,10 @@ class DELMIAParser(BaseParser):
 
     platform = "delmia"
 
-    def detect(self, content: str) -> bool:
-        indicators = ["DELMIA", "3DEXPERIENCE"]
-        return any(marker in content for marker in indicators)
+    signatures = {"DELMIA": 0.8, "3DEXPERIENCE": 0.7}
+    extensions = {".PPTABLE": 0.6}
 
-    async def parse(self, content: str, post_id: str) -> ParsedPost:
+    def parse(self, content: str, post_id: str, filename: str | None = None) -> ParsedPost:
         return ParsedPost(
             post_id=post_id,
             raw_content=content,
@@ -0,0 +1,111 @@
+"""Single-pass platform detection across every registered parser.
+
+Each parser declares literal content ``signatures`` and file-extension
+hints, each with a confidence weight. ``DetectionEngine`` compiles the
+signatures of all parsers into one alternation regex, makes one pass over
+a bounded prefix of the content, and combines the weights of the markers
+it saw into a per-parser confidence (noisy-OR). Python's ``re`` tries the
+alternatives in turn at each position, so the cost per character grows
+with the number of markers; ``prefix_chars`` is what keeps the total
+bounded and independent of file size.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import PurePath
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from app.core.parsing.base import BaseParser
+
+# UPG headers, banners and the first :SECTION= blocks all appear well within
+# the first 16 KB of a real .SRC; anything past that is body content.
+DETECT_PREFIX_CHARS = 16 * 1024
+
+# Minimum combined confidence for detect_parser() to pick a platform.
+DETECTION_THRESHOLD = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class Detection:
+    """A ranked detection result."""
+
+    parser: BaseParser
+    confidence: float
+
+
+def _combine(weights: Iterable[float]) -> float:
+    """Noisy-OR: independent weak signals add up, but never exceed 1.0."""
+    miss = 1.0
+    for weight in weights:
+        miss *= 1.0 - weight
+    return 1.0 - miss
+
+
+class DetectionEngine:
+    """Compiled multi-pattern detector over a fixed set of parsers."""
+
+    def __init__(self, parsers: Iterable[BaseParser], prefix_chars: int = DETECT_PREFIX_CHARS):
+        self.parsers: list[BaseParser] = list(parsers)
+        self.prefix_chars = prefix_chars
+
+        # marker -> [(parser index, weight)]; a marker may be shared by platforms
+        self._markers: dict[str, list[tuple[int, float]]] = {}
+        self._extensions: dict[str, list[tuple[int, float]]] = {}
+        for idx, parser in enumerate(self.parsers):
+            for marker, weight in parser.signatures.items():
+                self._markers.setdefault(marker, []).append((idx, weight))
+            for ext, weight in parser.extensions.items():
+                self._extensions.setdefault(ext.upper(), []).append((idx, weight))
+
+        # Longest-first so a marker that prefixes another cannot shadow it.
+        alternatives = sorted(self._markers, key=len, reverse=True)
+        self._pattern = (
+            re.compile("|".join(re.escape(m) for m in alternatives)) if alternatives else None
+        )
+
+    def rank(self, content: str, filename: str | None = None) -> list[Detection]:
+        """Return every parser with non-zero confidence, best first."""
+        evidence: list[list[float]] = [[] for _ in self.parsers]
+
+        if self._pattern is not None:
+            seen: set[str] = set()
+            for match in self._pattern.finditer(content, 0, self.prefix_chars):
+                marker = match.group()
+                if marker in seen:
+                    continue
+                seen.add(marker)
+                for idx, weight in self._markers[marker]:
+                    evidence[idx].append(weight)
+                if len(seen) == len(self._markers):
+                    break
+
+        if filename:
+            suffix = PurePath(filename).suffix.upper()
+            for idx, weight in self._extensions.get(suffix, ()):
+                evidence[idx].append(weight)
+
+        results = [
+            Detection(parser=self.parsers[idx], confidence=_combine(weights))
+            for idx, weights in enumerate(evidence)
+            if weights
+        ]
+        # Stable sort keeps registration order as the tie-breaker.
+        results.sort(key=lambda d: d.confidence, reverse=True)
+        return results
+
+    def best(
+        self,
+        content: str,
+        filename: str | None = None,
+        threshold: float = DETECTION_THRESHOLD,
+    ) -> Detection | None:
+        """Return the top-ranked detection if it clears ``threshold``."""
+        ranked = self.rank(content, filename)
+        if ranked and ranked[0].confidence >= threshold:
+            return ranked[0]
+        return None
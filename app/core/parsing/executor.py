@@ -0,0 +1,161 @@
+"""Async façade that runs synchronous parsers in a shared process pool.
+
+Parsers are pure CPU work (regex scans over multi-thousand-line files), so
+running them on the event loop stalls every other request. ``ParseExecutor``
+owns a ``ProcessPoolExecutor`` created in the app lifespan and enforces:
+
+- a bounded queue: at most ``max_workers + max_queue`` parses in flight;
+  beyond that ``submit`` fails fast with ``ParserSaturatedError`` (HTTP 503)
+- a per-parse timeout: callers get ``ParseTimeoutError`` (HTTP 504) and the
+  pool is recycled -- new parses go to a fresh pool and the old one's
+  workers are terminated. The slot is only released once the stuck worker
+  is gone, and parses that were sharing the old pool are resubmitted once
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from app.config import Settings
+from app.core import metrics
+from app.core.models.post_processor import ParsedPost
+
+T = TypeVar("T")
+
+
+class ParserSaturatedError(Exception):
+    """Raised when the parse queue is full; callers should retry later."""
+
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__("Parser pool is saturated")
+        self.retry_after = retry_after
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a parse does not finish within the configured timeout."""
+
+
+def _run_parse(
+    platform: str, content: str, post_id: str, filename: str | None = None
+) -> ParsedPost:
+    """Entry point executed inside a pool worker process."""
+    from app.core.parsing import get_parser
+
+    return get_parser(platform).parse(content, post_id, filename)
+
+
+def _default_pool(max_workers: int) -> Executor:
+    # spawn, not fork: the API process has live event-loop and client threads.
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _terminate(pool: Executor) -> None:
+    """Kill ``pool``'s workers; its running and queued futures fail with BrokenProcessPool.
+
+    ``ProcessPoolExecutor`` has no public way to stop a running task, so this
+    reaches into ``_processes``. Thread pools have none and just stop taking
+    work; a thread that hangs keeps its slot until it returns.
+    """
+    processes = getattr(pool, "_processes", None) or {}
+    for process in list(processes.values()):
+        process.terminate()
+    pool.shutdown(wait=False)
+
+
+class ParseExecutor:
+    """Bounded, timeout-aware process pool shared by all API requests."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        timeout: float = 30.0,
+        pool_factory: Callable[[int], Executor] = _default_pool,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool_factory = pool_factory
+        self._pool: Executor | None = None
+        self._in_flight = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> ParseExecutor:
+        return cls(
+            max_workers=settings.parse_workers,
+            max_queue=settings.parse_queue_size,
+            timeout=settings.parse_timeout_seconds,
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = self._pool_factory(self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _release(self, _future: Any) -> None:
+        self._in_flight -= 1
+
+    def _recycle(self, pool: Executor) -> None:
+        """Replace ``pool`` with a fresh one and terminate its workers."""
+        if pool is self._pool:  # a concurrent timeout may have recycled it already
+            self._pool = self._pool_factory(self.max_workers)
+        _terminate(pool)
+
+    async def submit(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` in the pool, applying backpressure and the timeout."""
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError("ParseExecutor has not been started")
+        if self._in_flight >= self.capacity:
+            raise ParserSaturatedError()
+
+        self._in_flight += 1
+        try:
+            cf_future = pool.submit(fn, *args)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+        # Runs in the pool's management thread; hop back onto the loop so the
+        # counter is only ever touched from one thread.
+        loop = asyncio.get_running_loop()
+        cf_future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cf_future), self.timeout)
+        except TimeoutError as exc:
+            self._recycle(pool)
+            raise ParseTimeoutError(f"Parse exceeded {self.timeout:.0f}s") from exc
+        except BrokenProcessPool:
+            if pool is not self._pool and self._pool is not None:
+                # Killed along with a parse that timed out; not this one's fault.
+                return await self.submit(fn, *args)
+            self._recycle(pool)  # a worker died (e.g. OOM-killed); start a fresh pool
+            raise
+
+    async def parse(
+        self, platform: str, content: str, post_id: str, filename: str | None = None
+    ) -> ParsedPost:
+        """Parse ``content`` with the named platform parser off the event loop."""
+        with metrics.timed("parse_duration_seconds", parser=platform):
+            parsed = await self.submit(_run_parse, platform, content, post_id, filename)
+        metrics.inc("parse_bytes_total", len(content), parser=platform)
+        return parsed
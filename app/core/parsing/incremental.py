@@ -0,0 +1,275 @@
+"""Incremental re-parsing of UPG source for the code viewer / authoring flow.
+
+An ``IncrementalDocument`` keeps the source split into segments at every
+``:SECTION=`` line: segment 0 is the header (everything before the first
+section) and each later segment is one section plus whatever follows it up
+to the next ``:SECTION=``. Each segment is tokenized and folded on its own
+with ``upg.parse_upg`` using segment-relative line numbers, so an edit only
+re-tokenizes the segments it touches (plus the previous one when the edit
+removes a ``:SECTION=`` line and the text merges upward).
+
+Absolute positions come from a per-segment start-line array that is shifted
+after each edit; ``to_parsed()`` materializes the equivalent full
+``ParsedPost`` on demand. Blocks (``:IF``, ``:ATTRNAME``) are balanced per
+section by ``parse_upg`` itself, so the materialized result is identical
+to a full parse of the same text.
+
+Ranges follow the Monaco editor convention: 1-based lines and columns, end
+column exclusive. A document of N lines ends with a newline, so the editor
+shows an empty line N + 1 after it; edits there append to the document.
+Ranges outside the document raise ``EditRangeError``.
+"""
+
+import re
+import uuid
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.models.post_processor import (
+    ParsedAttribute,
+    ParseDelta,
+    ParsedPost,
+    ParsedSection,
+    TextEdit,
+)
+from app.core.parsing import upg
+
+ERROR_LINE_PATTERN = re.compile(r"^Line (\d+):")
+
+
+class EditRangeError(ValueError):
+    """An edit's range is reversed or lies outside the document."""
+
+
+@dataclass(slots=True)
+class _Segment:
+    lines: list[str]
+    parsed: ParsedPost  # segment-relative line numbers
+
+
+def _shift_error(error: str, offset: int) -> str:
+    match = ERROR_LINE_PATTERN.match(error)
+    if not match or not offset:
+        return error
+    return f"Line {int(match.group(1)) + offset}:{error[match.end():]}"
+
+
+def _shift_section(section: ParsedSection, offset: int) -> ParsedSection:
+    return section.model_copy(
+        update={"start_line": section.start_line + offset, "end_line": section.end_line + offset}
+    )
+
+
+def _shift_attribute(attr: ParsedAttribute, offset: int) -> ParsedAttribute:
+    end = attr.end_line + offset if attr.end_line is not None else None
+    return attr.model_copy(update={"start_line": attr.start_line + offset, "end_line": end})
+
+
+class IncrementalDocument:
+    """Parsed UPG source that can absorb text edits without a full re-parse."""
+
+    def __init__(self, post_id: str, segments: list[_Segment]) -> None:
+        self.post_id = post_id
+        self.version = 0
+        self._segments = segments
+        self._starts = array("i")
+        self._reindex(0)
+
+    @classmethod
+    def from_text(cls, content: str, post_id: str) -> "IncrementalDocument":
+        lines = content.replace("\r\n", "\n").split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()  # trailing newline, as str.splitlines would drop it
+        return cls(post_id, cls._segment(post_id, lines, header=True))
+
+    # -- internals ----------------------------------------------------------
+
+    @staticmethod
+    def _segment(post_id: str, lines: list[str], header: bool) -> list[_Segment]:
+        """Split ``lines`` at ``:SECTION=`` lines and fold each piece."""
+        tokens = [upg.tokenize_line(raw, idx) for idx, raw in enumerate(lines, start=1)]
+        cuts = [i for i, tok in enumerate(tokens) if tok.kind is upg.Kind.SECTION]
+        if header or not cuts or cuts[0] != 0:
+            cuts.insert(0, 0)
+        cuts.append(len(lines))
+        segments = []
+        for begin, end in zip(cuts, cuts[1:]):
+            if begin == end and segments:
+                continue
+            seg_tokens = [
+                upg.Token(tok.kind, tok.line - begin, tok.key, tok.value)
+                for tok in tokens[begin:end]
+            ]
+            parsed = upg.parse_upg("", post_id, tokens=seg_tokens)
+            segments.append(_Segment(lines[begin:end], parsed))
+        return segments
+
+    def _reindex(self, first: int) -> None:
+        del self._starts[first:]
+        line = self._starts[first - 1] + len(self._segments[first - 1].lines) if first else 1
+        for seg in self._segments[first:]:
+            self._starts.append(line)
+            line += len(seg.lines)
+
+    def _segment_at(self, line: int) -> int:
+        return max(bisect_right(self._starts, line) - 1, 0)
+
+    # -- public API ---------------------------------------------------------
+
+    def text(self) -> str:
+        return "".join(line + "\n" for seg in self._segments for line in seg.lines)
+
+    def line_count(self) -> int:
+        return self._starts[-1] + len(self._segments[-1].lines) - 1
+
+    def _check_position(self, line: int, column: int) -> None:
+        count = self.line_count()
+        if line > count + 1:
+            raise EditRangeError(f"line {line} is past the end of the document ({count} lines)")
+        width = 0
+        if line <= count:
+            idx = self._segment_at(line)
+            width = len(self._segments[idx].lines[line - self._starts[idx]])
+        if column > width + 1:
+            raise EditRangeError(f"column {column} is past the end of line {line} ({width} chars)")
+
+    def apply(self, edit: TextEdit) -> ParseDelta:
+        """Apply one edit and re-parse only the segments it touches.
+
+        Raises ``EditRangeError`` (leaving the document unchanged) when the
+        range is reversed or outside the document.
+        """
+        if (edit.start_line, edit.start_column) > (edit.end_line, edit.end_column):
+            raise EditRangeError(
+                f"range ends at {edit.end_line}:{edit.end_column}, "
+                f"before its start {edit.start_line}:{edit.start_column}"
+            )
+        self._check_position(edit.start_line, edit.start_column)
+        self._check_position(edit.end_line, edit.end_column)
+
+        first = self._segment_at(edit.start_line)
+        last = self._segment_at(edit.end_line)
+        replacement = edit.text.replace("\r\n", "\n")
+        while True:
+            base = self._starts[first]
+            old = [line for seg in self._segments[first : last + 1] for line in seg.lines]
+            row_start = edit.start_line - base
+            row_end = edit.end_line - base
+            # row == len(old) is the empty line after the final newline.
+            before = old[row_start][: edit.start_column - 1] if row_start < len(old) else ""
+            after = old[row_end][edit.end_column - 1 :] if row_end < len(old) else ""
+            middle = (before + replacement + after).split("\n")
+            if row_end == len(old) and middle[-1] == "":
+                middle.pop()  # still the empty line after the final newline
+            new = old[:row_start] + middle + old[row_end + 1 :]
+            # Text that no longer starts with :SECTION= belongs to the previous segment.
+            if first == 0 or (new and upg.tokenize_line(new[0], 1).kind is upg.Kind.SECTION):
+                break
+            first -= 1
+
+        removed = self._segments[first : last + 1]
+        added = self._segment(self.post_id, new, header=first == 0)
+        self._segments[first : last + 1] = added
+        self._reindex(first)
+        self.version += 1
+        return self._delta(first, base, removed, added, len(old), len(new))
+
+    def apply_all(self, edits: list[TextEdit]) -> list[ParseDelta]:
+        return [self.apply(edit) for edit in edits]
+
+    def _delta(
+        self,
+        first: int,
+        base: int,
+        removed: list[_Segment],
+        added: list[_Segment],
+        old_count: int,
+        new_count: int,
+    ) -> ParseDelta:
+        delta = ParseDelta(
+            version=self.version,
+            first_line=base,
+            old_line_count=old_count,
+            new_line_count=new_count,
+            line_shift=new_count - old_count,
+        )
+        old_defines: dict[str, str] = {}
+        old_attrs: set[str] = set()
+        old_sections: set[str] = set()
+        for seg in removed:
+            old_defines.update(seg.parsed.defines)
+            old_attrs.update(a.name for a in seg.parsed.attributes)
+            old_sections.update(seg.parsed.section_names)
+
+        new_defines: dict[str, str] = {}
+        new_attrs: set[str] = set()
+        for idx, seg in enumerate(added, start=first):
+            offset = self._starts[idx] - 1
+            delta.sections.extend(_shift_section(s, offset) for s in seg.parsed.sections)
+            delta.attributes.extend(_shift_attribute(a, offset) for a in seg.parsed.attributes)
+            new_defines.update(seg.parsed.defines)
+            new_attrs.update(a.name for a in seg.parsed.attributes)
+
+        new_sections = {s.name for s in delta.sections}
+        delta.removed_sections = sorted(old_sections - new_sections)
+        delta.defines = {k: v for k, v in new_defines.items() if old_defines.get(k) != v}
+        delta.removed_defines = sorted(old_defines.keys() - new_defines.keys())
+        delta.removed_attributes = sorted(old_attrs - new_attrs)
+        delta.errors = self.errors()
+        return delta
+
+    def errors(self) -> list[str]:
+        return [
+            _shift_error(err, start - 1)
+            for seg, start in zip(self._segments, self._starts)
+            for err in seg.parsed.errors
+        ]
+
+    def to_parsed(self, include_content: bool = False) -> ParsedPost:
+        """Materialize the whole-document ``ParsedPost`` (same shape as ``parse_upg``)."""
+        out = ParsedPost(post_id=self.post_id, raw_content=self.text() if include_content else "")
+        for seg, start in zip(self._segments, self._starts):
+            offset = start - 1
+            parsed = seg.parsed
+            out.sections.extend(_shift_section(s, offset) for s in parsed.sections)
+            out.attributes.extend(_shift_attribute(a, offset) for a in parsed.attributes)
+            out.defines.update(parsed.defines)
+            out.variables.update(parsed.variables)
+            out.settings.update(parsed.settings)
+            for key, value in parsed.metadata.items():
+                out.metadata.setdefault(key, value)
+            out.libraries.extend(parsed.libraries)
+            out.operations.extend(parsed.operations)
+        out.section_names = [s.name for s in out.sections]
+        out.errors = self.errors()
+        return out
+
+
+class DocumentStore:
+    """Per-process LRU of open documents for the editor endpoints.
+
+    Documents live in the API process that opened them, so editor sessions
+    need sticky routing when the API runs with several replicas.
+    """
+
+    def __init__(self, max_documents: int = 64) -> None:
+        self.max_documents = max_documents
+        self._docs: OrderedDict[str, IncrementalDocument] = OrderedDict()
+
+    def add(self, doc: IncrementalDocument) -> str:
+        document_id = uuid.uuid4().hex
+        self._docs[document_id] = doc
+        while len(self._docs) > self.max_documents:
+            self._docs.popitem(last=False)
+        return document_id
+
+    def get(self, document_id: str) -> IncrementalDocument | None:
+        doc = self._docs.get(document_id)
+        if doc is not None:
+            self._docs.move_to_end(document_id)
+        return doc
+
+    def discard(self, document_id: str) -> None:
+        self._docs.pop(document_id, None)
@@ -12,11 +12,10 @@ class MastercamParser(BaseParser):
 
     platform = "mastercam"
 
-    def detect(self, content: str) -> bool:
-        indicators = ["Mastercam", ".mcpost", ".pst"]
-        return any(marker in content for marker in indicators)
+    signatures = {"Mastercam": 0.8, ".mcpost": 0.5, ".pst": 0.3}
+    extensions = {".PST": 0.6, ".MCPOST": 0.6}
 
-    async def parse(self, content: str, post_id: str) -> ParsedPost:
+    def parse(self, content: str, post_id: str, filename: str | None = None) -> ParsedPost:
         return ParsedPost(
             post_id=post_id,
             raw_content=content,
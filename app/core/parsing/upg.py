@@ -0,0 +1,394 @@
+"""Line tokenizer and structural parser for CAMWorks UPG source (.SRC / .LIB).
+
+UPG is line-oriented: every line is a comment (``*``), a colon directive
+(``:SECTION=``, ``:T:``, ``:DEFINE``, ``:ATTRNAME=``, ``:IF`` ...), or a body
+line inside a CALC section (assignments and ``CALL(...)`` statements). See
+the UPG structure catalog in ``.planning/phases/01-foundation/01-RESEARCH.md``.
+
+``tokenize`` classifies each line exactly once; ``parse_upg`` folds the token
+stream into sections, defines, attribute blocks, libraries and header
+settings. Line numbers are 1-based throughout so they map directly onto the
+code viewer.
+
+``tokenize_buffer`` is the zero-copy variant used by the ingest worker: it
+walks a ``bytes``/``mmap`` buffer through a ``LineIndex`` of byte offsets and
+decodes only the parts of a line that ``parse_upg`` keeps. Comment, template
+and body lines that cannot contribute metadata or ``CALL`` edges are never
+decoded, and tokens are streamed, so no full-file ``str`` or line list
+is ever built.
+"""
+
+import mmap
+import re
+from array import array
+from collections.abc import Iterable, Iterator
+from enum import IntEnum
+from pathlib import PureWindowsPath
+from typing import NamedTuple
+
+from app.core.models.post_processor import ParsedAttribute, ParsedPost, ParsedSection
+
+
+class Kind(IntEnum):
+    BLANK = 0
+    COMMENT = 1
+    SECTION = 2  # :SECTION=NAME, or a legacy [NAME] header (value "ini")
+    TEMPLATE = 3  # :T: output template line
+    DEFINE = 4  # :DEFINE NAME=value
+    LIBRARY = 5  # :LIBRARY=path
+    ATTR = 6  # :ATTRNAME= / :ATTRTYPE= / ... (key holds the directive)
+    ATTREND = 7
+    OPER = 8  # :OPERID= / :OPERSUB= / :OPERLIST=
+    OPEREND = 9
+    IF = 10
+    ELSE = 11
+    ENDIF = 12
+    SETTING = 13  # any other :KEY=VALUE header directive
+    ASSIGN = 14  # NAME = value
+    STATEMENT = 15  # any other body line
+    UNKNOWN = 16  # a colon directive we do not recognise
+
+
+class Token(NamedTuple):
+    kind: Kind
+    line: int
+    key: str
+    value: str
+
+
+DIRECTIVE_PATTERN = re.compile(r":([A-Za-z0-9_]+)(.*)")
+LEGACY_SECTION_PATTERN = re.compile(r"\[(\w+)\]")
+ASSIGN_PATTERN = re.compile(r"([A-Za-z_]\w*)\s*=\s*(.*)")
+CALL_PATTERN = re.compile(r"\bCALL\(\s*(\w+)\s*\)")
+HEADER_FIELD_PATTERN = re.compile(
+    r"^[*;\s]*(Controller|Machine|Company|Version|Date|Programmer|Created From)\s*:\s*(.+?)\s*$"
+)
+
+# Directives that end the current section when seen at top level.
+SECTION_TERMINATORS = frozenset({Kind.SECTION, Kind.LIBRARY, Kind.OPER})
+BLOCK_OPENERS = frozenset({"ATTRNAME", "ATTRID"})
+
+
+def _classify_directive(name: str, rest: str, line: int) -> Token:
+    upper = name.upper()
+    if upper == "T" and rest.startswith(":"):
+        return Token(Kind.TEMPLATE, line, "T", rest[1:].strip())
+    if upper == "DEFINE":
+        match = ASSIGN_PATTERN.match(rest.strip())
+        if match:
+            return Token(Kind.DEFINE, line, match.group(1), match.group(2).strip())
+        return Token(Kind.UNKNOWN, line, name, rest.strip())
+    if upper == "IF":
+        return Token(Kind.IF, line, "IF", rest.strip())
+    if upper in ("ELSE", "ELSEIF"):
+        return Token(Kind.ELSE, line, upper, rest.strip())
+    if upper == "ENDIF":
+        return Token(Kind.ENDIF, line, "ENDIF", "")
+    if upper == "ATTREND":
+        return Token(Kind.ATTREND, line, "ATTREND", "")
+    if upper == "OPEREND":
+        return Token(Kind.OPEREND, line, "OPEREND", "")
+    if not rest.startswith("="):
+        return Token(Kind.UNKNOWN, line, name, rest.strip())
+
+    value = rest[1:].strip()
+    if upper == "SECTION":
+        return Token(Kind.SECTION, line, value, "")
+    if upper == "LIBRARY":
+        return Token(Kind.LIBRARY, line, "LIBRARY", value)
+    if upper.startswith("ATTR"):
+        return Token(Kind.ATTR, line, upper, value)
+    if upper.startswith("OPER"):
+        return Token(Kind.OPER, line, upper, value)
+    return Token(Kind.SETTING, line, name, value)
+
+
+def tokenize_line(raw: str, line: int) -> Token:
+    """Classify a single source line."""
+    text = raw.strip()
+    if not text:
+        return Token(Kind.BLANK, line, "", "")
+    first = text[0]
+    if first == "*" or first == ";":
+        return Token(Kind.COMMENT, line, "", text)
+    if first == ":":
+        match = DIRECTIVE_PATTERN.match(text)
+        if match:
+            return _classify_directive(match.group(1), match.group(2), line)
+        return Token(Kind.UNKNOWN, line, "", text)
+    if first == "[":
+        match = LEGACY_SECTION_PATTERN.match(text)
+        if match:
+            return Token(Kind.SECTION, line, match.group(1), "ini")
+    match = ASSIGN_PATTERN.match(text)
+    if match:
+        return Token(Kind.ASSIGN, line, match.group(1), match.group(2).strip())
+    return Token(Kind.STATEMENT, line, "", text)
+
+
+def tokenize(content: str) -> list[Token]:
+    """Split UPG source into one token per line."""
+    return [tokenize_line(raw, idx) for idx, raw in enumerate(content.splitlines(), start=1)]
+
+
+# The same line boundaries as str.splitlines(), expressed on UTF-8 bytes.
+LINE_BREAK_PATTERN = re.compile(rb"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+# Whitespace str.strip() removes from an ASCII line.
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+ASCII_ASSIGN_PATTERN = re.compile(rb"[A-Za-z_]\w*\s*=")
+WORD_BYTES = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+LAZY_KEYS = {Kind.TEMPLATE: "T", Kind.IF: "IF", Kind.STATEMENT: ""}
+
+
+class LineIndex:
+    """Byte offsets of every line in a buffer, as two ``array('q')`` columns."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        self.starts = array("q", [0])
+        self.ends = array("q")
+        for match in LINE_BREAK_PATTERN.finditer(buffer):
+            self.ends.append(match.start())
+            self.starts.append(match.end())
+        if self.starts[-1] < len(buffer):
+            self.ends.append(len(buffer))
+        else:
+            self.starts.pop()  # trailing break, or empty buffer
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, line: int) -> tuple[int, int]:
+        """Byte range of 1-based ``line``, excluding its line break."""
+        return self.starts[line - 1], self.ends[line - 1]
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def tokenize_buffer(buffer: bytes | mmap.mmap, index: LineIndex | None = None) -> Iterator[Token]:
+    """Classify the lines of an undecoded buffer, yielding ``parse_upg``-ready tokens.
+
+    Equivalent to ``tokenize(buffer.decode())`` as far as ``parse_upg`` is
+    concerned. Values ``parse_upg`` never reads are left empty: comments
+    that cannot be a ``Key: value`` header field, and ``:T:``, ``:IF`` and
+    body lines without a ``CALL(``. Lines containing non-ASCII bytes always
+    take the ``str`` path, so Unicode whitespace and identifiers behave
+    exactly as in ``tokenize``.
+    """
+    if index is None:
+        index = LineIndex(buffer)
+    for line, (start, end) in enumerate(zip(index.starts, index.ends), start=1):
+        raw = buffer[start:end]
+        if not raw.isascii():
+            yield tokenize_line(_decode(raw), line)
+            continue
+        text = raw.strip(ASCII_WHITESPACE)
+        if not text:
+            yield Token(Kind.BLANK, line, "", "")
+            continue
+        first = text[0]
+        if first in b"*;":
+            yield Token(Kind.COMMENT, line, "", text.decode() if b":" in text else "")
+            continue
+        lazy: Kind | None = None
+        if first == 0x3A:  # ':'
+            head = text[:4].upper()
+            if head[:3] == b":T:":
+                lazy = Kind.TEMPLATE
+            elif head[:3] == b":IF" and (len(head) == 3 or head[3] not in WORD_BYTES):
+                lazy = Kind.IF
+        elif first != 0x5B and not ASCII_ASSIGN_PATTERN.match(text):  # not '[' or NAME =
+            lazy = Kind.STATEMENT
+        if lazy is None or b"CALL(" in text:
+            yield tokenize_line(text.decode(), line)
+        else:
+            yield Token(lazy, line, LAZY_KEYS[lazy], "")
+
+
+def parse_upg_buffer(
+    buffer: bytes | mmap.mmap, post_id: str, index: LineIndex | None = None
+) -> ParsedPost:
+    """``parse_upg`` over an undecoded (e.g. memory-mapped) buffer.
+
+    ``raw_content`` is left empty; slice the buffer with a ``LineIndex``
+    (pass the same one in to avoid indexing twice) when source text is needed.
+    """
+    return parse_upg("", post_id, tokens=tokenize_buffer(buffer, index))
+
+
+def library_name(path: str) -> str:
+    """Reduce a ``:LIBRARY=`` path to its filename.
+
+    Library paths are absolute Windows paths from the build machine and
+    never resolve on the server; packages are matched by filename instead.
+    """
+    return PureWindowsPath(path.strip().strip('"')).name
+
+
+def section_kind(name: str, legacy: bool = False) -> str:
+    if legacy:
+        return "ini"
+    return "calc" if name.upper().startswith("CALC_") else "template"
+
+
+def parse_upg(
+    content: str, post_id: str, tokens: Iterable[Token] | None = None
+) -> ParsedPost:
+    """Fold a UPG token stream into a ``ParsedPost``.
+
+    ``tokens`` may be any iterable (e.g. the ``tokenize_buffer`` generator);
+    it is consumed once.
+    """
+    if tokens is None:
+        tokens = tokenize(content)
+
+    sections: list[ParsedSection] = []
+    attributes: list[ParsedAttribute] = []
+    defines: dict[str, str] = {}
+    variables: dict[str, str] = {}
+    settings: dict[str, str] = {}
+    metadata: dict[str, str] = {}
+    libraries: list[str] = []
+    operations: list[str] = []
+    errors: list[str] = []
+
+    current: ParsedSection | None = None
+    attr: ParsedAttribute | None = None
+    oper_open: int | None = None
+    if_stack: list[int] = []
+    last_line = 0
+
+    def close_section(end_line: int) -> None:
+        nonlocal current
+        if current is not None:
+            current.end_line = end_line
+            sections.append(current)
+            current = None
+
+    def close_blocks() -> None:
+        # Blocks never span a :SECTION= line; report whatever is still open.
+        nonlocal attr, oper_open
+        if attr is not None:
+            errors.append(
+                f"Line {attr.start_line}: :ATTRNAME={attr.name} has no matching :ATTREND"
+            )
+            attr = None
+        if oper_open is not None:
+            errors.append(f"Line {oper_open}: :OPERID has no matching :OPEREND")
+            oper_open = None
+        for line in if_stack:
+            errors.append(f"Line {line}: :IF has no matching :ENDIF")
+        if_stack.clear()
+
+    for tok in tokens:
+        kind = tok.kind
+        last_line = tok.line
+        if kind is Kind.BLANK:
+            continue
+        if kind is Kind.COMMENT:
+            if current is None:
+                match = HEADER_FIELD_PATTERN.match(tok.value)
+                if match and match.group(1) not in metadata:
+                    metadata[match.group(1)] = match.group(2)
+            continue
+
+        if kind in SECTION_TERMINATORS or (kind is Kind.ATTR and tok.key in BLOCK_OPENERS):
+            close_section(tok.line - 1)
+
+        if kind is Kind.SECTION:
+            close_blocks()
+            current = ParsedSection(
+                name=tok.key,
+                kind=section_kind(tok.key, legacy=tok.value == "ini"),
+                start_line=tok.line,
+                end_line=tok.line,
+            )
+        elif kind is Kind.TEMPLATE:
+            if current is not None:
+                current.template_lines += 1
+                current.calls.extend(CALL_PATTERN.findall(tok.value))
+        elif kind is Kind.DEFINE:
+            defines[tok.key] = tok.value
+            variables[tok.key] = tok.value
+        elif kind is Kind.LIBRARY:
+            libraries.append(library_name(tok.value))
+        elif kind is Kind.ATTR:
+            if tok.key == "ATTRNAME":
+                if attr is not None and not attr.name:
+                    # Block opened by a leading :ATTRID= (.ATR registry layout)
+                    attr.name = tok.value
+                    continue
+                if attr is not None:
+                    errors.append(
+                        f"Line {attr.start_line}: :ATTRNAME={attr.name} has no matching :ATTREND"
+                    )
+                attr = ParsedAttribute(name=tok.value, start_line=tok.line)
+            elif attr is not None:
+                attr.fields[tok.key] = tok.value
+                if tok.key == "ATTRID" and tok.value.isdigit():
+                    attr.attr_id = int(tok.value)
+            elif tok.key == "ATTRID":
+                # .ATR registries lead each block with :ATTRID= before :ATTRNAME=
+                attr = ParsedAttribute(name="", start_line=tok.line)
+                if tok.value.isdigit():
+                    attr.attr_id = int(tok.value)
+        elif kind is Kind.ATTREND:
+            if attr is None:
+                errors.append(f"Line {tok.line}: :ATTREND without a matching :ATTRNAME")
+            else:
+                attr.end_line = tok.line
+                attributes.append(attr)
+                attr = None
+        elif kind is Kind.OPER:
+            if tok.key == "OPERID":
+                if oper_open is not None:
+                    errors.append(f"Line {oper_open}: :OPERID has no matching :OPEREND")
+                oper_open = tok.line
+                operations.append(tok.value)
+        elif kind is Kind.OPEREND:
+            if oper_open is None:
+                errors.append(f"Line {tok.line}: :OPEREND without a matching :OPERID")
+            oper_open = None
+        elif kind is Kind.IF:
+            if_stack.append(tok.line)
+            if current is not None:
+                current.calls.extend(CALL_PATTERN.findall(tok.value))
+        elif kind is Kind.ELSE:
+            if not if_stack:
+                errors.append(f"Line {tok.line}: :{tok.key} without a matching :IF")
+        elif kind is Kind.ENDIF:
+            if if_stack:
+                if_stack.pop()
+            else:
+                errors.append(f"Line {tok.line}: :ENDIF without a matching :IF")
+        elif kind is Kind.SETTING:
+            if current is None:
+                settings[tok.key] = tok.value
+        elif kind is Kind.ASSIGN:
+            variables[tok.key] = tok.value
+            if current is not None:
+                current.calls.extend(CALL_PATTERN.findall(tok.value))
+        elif kind is Kind.STATEMENT:
+            if current is not None:
+                current.calls.extend(CALL_PATTERN.findall(tok.value))
+
+    close_section(last_line)
+    close_blocks()
+
+    return ParsedPost(
+        post_id=post_id,
+        raw_content=content,
+        section_names=[s.name for s in sections],
+        variables=variables,
+        errors=errors,
+        sections=sections,
+        defines=defines,
+        attributes=attributes,
+        libraries=libraries,
+        settings=settings,
+        metadata=metadata,
+        operations=operations,
+    )
@@ -0,0 +1,142 @@
+"""Opt-in statistical profiling for API requests and Celery tasks.
+
+``StackSampler`` runs a daemon thread that snapshots the target thread's
+Python stack every ``interval`` seconds and aggregates the samples in
+collapsed-stack format (``frame;frame;frame count``), which speedscope and
+flamegraph.pl import directly. Profiles are stored in MinIO under
+``profiles/`` and listed by the ``/debug/profiles`` endpoints.
+
+Nothing here runs unless profiling is enabled in settings: the middleware
+is not installed, tasks skip the sampler, and ``label()`` returns a shared
+null context. ``label()`` adds a synthetic ``[name]`` root frame to samples
+taken inside the block, so time spent on e.g. a particular file or section
+shows up as its own tower in the flamegraph.
+
+The sampler reads one thread. For an async request that thread is the
+event loop, so concurrent requests can appear in the same profile; the
+request's own frames are still identifiable by route handler.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import nullcontext
+from types import FrameType
+from typing import Any
+
+from app.config import get_settings
+
+PROFILE_HEADER = "x-veripost-profile"
+PROFILE_PREFIX = "profiles/"
+COLLAPSED_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+_NULL = nullcontext()
+_active_samplers = 0
+# thread id -> label stack, read by sampler threads
+_labels: dict[int, list[str]] = {}
+
+
+def wanted(forced: bool = False) -> bool:
+    """Decide whether to profile this unit of work."""
+    settings = get_settings()
+    if not settings.profiling_enabled:
+        return False
+    return forced or random.random() < settings.profiling_sample_rate
+
+
+def new_profile_id(kind: str) -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{kind}-{uuid.uuid4().hex[:8]}"
+
+
+def profile_keys(profile_id: str) -> tuple[str, str]:
+    """MinIO keys for the collapsed stacks and the JSON metadata of a profile."""
+    return f"{PROFILE_PREFIX}{profile_id}.collapsed", f"{PROFILE_PREFIX}{profile_id}.json"
+
+
+class _Label:
+    __slots__ = ("_name", "_tid")
+
+    def __init__(self, name: str) -> None:
+        self._name = f"[{name}]"
+        self._tid = threading.get_ident()
+
+    def __enter__(self) -> None:
+        _labels.setdefault(self._tid, []).append(self._name)
+
+    def __exit__(self, *exc: object) -> None:
+        stack = _labels.get(self._tid)
+        if stack:
+            stack.pop()
+
+
+def label(name: str) -> Any:
+    """Tag samples taken inside this block with ``name``. Free when not sampling."""
+    if not _active_samplers:
+        return _NULL
+    return _Label(name.replace(";", ","))
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """Sample one thread's stack at a fixed interval into collapsed stacks."""
+
+    def __init__(self, thread_id: int | None = None, interval: float = 0.005) -> None:
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "StackSampler":
+        global _active_samplers
+        _active_samplers += 1
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        global _active_samplers
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        _active_samplers -= 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: list[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.extend(reversed(_labels.get(self.thread_id, ())))
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+
+    def collapsed(self) -> bytes:
+        """Render samples in collapsed-stack format (speedscope / flamegraph.pl)."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.items()).encode()
+
+    def metadata(self, profile_id: str, **extra: Any) -> bytes:
+        meta = {
+            "id": profile_id,
+            "duration_seconds": round(self.duration, 6),
+            "interval_seconds": self.interval,
+            "samples": sum(self.samples.values()),
+            **extra,
+        }
+        return json.dumps(meta).encode()
@@ -0,0 +1,203 @@
+"""In-memory section call graph and library dependency graph.
+
+Nodes are section names resolved within a package's namespace. A package's
+namespace is its ``.SRC`` file(s) followed by its library chain: the
+``:LIBRARY=`` includes in declaration order, each followed depth-first by
+the libraries it includes itself. A name resolves to the first unit in
+that order defining it, so a section in the ``.SRC`` (or an earlier
+library) overrides the same name further down the chain.
+
+Shared libraries are keyed by filename (``MILL_HRS.LIB``) and stored once
+for the whole corpus, not once per package copy; per package we keep only
+the ``.SRC`` sections and calls plus the resolved chain. Reverse edges are
+precomputed, so ``affected(library, section)`` is a walk over the packages
+that include the library and the callers of the changed section in each,
+with no database access.
+"""
+
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+
+def _intern_all(names: Iterable[str]) -> list[str]:
+    return [sys.intern(n) for n in names]
+
+
+@dataclass(slots=True)
+class _Unit:
+    """Sections, reverse call edges and includes of one file."""
+
+    sections: dict[str, str] = field(default_factory=dict)  # name -> defining file
+    # callee -> [(caller, defining file)]
+    callers: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+    includes: list[str] = field(default_factory=list)
+
+    def add(
+        self,
+        filename: str,
+        sections: Iterable[str],
+        calls: Iterable[tuple[str, str]],
+        libraries: Iterable[str],
+    ) -> None:
+        for name in _intern_all(sections):
+            self.sections.setdefault(name, filename)
+        for caller, callee in calls:
+            self.callers.setdefault(sys.intern(callee), []).append((sys.intern(caller), filename))
+        for lib in libraries:
+            lib = lib.upper()
+            if lib not in self.includes:
+                self.includes.append(lib)
+
+
+@dataclass(slots=True)
+class _Package:
+    name: str
+    local: _Unit = field(default_factory=_Unit)
+    chain: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Impact:
+    """Sections of one package that change when a library section changes."""
+
+    package_id: str
+    package_name: str
+    sections: tuple[tuple[str, str], ...]  # (defining file, section name), root first
+
+
+class SectionGraph:
+    """Corpus-wide dependency graph; build with ``add_*`` then ``finalize()``."""
+
+    def __init__(self) -> None:
+        self._packages: dict[str, _Package] = {}
+        self._libraries: dict[str, _Unit] = {}
+        self._users: dict[str, set[str]] = {}  # library -> packages whose chain includes it
+
+    # -- building -----------------------------------------------------------
+
+    def add_source(
+        self,
+        package_id: str,
+        package_name: str,
+        filename: str,
+        sections: Iterable[str],
+        calls: Iterable[tuple[str, str]],
+        libraries: Iterable[str],
+    ) -> None:
+        """Add a package-local .SRC file (earlier files take precedence)."""
+        package = self._packages.setdefault(package_id, _Package(package_name))
+        package.local.add(filename, sections, calls, libraries)
+
+    def add_library(
+        self,
+        library: str,
+        sections: Iterable[str],
+        calls: Iterable[tuple[str, str]],
+        libraries: Iterable[str],
+    ) -> None:
+        """Add a shared library; the first definition of a library name wins."""
+        library = library.upper()
+        if library not in self._libraries:
+            unit = _Unit()
+            unit.add(library, sections, calls, libraries)
+            self._libraries[library] = unit
+
+    def _resolve_chain(self, roots: list[str]) -> tuple[str, ...]:
+        chain: list[str] = []
+        seen: set[str] = set()
+
+        def visit(lib: str) -> None:
+            if lib in seen:
+                return
+            seen.add(lib)
+            chain.append(lib)
+            unit = self._libraries.get(lib)
+            if unit is not None:
+                for child in unit.includes:
+                    visit(child)
+
+        for root in roots:
+            visit(root)
+        return tuple(chain)
+
+    def finalize(self) -> "SectionGraph":
+        self._users.clear()
+        for package_id, package in self._packages.items():
+            package.chain = self._resolve_chain(package.local.includes)
+            for lib in package.chain:
+                self._users.setdefault(lib, set()).add(package_id)
+        return self
+
+    # -- queries ------------------------------------------------------------
+
+    @property
+    def package_count(self) -> int:
+        return len(self._packages)
+
+    @property
+    def library_count(self) -> int:
+        return len(self._libraries)
+
+    def packages_using(self, library: str) -> set[str]:
+        """Packages that include ``library`` directly or through another library."""
+        return set(self._users.get(library.upper(), ()))
+
+    def chain(self, package_id: str) -> tuple[str, ...]:
+        package = self._packages.get(package_id)
+        return package.chain if package else ()
+
+    def owner(self, package_id: str, section: str) -> str | None:
+        """File that defines ``section`` for this package after overrides."""
+        package = self._packages.get(package_id)
+        if package is None:
+            return None
+        owner = package.local.sections.get(section)
+        if owner is not None:
+            return owner
+        for lib in package.chain:
+            unit = self._libraries.get(lib)
+            if unit is not None and section in unit.sections:
+                return lib
+        return None
+
+    def _callers(
+        self, package: _Package, package_id: str, name: str
+    ) -> Iterable[tuple[str, str]]:
+        """Callers of ``name`` whose own definition is the one in effect."""
+        for caller, filename in package.local.callers.get(name, ()):
+            if self.owner(package_id, caller) == filename:
+                yield filename, caller
+        for lib in package.chain:
+            unit = self._libraries.get(lib)
+            if unit is None:
+                continue
+            for caller, _ in unit.callers.get(name, ()):
+                if self.owner(package_id, caller) == lib:
+                    yield lib, caller
+
+    def affected(self, library: str, section: str) -> list[Impact]:
+        """Every package and section transitively affected by ``library:section``.
+
+        Packages that override ``section`` ahead of ``library`` are excluded;
+        within each remaining package, callers are followed in reverse.
+        """
+        library = library.upper()
+        impacts: list[Impact] = []
+        for package_id in self._users.get(library, ()):
+            if self.owner(package_id, section) != library:
+                continue
+            package = self._packages[package_id]
+            hits = [(library, section)]
+            seen = {section}
+            stack = [section]
+            while stack:
+                name = stack.pop()
+                for unit, caller in self._callers(package, package_id, name):
+                    if caller not in seen:
+                        seen.add(caller)
+                        hits.append((unit, caller))
+                        stack.append(caller)
+            impacts.append(Impact(package_id, package.name, tuple(hits)))
+        impacts.sort(key=lambda impact: impact.package_name)
+        return impacts
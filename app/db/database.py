@@ -1,35 +1,156 @@
 """Database setup and session management.
 
 Uses SQLAlchemy async with asyncpg for PostgreSQL.
-Connection pooling configured for containerized deployment.
+Connection pooling is configured from ``Settings`` (``db_pool_*``) so
+throughput can be scaled by adding API replicas without exhausting
+Postgres connections: each process holds at most
+``db_pool_size + db_max_overflow``.
+
+Reads that tolerate replica lag (listing, status polling, search,
+cross-reference) use ``get_read_db``; it routes to the read replica when
+``database_replica_url`` is set and to the primary otherwise. Writes always
+go through ``get_db``.
+
+The engines are not created at import time. The API creates them lazily
+on its first session and the app lifespan calls ``dispose_engine()`` on
+shutdown; scripts may call ``init_engine()`` up front.
 """
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import time
+from functools import cache
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.core import metrics
+
+PRIMARY = "primary"
+REPLICA = "replica"
 
 
 class Base(DeclarativeBase):
     pass
 
 
-settings = get_settings()
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.is_dev,
-    pool_size=5,
-    max_overflow=10,
-)
-async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout waited for a connection."""
+
+    pool_label = PRIMARY
+
+    def _do_get(self):  # type: ignore[no-untyped-def]
+        if not metrics.is_enabled():
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe(
+                "db_pool_checkout_wait_seconds",
+                time.perf_counter() - start,
+                pool=self.pool_label,
+            )
+
+
+@cache
+def _pool_class(label: str) -> type[InstrumentedQueuePool]:
+    # A subclass per engine keeps the label across pool.recreate().
+    return type(f"{label.title()}QueuePool", (InstrumentedQueuePool,), {"pool_label": label})
+
+
+def _create_engine(url: str, label: str, settings: Settings) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=_pool_class(label),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size},
+    )
+
+
+_engines: dict[str, AsyncEngine] = {}
+_sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
+
+
+def init_engine() -> AsyncEngine:
+    """Create the primary (and optional replica) engine and session factories.
+
+    Idempotent; returns the primary engine.
+    """
+    if PRIMARY not in _engines:
+        settings = get_settings()
+        urls = {PRIMARY: settings.database_url}
+        if settings.database_replica_url:
+            urls[REPLICA] = settings.database_replica_url
+        for label, url in urls.items():
+            _engines[label] = _create_engine(url, label, settings)
+            _sessionmakers[label] = async_sessionmaker(
+                _engines[label], class_=AsyncSession, expire_on_commit=False
+            )
+    return _engines[PRIMARY]
+
+
+def get_engine(role: str = PRIMARY) -> AsyncEngine:
+    init_engine()
+    return _engines.get(role, _engines[PRIMARY])
+
+
+def async_session() -> AsyncSession:
+    """Open a new primary session (usable as ``async with async_session() as db``)."""
+    init_engine()
+    return _sessionmakers[PRIMARY]()
+
+
+def read_session() -> AsyncSession:
+    """Open a read-only session on the replica, falling back to the primary."""
+    init_engine()
+    return _sessionmakers.get(REPLICA, _sessionmakers[PRIMARY])()
+
+
+def pool_status() -> dict[str, dict[str, int]]:
+    """Current pool occupancy per engine, for readiness detail and gauges."""
+    status = {}
+    for label, engine in _engines.items():
+        pool = engine.sync_engine.pool
+        status[label] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "capacity": pool.size() + pool._max_overflow,  # noqa: SLF001
+        }
+    return status
+
+
+async def dispose_engine() -> None:
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
 
 
 async def init_db() -> None:
     """Create all tables (used for testing; Alembic handles production migrations)."""
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
 async def get_db() -> AsyncSession:  # type: ignore[misc]
     async with async_session() as session:
         yield session
+
+
+async def get_read_db() -> AsyncSession:  # type: ignore[misc]
+    """Session for lag-tolerant reads; routed to the replica when configured."""
+    async with read_session() as session:
+        yield session
@@ -2,12 +2,31 @@
 
 PostPackage and PostFile represent the core data model for uploaded
 post processor packages and their constituent files stored in MinIO.
+PostSection, SectionCall and FileLibrary are the adjacency tables of the
+section/library dependency graph written by the ingest worker.
+AnalysisBatch and AnalysisResult persist batch copilot questions and their
+per-package answers. PackageSignature and PackageLshBand hold each package's
+MinHash signature and LSH buckets for near-duplicate (post family) lookups.
+IngestJob and IngestStep record each ingestion run and its completed stages,
+so a retried or resumed run skips work that already finished.
 """
 
 import uuid
 
-from sqlalchemy import Column, ForeignKey, Integer, Text, TIMESTAMP, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    Text,
+    TIMESTAMP,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -54,3 +73,171 @@ class PostFile(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     package = relationship("PostPackage", back_populates="files")
+
+
+class PostSection(Base):
+    """A ``:SECTION=`` block of a parsed .SRC or .LIB file."""
+
+    __tablename__ = "post_sections"
+    __table_args__ = (
+        Index("ix_post_sections_package_id", "package_id"),
+        Index("ix_post_sections_body_hash", "body_hash"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), nullable=False
+    )
+    file_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_files.id", ondelete="CASCADE"), nullable=False
+    )
+    name = Column(Text, nullable=False)
+    kind = Column(Text, nullable=False)
+    start_line = Column(Integer, nullable=False)
+    end_line = Column(Integer, nullable=False)
+    template_lines = Column(Integer, nullable=False, default=0)
+    # customization.section_hash of the normalized body (comments/whitespace ignored)
+    body_hash = Column(Text, nullable=True)
+
+
+class SectionCall(Base):
+    """A ``CALL(callee)`` edge from a section body, by section name."""
+
+    __tablename__ = "section_calls"
+    __table_args__ = (Index("ix_section_calls_package_id", "package_id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), nullable=False
+    )
+    file_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_files.id", ondelete="CASCADE"), nullable=False
+    )
+    caller = Column(Text, nullable=False)
+    callee = Column(Text, nullable=False)
+
+
+class FileLibrary(Base):
+    """A ``:LIBRARY=`` include; ``position`` preserves declaration (precedence) order."""
+
+    __tablename__ = "file_libraries"
+    __table_args__ = (
+        Index("ix_file_libraries_package_id", "package_id"),
+        Index("ix_file_libraries_library", "library"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), nullable=False
+    )
+    file_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_files.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    library = Column(Text, nullable=False)
+
+
+class PackageSignature(Base):
+    """MinHash signature over the package's .SRC sections (``app.core.minhash``)."""
+
+    __tablename__ = "package_signatures"
+
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), primary_key=True
+    )
+    signature = Column(LargeBinary, nullable=False)  # int64[NUM_PERM], native byte order
+    shingle_count = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class PackageLshBand(Base):
+    """One LSH bucket per signature band; packages sharing a bucket are candidates."""
+
+    __tablename__ = "package_lsh_bands"
+    __table_args__ = (Index("ix_package_lsh_bands_bucket", "band", "bucket"),)
+
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), primary_key=True
+    )
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
+
+
+class AnalysisBatch(Base):
+    """One question asked across a filtered set of packages."""
+
+    __tablename__ = "analysis_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    question = Column(Text, nullable=False)
+    package_filter = Column(JSONB, nullable=False, default=dict)
+    status = Column(Text, nullable=False, default="pending")
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+
+class AnalysisResult(Base):
+    """The answer (or error) for one package of a batch; ``id`` orders the stream."""
+
+    __tablename__ = "analysis_results"
+    __table_args__ = (Index("ix_analysis_results_batch_id", "batch_id", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(
+        UUID(as_uuid=True), ForeignKey("analysis_batches.id", ondelete="CASCADE"), nullable=False
+    )
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), nullable=False
+    )
+    status = Column(Text, nullable=False)  # "ok" or "error"
+    answer = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    latency_ms = Column(Integer, nullable=True)
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class IngestJob(Base):
+    """One ingestion run of a package; Celery retries and resumes reuse it."""
+
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (Index("ix_ingest_jobs_package_id", "package_id", "created_at"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    package_id = Column(
+        UUID(as_uuid=True), ForeignKey("post_packages.id", ondelete="CASCADE"), nullable=False
+    )
+    task_id = Column(Text, nullable=True)  # Celery task id of the latest attempt
+    status = Column(Text, nullable=False, default="pending")  # see app.workers.jobs
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    steps = relationship("IngestStep", order_by="IngestStep.id", cascade="all, delete-orphan")
+
+
+class IngestStep(Base):
+    """A stage of a job, per file for per-file stages (``target`` is "" otherwise)."""
+
+    __tablename__ = "ingest_steps"
+    __table_args__ = (UniqueConstraint("job_id", "stage", "target"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(
+        UUID(as_uuid=True), ForeignKey("ingest_jobs.id", ondelete="CASCADE"), nullable=False
+    )
+    stage = Column(Text, nullable=False)
+    target = Column(Text, nullable=False, default="")
+    status = Column(Text, nullable=False)  # "done" or "failed"
+    attempts = Column(Integer, nullable=False, default=1)
+    duration_ms = Column(Integer, nullable=True)
+    detail = Column(JSONB, nullable=True)  # stage output reused when the step is skipped
+    error = Column(Text, nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -1,25 +1,118 @@
-"""VeriPost -- AI Post Processor Copilot."""
+"""VeriPost -- AI Post Processor Copilot.
 
+Run with ``uvicorn --factory app.main:create_app``. Nothing external is
+touched at import time: the DB engine is created in the lifespan, heavy
+client libraries load on first use, and the MinIO bucket check runs in the
+background with its result reported on ``/health``.
+
+``create_app()`` and the lifespan stay light so the process answers
+``/health/live`` well within a second. Only the health routes are mounted
+up front; the API route modules, and with them SQLAlchemy, the ORM models
+and the response schemas, are imported and mounted by ``_DeferredRoutes``
+on the first request for anything else.
+"""
+
+import asyncio
+import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.api.routes import health, packages, parsing, posts
-from app.config import get_settings
+from app.api.middleware import AdmissionMiddleware, MetricsMiddleware, ProfilingMiddleware
+from app.api.routes import health
+from app.config import Settings, get_settings
+from app.core import metrics as app_metrics
+from app.services.admission import AdmissionController
 from app.services.storage import storage
 
+logger = logging.getLogger(__name__)
+
+
+async def _init_bucket(app: FastAPI) -> None:
+    """Ensure the MinIO bucket exists without holding up startup."""
+    try:
+        await storage.init_bucket()
+        app.state.readiness["storage"] = "ready"
+    except Exception as exc:
+        app.state.readiness["storage"] = "error"
+        logger.warning("MinIO bucket check failed: %s", exc)
+
+
+def _include_routes(app: FastAPI, settings: Settings) -> None:
+    """Import the API route modules and the services behind them, and mount them."""
+    from app.api.routes import (
+        analysis,
+        debug,
+        families,
+        graph,
+        metrics,
+        packages,
+        parsing,
+        posts,
+    )
+    from app.core.parsing.incremental import DocumentStore
+    from app.services.analysis_service import BatchRunner
+
+    app.state.documents = DocumentStore(settings.editor_max_documents)
+    app.state.batch_runner = BatchRunner.from_settings(settings)
+
+    app.include_router(metrics.router)
+    app.include_router(posts.router, prefix="/api/v1")
+    app.include_router(packages.router, prefix="/api/v1")
+    app.include_router(parsing.router, prefix="/api/v1")
+    app.include_router(graph.router, prefix="/api/v1")
+    app.include_router(analysis.router, prefix="/api/v1")
+    app.include_router(families.router, prefix="/api/v1")
+    if settings.profiling_enabled:
+        app.include_router(debug.router)
+
+
+class _DeferredRoutes:
+    """Mounts the API routes on the first request that is not a health check."""
+
+    def __init__(self, app: ASGIApp, target: FastAPI, settings: Settings) -> None:
+        self.app = app
+        self.target = target
+        self.settings = settings
+        self.loaded = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.loaded and scope["type"] in ("http", "websocket"):
+            if not any(route.matches(scope)[0] is Match.FULL for route in health.router.routes):
+                self.loaded = True
+                _include_routes(self.target, self.settings)
+        await self.app(scope, receive, send)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Startup and shutdown lifecycle."""
+    from app.core.parsing.executor import ParseExecutor
+    from app.services.redis_client import close_redis
+
     settings = get_settings()
-    # Alembic handles DB migrations at container startup (before uvicorn).
-    # Initialize MinIO bucket here.
-    await storage.init_bucket()
+    # Alembic handles DB migrations at container startup (before uvicorn). The
+    # engine is created by the first session, once the API routes are loaded.
+    app.state.readiness = {"storage": "pending"}
+    bucket_task = asyncio.create_task(_init_bucket(app))
+    # Shared process pool for CPU-bound parsing, so routes never parse on the loop.
+    # Worker processes are spawned on first submit, not here.
+    app.state.parse_executor = ParseExecutor.from_settings(settings)
+    app.state.parse_executor.start()
     print(f"VeriPost started in {settings.app_env} mode")
     yield
+    bucket_task.cancel()
+    if hasattr(app.state, "batch_runner"):
+        await app.state.batch_runner.shutdown()
+    app.state.parse_executor.shutdown()
+    from app.db.database import dispose_engine  # SQLAlchemy loads with the API routes
+
+    await dispose_engine()
+    await close_redis()
     print("VeriPost shutting down")
 
 
@@ -33,8 +126,29 @@ def create_app() -> FastAPI:
         debug=settings.is_dev,
         lifespan=lifespan,
     )
+    app.state.admission = AdmissionController.from_settings(settings)
+
+    # Routes -- health checks now, everything else on first use
+    app.include_router(health.router)
+    app.add_middleware(_DeferredRoutes, target=app, settings=settings)
+
+    # Admission control -- rate limits and a concurrency cap on expensive requests
+    if settings.admission_enabled:
+        app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+
+    # Metrics -- the middleware is only installed when enabled (zero cost otherwise)
+    app_metrics.configure(settings.metrics_enabled)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
+    # Profiling -- opt-in per request; not installed at all when disabled
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware, interval=settings.profiling_interval_ms / 1000
+        )
 
-    # CORS -- loosen in dev, lock down in production
+    # CORS -- loosen in dev, lock down in production. Added last so it is the
+    # outermost layer and 429/503 rejections from admission still carry it.
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"] if settings.is_dev else [],
@@ -43,13 +157,4 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Register route modules
-    app.include_router(health.router)
-    app.include_router(posts.router, prefix="/api/v1")
-    app.include_router(packages.router, prefix="/api/v1")
-    app.include_router(parsing.router, prefix="/api/v1")
-
     return app
-
-
-app = create_app()
@@ -0,0 +1,231 @@
+"""Admission control for expensive API requests: rate limits and a concurrency cap.
+
+Each policy (``upload``, ``copilot``) has two token buckets: one per client
+and one shared by all clients of the route. Expensive policies also take a
+slot in a concurrency semaphore that every API replica shares. All of this
+lives in Redis and is checked by a single Lua script, so one ``EVALSHA``
+round trip (well under a millisecond on the local network) admits or
+rejects a request atomically. Tokens are only taken when every bucket and
+the semaphore admit the request.
+
+A bucket holds up to ``per_minute`` tokens and refills continuously. When
+a bucket is empty, ``AdmissionRejectedError`` is raised with status 429 and the
+time until the next token as ``retry_after``. When the semaphore is full
+it is raised with status 503. Semaphore slots are leases: a slot whose
+holder crashed expires after ``admission_lease_seconds``.
+
+When Redis is unreachable or slower than ``admission_redis_timeout_ms``,
+requests are admitted (fail open) and a warning is logged. The limiter
+protects the backends and must not become a single point of failure
+itself.
+"""
+
+import asyncio
+import logging
+import math
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import Settings
+from app.core import metrics
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veripost:admission"
+SEMAPHORE_KEY = f"{KEY_PREFIX}:expensive"
+# Seconds a client is told to wait when the semaphore is full (slots free up
+# as requests finish, not on a schedule)
+BUSY_RETRY_AFTER = 2
+
+# KEYS: bucket keys..., semaphore key
+# ARGV: bucket count, (capacity, tokens per ms) per bucket, semaphore limit
+#       (0 = none), lease ms, holder token
+# Returns {1, 0} admitted, {0, wait_ms} rate limited, {-1, 0} semaphore full.
+ADMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local n = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i = 1, n do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local level = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  level = math.min(capacity, level + math.max(0, now - ts) * rate)
+  if level < 1 then
+    wait = math.max(wait, math.ceil((1 - level) / rate))
+  end
+  tokens[i] = level
+end
+if wait > 0 then
+  return {0, wait}
+end
+local base = 2 * n + 2
+local limit = tonumber(ARGV[base])
+if limit > 0 then
+  local key = KEYS[n + 1]
+  local lease = tonumber(ARGV[base + 1])
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+  if redis.call('ZCARD', key) >= limit then
+    return {-1, 0}
+  end
+  redis.call('ZADD', key, now + lease, ARGV[base + 2])
+  redis.call('PEXPIRE', key, lease)
+end
+for i = 1, n do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+  redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate))
+end
+return {1, 0}
+"""
+
+
+class AdmissionRejectedError(Exception):
+    """The request is over a rate limit (429) or the semaphore is full (503)."""
+
+    def __init__(self, policy: str, status: int, retry_after: int, reason: str) -> None:
+        super().__init__(reason)
+        self.policy = policy
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+@dataclass(frozen=True, slots=True)
+class Policy:
+    name: str
+    per_client_per_minute: int  # 0 = unlimited
+    per_minute: int  # all clients together; 0 = unlimited
+    expensive: bool = True  # takes a semaphore slot
+
+
+class AdmissionController:
+    """Checks requests against their policy's buckets and the shared semaphore."""
+
+    def __init__(
+        self,
+        policies: dict[str, Policy],
+        max_concurrent: int = 16,
+        lease_seconds: float = 300.0,
+        timeout: float = 0.05,
+        client_header: str = "",
+        enabled: bool = True,
+        redis: Any = None,
+    ) -> None:
+        self.policies = policies
+        self.enabled = enabled
+        self.client_header = client_header.lower().encode()
+        self.max_concurrent = max_concurrent
+        self.lease_ms = int(lease_seconds * 1000)
+        self.timeout = timeout
+        self._redis = redis
+        self._script: Any = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        policies = [
+            Policy(
+                "upload", settings.upload_per_client_per_minute, settings.upload_per_minute
+            ),
+            Policy(
+                "copilot", settings.copilot_per_client_per_minute, settings.copilot_per_minute
+            ),
+        ]
+        return cls(
+            {p.name: p for p in policies},
+            max_concurrent=settings.admission_max_concurrent,
+            lease_seconds=settings.admission_lease_seconds,
+            timeout=settings.admission_redis_timeout_ms / 1000,
+            client_header=settings.admission_client_header,
+            enabled=settings.admission_enabled,
+        )
+
+    def client_of(self, scope: dict) -> str:
+        """The client a request counts against: ``client_header``, else the peer address."""
+        if self.client_header:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    return value.decode("latin-1").split(",", 1)[0].strip()
+        peer = scope.get("client")
+        return peer[0] if peer else "unknown"
+
+    def _client(self) -> Any:
+        if self._script is None:
+            self._redis = self._redis or get_redis()
+            self._script = self._redis.register_script(ADMIT_SCRIPT)
+        return self._redis
+
+    async def acquire(self, policy_name: str, client: str) -> str | None:
+        """Admit one request; the semaphore token to ``release``, if one was taken.
+
+        Raises ``AdmissionRejectedError`` when the request is over a limit.
+        """
+        if not self.enabled:
+            return None
+        policy = self.policies[policy_name]
+        keys: list[str] = []
+        args: list[Any] = []
+        for key, per_minute in (
+            (f"{KEY_PREFIX}:{policy.name}:client:{client}", policy.per_client_per_minute),
+            (f"{KEY_PREFIX}:{policy.name}", policy.per_minute),
+        ):
+            if per_minute > 0:
+                keys.append(key)
+                args += [per_minute, per_minute / 60_000]
+        limit = self.max_concurrent if policy.expensive else 0
+        if not keys and not limit:
+            return None
+        token = uuid.uuid4().hex if limit else ""
+        try:
+            self._client()
+            async with asyncio.timeout(self.timeout):
+                admitted, wait_ms = await self._script(
+                    keys=[*keys, SEMAPHORE_KEY],
+                    args=[len(keys), *args, limit, self.lease_ms, token],
+                )
+        except Exception as exc:
+            logger.warning("Admission check skipped for %s: %r", policy.name, exc)
+            metrics.inc("admission_requests_total", policy=policy.name, result="unchecked")
+            return None
+
+        if admitted == 1:
+            metrics.inc("admission_requests_total", policy=policy.name, result="admitted")
+            return token or None
+        if admitted == 0:
+            metrics.inc("admission_requests_total", policy=policy.name, result="rate_limited")
+            raise AdmissionRejectedError(
+                policy.name, 429, max(1, math.ceil(wait_ms / 1000)), "rate limit exceeded"
+            )
+        metrics.inc("admission_requests_total", policy=policy.name, result="busy")
+        raise AdmissionRejectedError(
+            policy.name,
+            503,
+            BUSY_RETRY_AFTER,
+            f"{self.max_concurrent} expensive requests already in progress",
+        )
+
+    async def release(self, token: str | None) -> None:
+        if token is None:
+            return
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self._client().zrem(SEMAPHORE_KEY, token)
+        except Exception as exc:  # the lease expires on its own
+            logger.warning("Could not release admission slot %s: %r", token, exc)
+
+    @asynccontextmanager
+    async def admit(self, policy_name: str, client: str) -> AsyncIterator[None]:
+        """Hold an admission for the body of the ``async with`` block."""
+        token = await self.acquire(policy_name, client)
+        try:
+            yield
+        finally:
+            await self.release(token)
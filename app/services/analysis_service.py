@@ -0,0 +1,393 @@
+"""Batch copilot analysis: one question asked across many packages.
+
+``create_batch`` resolves the package filter and records the batch.
+``BatchRunner`` then answers it in the background of the API process:
+
+- Each package's context is assembled from its parsed structure (files,
+  library precedence, sections) plus the bodies of the sections whose
+  names match the question.
+- Model calls go through the process-wide ``CallScheduler``, so every
+  running batch shares one concurrency and rate-limit budget.
+- Each answer is written to ``analysis_results`` as soon as it arrives.
+
+``stream_results`` follows those rows, so any API replica can stream a
+batch's partial results while it runs.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Settings
+from app.core.ai.copilot import MAX_CONTEXT_CHARS, Copilot, estimate_tokens
+from app.core.ai.scheduler import CallScheduler
+from app.db.database import async_session, read_session
+from app.db.models import (
+    AnalysisBatch,
+    AnalysisResult,
+    FileLibrary,
+    PostFile,
+    PostPackage,
+    PostSection,
+    SectionCall,
+)
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = frozenset({"pending", "running"})
+# Share of the context budget for the structural summary; section bodies get the rest.
+STRUCTURE_SHARE = 0.4
+# Concurrent DB sessions per batch for context reads. Result writes use one
+# more session and are serialized (see ``stream_results``).
+BATCH_DB_SESSIONS = 2
+STREAM_POLL_SECONDS = 0.5
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+STOPWORDS = frozenset(
+    {"AND", "THE", "FOR", "HOW", "WHAT", "WHICH", "EACH", "DOES", "WITH", "THIS", "THAT",
+     "POST", "POSTS", "SUMMARIZE", "EXPLAIN", "DESCRIBE", "HANDLE", "HANDLES", "FROM"}
+)
+
+
+# -- context assembly -----------------------------------------------------------
+
+
+def question_terms(question: str) -> set[str]:
+    return {
+        w for w in (m.upper() for m in WORD_PATTERN.findall(question))
+        if len(w) >= 3 and w not in STOPWORDS
+    }
+
+
+def rank_sections(question: str, names: list[str]) -> list[str]:
+    """Section names that share a word (or word prefix) with the question, best first.
+
+    ``"rigid tapping"`` matches ``RIGID_TAP`` (two words) before ``TAP_CYCLE``.
+    """
+    terms = question_terms(question)
+    scored = []
+    for name in dict.fromkeys(names):
+        words = [w.upper() for w in WORD_PATTERN.findall(name) if len(w) >= 3]
+        score = sum(any(w.startswith(t) or t.startswith(w) for w in words) for t in terms)
+        if score:
+            scored.append((-score, name))
+    return [name for _, name in sorted(scored)]
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: max(limit - 4, 0)] + "\n..."
+
+
+async def build_context(db: AsyncSession, package: PostPackage, question: str) -> str:
+    """Summarize one package for the model, within ``MAX_CONTEXT_CHARS``."""
+    package_id = package.id
+    files = (
+        await db.execute(select(PostFile).where(PostFile.package_id == package_id))
+    ).scalars().all()
+    files_by_id = {f.id: f for f in files}
+    sections = (
+        await db.execute(
+            select(PostSection)
+            .where(PostSection.package_id == package_id)
+            .order_by(PostSection.start_line)
+        )
+    ).scalars().all()
+    libraries = (
+        await db.execute(
+            select(FileLibrary.library)
+            .where(FileLibrary.package_id == package_id)
+            .order_by(FileLibrary.position)
+        )
+    ).scalars().all()
+    calls = (
+        await db.execute(
+            select(SectionCall.caller, SectionCall.callee).where(
+                SectionCall.package_id == package_id
+            )
+        )
+    ).all()
+
+    header = [
+        f"Package: {package.name} (platform {package.platform}, "
+        f"machine {package.machine_type or 'unknown'}, "
+        f"controller {package.controller_type or 'unknown'})",
+        "Files: " + ", ".join(f"{f.filename} ({f.size_bytes or 0} bytes)" for f in files),
+    ]
+    if libraries:
+        header.append("Libraries (precedence order): " + ", ".join(dict.fromkeys(libraries)))
+    by_file: dict[str, list[str]] = defaultdict(list)
+    for s in sections:
+        by_file[files_by_id[s.file_id].filename].append(s.name)
+    header.append("Sections:")
+    header.extend(f"  {filename}: {', '.join(names)}" for filename, names in by_file.items())
+
+    relevant = rank_sections(question, [s.name for s in sections])
+    wanted = set(relevant)
+    callees: dict[str, set[str]] = defaultdict(set)
+    for caller, callee in calls:
+        if caller in wanted:
+            callees[caller].add(callee)
+    if callees:
+        header.append(
+            "Calls: " + "; ".join(f"{c} -> {', '.join(sorted(callees[c]))}" for c in relevant
+                                  if c in callees)
+        )
+    context = _clip("\n".join(header), int(MAX_CONTEXT_CHARS * STRUCTURE_SHARE))
+
+    rank = {name: i for i, name in enumerate(relevant)}
+    chosen = sorted((s for s in sections if s.name in rank), key=lambda s: rank[s.name])
+    lines_by_file: dict[uuid.UUID, list[str]] = {}
+    for s in chosen:
+        remaining = MAX_CONTEXT_CHARS - len(context)
+        if remaining < 200:
+            break
+        if s.file_id not in lines_by_file:
+            f = files_by_id[s.file_id]
+            data = await storage.download_file(f.minio_key, f.content_hash)
+            lines_by_file[s.file_id] = data.decode("utf-8", errors="replace").splitlines()
+        body = "\n".join(lines_by_file[s.file_id][s.start_line - 1 : s.end_line])
+        title = f"\n\n--- {files_by_id[s.file_id].filename} lines {s.start_line}-{s.end_line}\n"
+        context += _clip(title + body, remaining)
+    return context
+
+
+# -- batches ----------------------------------------------------------------------
+
+
+async def select_packages(db: AsyncSession, package_filter: dict) -> list[PostPackage]:
+    """Ready packages matching the filter fields of ``BatchAnalysisRequest``."""
+    query = select(PostPackage).where(PostPackage.status == "ready")
+    if package_filter.get("package_ids"):
+        query = query.where(PostPackage.id.in_(package_filter["package_ids"]))
+    if package_filter.get("platform"):
+        query = query.where(PostPackage.platform == package_filter["platform"])
+    if package_filter.get("search"):
+        pattern = "%" + re.sub(r"([%_\\])", r"\\\1", package_filter["search"]) + "%"
+        query = query.where(
+            or_(
+                PostPackage.name.ilike(pattern),
+                PostPackage.machine_type.ilike(pattern),
+                PostPackage.controller_type.ilike(pattern),
+            )
+        )
+    query = query.order_by(PostPackage.name).limit(package_filter.get("limit", 100))
+    return list((await db.execute(query)).scalars().all())
+
+
+async def create_batch(
+    db: AsyncSession, question: str, package_filter: dict, packages: list[PostPackage]
+) -> AnalysisBatch:
+    batch = AnalysisBatch(
+        question=question,
+        package_filter=package_filter,
+        status="pending",
+        total=len(packages),
+        completed=0,
+        failed=0,
+    )
+    db.add(batch)
+    await db.commit()
+    await db.refresh(batch)
+    return batch
+
+
+async def get_batch(
+    db: AsyncSession, batch_id: uuid.UUID
+) -> tuple[AnalysisBatch | None, list[tuple[AnalysisResult, str]]]:
+    """The batch and its results so far, each with its package name."""
+    batch = await db.get(AnalysisBatch, batch_id)
+    if batch is None:
+        return None, []
+    return batch, await _results_after(db, batch_id, 0)
+
+
+async def _results_after(
+    db: AsyncSession, batch_id: uuid.UUID, cursor: int
+) -> list[tuple[AnalysisResult, str]]:
+    rows = await db.execute(
+        select(AnalysisResult, PostPackage.name)
+        .join(PostPackage, PostPackage.id == AnalysisResult.package_id)
+        .where(AnalysisResult.batch_id == batch_id, AnalysisResult.id > cursor)
+        .order_by(AnalysisResult.id)
+    )
+    return [(result, name) for result, name in rows.all()]
+
+
+def result_payload(result: AnalysisResult, package_name: str) -> dict:
+    return {
+        "type": "result",
+        "package_id": str(result.package_id),
+        "package_name": package_name,
+        "status": result.status,
+        "answer": result.answer,
+        "error": result.error,
+        "attempts": result.attempts,
+        "latency_ms": result.latency_ms,
+    }
+
+
+def batch_payload(batch: AnalysisBatch) -> dict:
+    return {
+        "type": "batch",
+        "batch_id": str(batch.id),
+        "status": batch.status,
+        "total": batch.total,
+        "completed": batch.completed,
+        "failed": batch.failed,
+    }
+
+
+async def stream_results(
+    batch_id: uuid.UUID, poll_seconds: float = STREAM_POLL_SECONDS
+) -> AsyncIterator[dict]:
+    """Yield each result as it is persisted, then the batch summary once it finishes.
+
+    Reads the primary so a replica's lag never hides a result. The batch
+    row is read before its results, and results are committed before the
+    batch is marked finished, so the final poll sees every result.
+
+    The cursor is the last streamed ``AnalysisResult.id``. That is only safe
+    because a batch commits its results one at a time (``BatchRunner``
+    holds a per-batch write lock from insert to commit): a lower id can
+    never become visible after a higher one has been streamed.
+    """
+    cursor = 0
+    while True:
+        async with async_session() as db:
+            batch = await db.get(AnalysisBatch, batch_id)
+            rows = await _results_after(db, batch_id, cursor)
+        for result, name in rows:
+            cursor = result.id
+            yield result_payload(result, name)
+        if batch is None or batch.status not in ACTIVE_STATUSES:
+            if batch is not None:
+                yield batch_payload(batch)
+            return
+        await asyncio.sleep(poll_seconds)
+
+
+class BatchRunner:
+    """Runs batches as tasks of the API process, sharing one ``CallScheduler``.
+
+    A batch interrupted by shutdown is marked ``cancelled``; its persisted
+    results are kept.
+    """
+
+    def __init__(self, scheduler: CallScheduler, copilot: Copilot) -> None:
+        self.scheduler = scheduler
+        self.copilot = copilot
+        self._tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "BatchRunner":
+        scheduler = CallScheduler(
+            concurrency=settings.copilot_batch_concurrency,
+            requests_per_minute=settings.copilot_requests_per_minute,
+            tokens_per_minute=settings.copilot_input_tokens_per_minute,
+            max_attempts=settings.copilot_max_attempts,
+        )
+        return cls(scheduler, Copilot(max_retries=0))
+
+    def start(self, batch: AnalysisBatch, packages: list[PostPackage]) -> asyncio.Task:
+        task = asyncio.create_task(self._run(batch.id, batch.question, packages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(
+        self, batch_id: uuid.UUID, question: str, packages: list[PostPackage]
+    ) -> None:
+        await self._set_status(batch_id, "running")
+        db_slots = asyncio.Semaphore(BATCH_DB_SESSIONS)
+        write_lock = asyncio.Lock()  # results commit in id order; see stream_results
+        status = "failed"
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(
+                    self._analyze(batch_id, question, p, db_slots, write_lock)
+                    for p in packages
+                )
+            )
+            status = "done"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            await self._set_status(batch_id, status, finished=True)
+            logger.info(
+                "Analysis batch %s %s: %d packages in %.1fs",
+                batch_id, status, len(packages), time.perf_counter() - started,
+            )
+
+    async def _analyze(
+        self,
+        batch_id: uuid.UUID,
+        question: str,
+        package: PostPackage,
+        db_slots: asyncio.Semaphore,
+        write_lock: asyncio.Lock,
+    ) -> None:
+        attempts = 0
+
+        async def call():  # type: ignore[no-untyped-def]
+            nonlocal attempts
+            attempts += 1
+            return await self.copilot.complete(context, question, package.platform)
+
+        started = time.perf_counter()
+        row: dict
+        try:
+            async with db_slots, read_session() as db:
+                context = await build_context(db, package, question)
+            completion = await self.scheduler.call(
+                call, tokens=estimate_tokens(context, question)
+            )
+            row = {
+                "status": "ok",
+                "answer": completion.text,
+                "input_tokens": completion.input_tokens,
+                "output_tokens": completion.output_tokens,
+            }
+        except Exception as exc:  # one package's failure is its result, not the batch's
+            row = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+        row["attempts"] = max(attempts, 1)
+        row["latency_ms"] = int((time.perf_counter() - started) * 1000)
+
+        ok = row["status"] == "ok"
+        async with write_lock, async_session() as db:
+            db.add(AnalysisResult(batch_id=batch_id, package_id=package.id, **row))
+            await db.execute(
+                update(AnalysisBatch)
+                .where(AnalysisBatch.id == batch_id)
+                .values(
+                    completed=AnalysisBatch.completed + int(ok),
+                    failed=AnalysisBatch.failed + int(not ok),
+                )
+            )
+            await db.commit()
+
+    @staticmethod
+    async def _set_status(batch_id: uuid.UUID, status: str, finished: bool = False) -> None:
+        values: dict = {"status": status}
+        if finished:
+            values["finished_at"] = datetime.now(UTC)
+        async with async_session() as db:
+            await db.execute(
+                update(AnalysisBatch).where(AnalysisBatch.id == batch_id).values(**values)
+            )
+            await db.commit()
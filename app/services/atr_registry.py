@@ -0,0 +1,280 @@
+"""Shared, content-addressed index of ``.ATR`` attribute registries.
+
+Every HRS package ships its own copy of ``MASTER.ATR``, almost always
+byte-identical to the canonical VF-4 registry. ``AtrRegistry`` parses each
+distinct ATR once, keyed by the SHA-256 already stored as
+``PostFile.content_hash``, and serializes it to ``<hash>.atrx`` under
+``atr_index_dir``. Any process (API or Celery worker) then memory-maps that
+file instead of re-parsing, so the OS page cache holds one copy for all of
+them.
+
+``.atrx`` layout (little-endian), columns sorted by ATTRID::
+
+    header        magic "VATR", version, IDHIGH, row count, blob length
+    fingerprint   u64[n]   blake2b of name + fields, for override diffs
+    attr_id       i32[n]
+    start_line    i32[n]
+    end_line      i32[n]
+    name_off      u32[n+1] into blob
+    fields_off    u32[n+1] into blob ("KEY=value\\n" lines)
+    blob          UTF-8
+
+``AtrIndex`` is read-only. Lookup by ATTRID is a binary search over the
+mapped id column; lookup by name is a dict built on first use.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from app.config import get_settings
+from app.core.models.post_processor import ParsedAttribute
+from app.core.parsing.companion import AttributeRegistry, parse_atr
+
+MAGIC = b"VATR"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxiII")  # 20 bytes, padded to 24 below
+HEADER_SIZE = 24
+SUFFIX = ".atrx"
+
+
+def content_hash(data: bytes | mmap.mmap) -> str:
+    """Same digest as ``PostFile.content_hash``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fingerprint(name: str, fields: dict[str, str]) -> int:
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(name.encode())
+    for key in sorted(fields):
+        digest.update(f"\0{key}={fields[key]}".encode())
+    return int.from_bytes(digest.digest(), "little")
+
+
+def serialize(registry: AttributeRegistry) -> bytes:
+    """Encode a parsed registry in the ``.atrx`` layout."""
+    count = len(registry)
+    fingerprints = array("Q")
+    name_offsets = array("I", [0])
+    field_offsets = array("I")
+    blob = bytearray()
+    for name in registry.names:
+        blob += name.encode()
+        name_offsets.append(len(blob))
+    field_offsets.append(len(blob))
+    for name, fields in zip(registry.names, registry.fields):
+        fingerprints.append(_fingerprint(name, fields))
+        blob += "".join(f"{key}={value}\n" for key, value in fields.items()).encode()
+        field_offsets.append(len(blob))
+
+    header = HEADER.pack(MAGIC, VERSION, registry.id_high, count, len(blob))
+    parts = [
+        header.ljust(HEADER_SIZE, b"\0"),
+        fingerprints.tobytes(),
+        registry.ids.tobytes(),
+        registry.start_lines.tobytes(),
+        registry.end_lines.tobytes(),
+        name_offsets.tobytes(),
+        field_offsets.tobytes(),
+        bytes(blob),
+    ]
+    return b"".join(parts)
+
+
+class AtrIndex:
+    """Immutable view over one serialized registry (mmap or bytes)."""
+
+    def __init__(self, digest: str, buffer: bytes | mmap.mmap) -> None:
+        magic, version, id_high, count, blob_len = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{digest}: not a v{VERSION} ATR index")
+        self.digest = digest
+        self.id_high = id_high
+        self._buffer = buffer
+        view = memoryview(buffer)
+        pos = HEADER_SIZE
+
+        def column(fmt: str, size: int, length: int) -> memoryview:
+            nonlocal pos
+            col = view[pos : pos + size * length].cast(fmt)
+            pos += size * length
+            return col
+
+        self._fingerprints = column("Q", 8, count)
+        self.ids = column("i", 4, count)
+        self._start_lines = column("i", 4, count)
+        self._end_lines = column("i", 4, count)
+        self._name_offsets = column("I", 4, count + 1)
+        self._field_offsets = column("I", 4, count + 1)
+        self._blob = view[pos : pos + blob_len]
+        self._by_name: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, attr_id: int) -> bool:
+        return self.row_of(attr_id) is not None
+
+    def row_of(self, attr_id: int) -> int | None:
+        pos = bisect_left(self.ids, attr_id)
+        if pos < len(self.ids) and self.ids[pos] == attr_id:
+            return pos
+        return None
+
+    def name(self, row: int) -> str:
+        return bytes(self._blob[self._name_offsets[row] : self._name_offsets[row + 1]]).decode()
+
+    def fields(self, row: int) -> dict[str, str]:
+        raw = bytes(self._blob[self._field_offsets[row] : self._field_offsets[row + 1]]).decode()
+        return dict(line.split("=", 1) for line in raw.splitlines())
+
+    def fingerprint(self, row: int) -> int:
+        return self._fingerprints[row]
+
+    def names(self) -> dict[str, int]:
+        """Casefolded attribute name -> ATTRID (built once per index)."""
+        if self._by_name is None:
+            with self._lock:
+                if self._by_name is None:
+                    by_name: dict[str, int] = {}
+                    for row, attr_id in enumerate(self.ids):
+                        by_name.setdefault(self.name(row).casefold(), attr_id)
+                    self._by_name = by_name
+        return self._by_name
+
+    def id_of(self, name: str) -> int | None:
+        return self.names().get(name.casefold())
+
+    def by_id(self, attr_id: int) -> ParsedAttribute | None:
+        row = self.row_of(attr_id)
+        if row is None:
+            return None
+        return ParsedAttribute(
+            name=self.name(row),
+            attr_id=attr_id,
+            start_line=self._start_lines[row],
+            end_line=self._end_lines[row],
+            fields=self.fields(row),
+        )
+
+    def by_name(self, name: str) -> ParsedAttribute | None:
+        attr_id = self.id_of(name)
+        return self.by_id(attr_id) if attr_id is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class AttributeOverrides:
+    """How a package's ATR differs from the master registry, by ATTRID."""
+
+    added: tuple[int, ...]
+    changed: tuple[int, ...]
+    removed: tuple[int, ...]
+
+    @property
+    def identical(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
+def diff(package: AtrIndex, master: AtrIndex) -> AttributeOverrides:
+    """Merge-walk both sorted id columns, comparing per-attribute fingerprints."""
+    if package.digest == master.digest:
+        return AttributeOverrides((), (), ())
+    added: list[int] = []
+    changed: list[int] = []
+    removed: list[int] = []
+    ids_a, ids_b = package.ids, master.ids
+    i = j = 0
+    while i < len(ids_a) and j < len(ids_b):
+        a, b = ids_a[i], ids_b[j]
+        if a == b:
+            if package.fingerprint(i) != master.fingerprint(j):
+                changed.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            added.append(a)
+            i += 1
+        else:
+            removed.append(b)
+            j += 1
+    added.extend(ids_a[i:])
+    removed.extend(ids_b[j:])
+    return AttributeOverrides(tuple(added), tuple(changed), tuple(removed))
+
+
+class AtrRegistry:
+    """Process-wide cache of ``AtrIndex`` objects backed by ``.atrx`` files."""
+
+    def __init__(self, directory: str | Path, master_hash: str = "") -> None:
+        self.directory = Path(directory)
+        self.master_hash = master_hash
+        self._indexes: dict[str, AtrIndex] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / f"{digest}{SUFFIX}"
+
+    def _open(self, digest: str) -> AtrIndex | None:
+        try:
+            with open(self._path(digest), "rb") as fh:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+        return AtrIndex(digest, mapped)
+
+    def get(self, digest: str) -> AtrIndex | None:
+        """Return the index for ``digest`` if any process has already built it."""
+        index = self._indexes.get(digest)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(digest) or self._open(digest)
+                if index is not None:
+                    self._indexes[digest] = index
+        return index
+
+    def load(self, data: bytes | mmap.mmap, digest: str | None = None) -> AtrIndex:
+        """Index raw ATR bytes, parsing only if no process has seen this content.
+
+        ``data`` may be a memory-mapped spool file; it is only decoded when
+        the content has not been indexed yet.
+        """
+        digest = digest or content_hash(data)
+        index = self.get(digest)
+        if index is not None:
+            return index
+        encoded = serialize(parse_atr(str(data, "utf-8", errors="replace")))
+        with self._lock:
+            if digest in self._indexes:
+                return self._indexes[digest]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent readers never map a partial file.
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(encoded)
+            os.replace(tmp, self._path(digest))
+            index = self._open(digest) or AtrIndex(digest, encoded)
+            self._indexes[digest] = index
+        return index
+
+    def master(self) -> AtrIndex | None:
+        return self.get(self.master_hash) if self.master_hash else None
+
+    def overrides(self, package: AtrIndex) -> AttributeOverrides | None:
+        """Diff a package's ATR against the master, or None if no master is indexed."""
+        master = self.master()
+        return diff(package, master) if master is not None else None
+
+
+@lru_cache
+def get_atr_registry() -> AtrRegistry:
+    settings = get_settings()
+    return AtrRegistry(settings.atr_index_dir, settings.atr_master_hash)
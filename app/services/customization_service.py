@@ -0,0 +1,195 @@
+"""Summarize how a customer post differs from the HRS template it was created from.
+
+The template is chosen in this order:
+
+1. the package passed as ``template_id``;
+2. the newest ready package with a .SRC named by the post's
+   ``Created From:`` header;
+3. the nearest neighbour. One ``post_sections`` query shortlists the ready
+   .SRC files sharing the most section names with the post, and
+   ``customization.similarity`` (section-hash overlap) ranks them.
+
+Only the structural delta (``customization.render``) is sent to the
+copilot, never either file. Fingerprints are cached per process by content
+hash. A template shared by hundreds of customer posts is therefore
+downloaded and parsed once, and a summary costs a diff plus one small
+prompt.
+"""
+
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core import customization
+from app.core.ai.copilot import Copilot
+from app.core.customization import PostFingerprint
+from app.core.lru import LRUCache
+from app.core.models.post_processor import CustomizationDelta
+from app.core.parsing.executor import ParseExecutor
+from app.db.models import PostFile, PostPackage, PostSection
+from app.services.storage import storage
+
+# Shortlist size for nearest-neighbour template matching.
+NEAREST_CANDIDATES = 8
+
+SUMMARY_QUESTION = (
+    "The text above is not a whole post: it is the structural delta between a customer "
+    "post and the base template it was created from (lines prefixed + were added by the "
+    "customer, - were removed). Summarize what the customization changes and why it "
+    "likely matters on the machine, grouped by topic. Flag anything that could affect "
+    "safety or toolpath integrity."
+)
+
+
+@lru_cache
+def get_fingerprint_cache() -> LRUCache[PostFingerprint]:
+    """Per-process LRU of ``PostFingerprint`` by content hash."""
+    return LRUCache("fingerprints", get_settings().template_fingerprint_cache_size)
+
+
+@dataclass(slots=True)
+class Customization:
+    post_file: PostFile
+    post: PostFingerprint
+    template_package: PostPackage
+    template_file: PostFile
+    matched_by: str
+    similarity: float
+    delta: CustomizationDelta
+    prompt: str
+    summary: str | None = None
+
+
+async def fingerprint_of(file: PostFile, executor: ParseExecutor) -> PostFingerprint:
+    """Fingerprint a stored .SRC, parsing it in the pool only on a cache miss."""
+    cache = get_fingerprint_cache()
+    fp = cache.get(file.content_hash) if file.content_hash else None
+    if fp is None:
+        data = await storage.download_file(file.minio_key, file.content_hash)
+        content = data.decode("utf-8", errors="replace")
+        fp = await executor.submit(customization.fingerprint, content, file.filename)
+        if file.content_hash:
+            cache.put(file.content_hash, fp)
+    return fp
+
+
+def _src_query():  # type: ignore[no-untyped-def]
+    return (
+        select(PostFile, PostPackage)
+        .join(PostPackage, PostPackage.id == PostFile.package_id)
+        .where(PostPackage.status == "ready", PostFile.file_extension == ".SRC")
+    )
+
+
+async def _by_package(
+    db: AsyncSession, package_id: uuid.UUID
+) -> tuple[PostFile, PostPackage] | None:
+    row = (
+        await db.execute(_src_query().where(PostPackage.id == package_id).limit(1))
+    ).first()
+    return (row[0], row[1]) if row else None
+
+
+async def _by_filename(
+    db: AsyncSession, filename: str, exclude: uuid.UUID
+) -> tuple[PostFile, PostPackage] | None:
+    row = (
+        await db.execute(
+            _src_query()
+            .where(func.upper(PostFile.filename) == filename, PostPackage.id != exclude)
+            .order_by(PostFile.created_at.desc())
+            .limit(1)
+        )
+    ).first()
+    return (row[0], row[1]) if row else None
+
+
+async def _nearest(
+    db: AsyncSession, post_file: PostFile, post: PostFingerprint, executor: ParseExecutor
+) -> tuple[PostFile, PostPackage, float] | None:
+    shared = func.count(func.distinct(PostSection.name)).label("shared")
+    shortlist = (
+        await db.execute(
+            select(PostSection.file_id, shared)
+            .join(PostFile, PostFile.id == PostSection.file_id)
+            .join(PostPackage, PostPackage.id == PostFile.package_id)
+            .where(
+                PostPackage.status == "ready",
+                PostFile.file_extension == ".SRC",
+                PostFile.package_id != post_file.package_id,
+                PostSection.name.in_(list(post.sections)),
+            )
+            .group_by(PostSection.file_id)
+            .order_by(shared.desc())
+            .limit(NEAREST_CANDIDATES)
+        )
+    ).all()
+    if not shortlist:
+        return None
+    rows = (
+        await db.execute(_src_query().where(PostFile.id.in_([r.file_id for r in shortlist])))
+    ).all()
+    best: tuple[PostFile, PostPackage, float] | None = None
+    for file, package in rows:
+        if file.content_hash and file.content_hash == post_file.content_hash:
+            continue  # an identical copy of the post itself says nothing
+        score = customization.similarity(post, await fingerprint_of(file, executor))
+        if best is None or score > best[2]:
+            best = (file, package, score)
+    return best
+
+
+async def analyze_customization(
+    db: AsyncSession,
+    package: PostPackage,
+    executor: ParseExecutor,
+    template_id: uuid.UUID | None = None,
+) -> Customization | None:
+    """Resolve the template and diff against it; None if either .SRC is missing."""
+    post_file = next((f for f in package.files if f.file_extension == ".SRC"), None)
+    if post_file is None:
+        return None
+    post = await fingerprint_of(post_file, executor)
+
+    found: tuple[PostFile, PostPackage] | None = None
+    matched_by = "requested"
+    if template_id is not None:
+        found = await _by_package(db, template_id)
+    elif post.created_from:
+        matched_by = "created_from"
+        found = await _by_filename(
+            db, customization.template_filename(post.created_from), package.id
+        )
+    score: float | None = None
+    if found is None and template_id is None:
+        matched_by = "nearest"
+        nearest = await _nearest(db, post_file, post, executor)
+        if nearest is not None:
+            found, score = nearest[:2], nearest[2]
+    if found is None:
+        return None
+
+    template_file, template_package = found
+    template = await fingerprint_of(template_file, executor)
+    delta = customization.diff(post, template)
+    return Customization(
+        post_file=post_file,
+        post=post,
+        template_package=template_package,
+        template_file=template_file,
+        matched_by=matched_by,
+        similarity=customization.similarity(post, template) if score is None else score,
+        delta=delta,
+        prompt=customization.render(delta),
+    )
+
+
+async def summarize(result: Customization, platform: str, copilot: Copilot) -> str:
+    """One copilot call over the rendered delta."""
+    return await copilot.ask(
+        result.prompt, SUMMARY_QUESTION, platform, subject="customization delta"
+    )
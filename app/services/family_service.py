@@ -0,0 +1,104 @@
+"""Post families (MACH-03): near-duplicate packages found through LSH buckets.
+
+The ingest worker stores each package's MinHash signature and one bucket
+per band (``app.core.minhash``). A package's candidates are the packages
+sharing any of its buckets, found with one indexed self-join on
+``package_lsh_bands``. Candidates are then verified by the estimated
+similarity of their signatures. No query compares every pair of packages.
+"""
+
+import itertools
+import uuid
+from array import array
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core import minhash
+from app.db.models import PackageLshBand, PackageSignature, PostPackage
+
+
+async def _signatures(
+    db: AsyncSession, package_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, tuple[str, array]]:
+    """``package_id -> (name, signature)`` for the ready packages among ``package_ids``."""
+    rows = await db.execute(
+        select(PackageSignature.package_id, PostPackage.name, PackageSignature.signature)
+        .join(PostPackage, PostPackage.id == PackageSignature.package_id)
+        .where(PostPackage.status == "ready", PackageSignature.package_id.in_(package_ids))
+    )
+    return {pid: (name, minhash.from_bytes(sig)) for pid, name, sig in rows.all()}
+
+
+async def near_duplicates(
+    db: AsyncSession, package_id: uuid.UUID, threshold: float
+) -> list[tuple[uuid.UUID, str, float]] | None:
+    """Packages at or above ``threshold`` estimated similarity, most similar first.
+
+    Returns None when the package has no signature (not ingested yet, or no
+    .SRC sections).
+    """
+    own = await db.get(PackageSignature, package_id)
+    if own is None:
+        return None
+    other = aliased(PackageLshBand)
+    candidates = (
+        await db.execute(
+            select(other.package_id)
+            .join(
+                PackageLshBand,
+                and_(PackageLshBand.band == other.band, PackageLshBand.bucket == other.bucket),
+            )
+            .where(PackageLshBand.package_id == package_id, other.package_id != package_id)
+            .distinct()
+        )
+    ).scalars().all()
+    if not candidates:
+        return []
+    signature = minhash.from_bytes(own.signature)
+    matches = []
+    for pid, (name, sig) in (await _signatures(db, list(candidates))).items():
+        score = minhash.estimate(signature, sig)
+        if score >= threshold:
+            matches.append((pid, name, score))
+    matches.sort(key=lambda m: (-m[2], m[1]))
+    return matches
+
+
+async def post_families(
+    db: AsyncSession, threshold: float, min_size: int = 2
+) -> list[list[tuple[uuid.UUID, str]]]:
+    """Every family of at least ``min_size`` packages, largest first.
+
+    Only buckets holding more than one package are read. Within a bucket,
+    a pair already in the same family is not re-verified, so a template
+    copied a hundred times costs about a hundred checks, not 5,000.
+    """
+    buckets = (
+        await db.execute(
+            select(func.array_agg(PackageLshBand.package_id))
+            .group_by(PackageLshBand.band, PackageLshBand.bucket)
+            .having(func.count() > 1)
+        )
+    ).scalars().all()
+    members = sorted({pid for bucket in buckets for pid in bucket})
+    if not members:
+        return []
+    signatures = await _signatures(db, members)
+
+    families = minhash.UnionFind()
+    for bucket in buckets:
+        ready = sorted(pid for pid in bucket if pid in signatures)
+        for a, b in itertools.combinations(ready, 2):
+            if families.find(a) == families.find(b):
+                continue
+            if minhash.estimate(signatures[a][1], signatures[b][1]) >= threshold:
+                families.union(a, b)
+    groups = [
+        sorted(((pid, signatures[pid][0]) for pid in group), key=lambda m: m[1])
+        for group in families.groups()
+        if len(group) >= min_size
+    ]
+    groups.sort(key=lambda g: (-len(g), g[0][1]))
+    return groups
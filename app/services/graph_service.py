@@ -0,0 +1,126 @@
+"""Loads the section/library dependency graph from its adjacency tables.
+
+The ingest worker writes ``post_sections``, ``section_calls`` and
+``file_libraries`` rows and bumps ``SECTION_GRAPH_VERSION_KEY`` in Redis.
+``get_section_graph`` keeps one ``SectionGraph`` per API process and only
+reloads it when that version moves, so impact queries never touch the
+database on the hot path. Reloads read from the primary: the version is
+bumped after the worker commits there, and a lagging replica would
+otherwise hand back old rows to be cached under the new version.
+
+Only ``ready`` packages are loaded. Each shared library is loaded from its
+most recently ingested copy.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import SECTION_GRAPH_VERSION_KEY
+from app.core.section_graph import SectionGraph
+from app.db.database import async_session
+from app.db.models import FileLibrary, PostFile, PostPackage, PostSection, SectionCall
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_graph: SectionGraph | None = None
+_version: bytes | None = None
+_lock = asyncio.Lock()
+
+
+async def _rows_by_file(db: AsyncSession, columns: tuple, lib_file_ids: list) -> dict:
+    """Group rows by file for ready .SRC files and the chosen .LIB copies."""
+    file_id = columns[0]
+    query = (
+        select(*columns)
+        .join(PostFile, PostFile.id == file_id)
+        .join(PostPackage, PostPackage.id == PostFile.package_id)
+        .where(PostPackage.status == "ready")
+        .where(or_(PostFile.file_extension == ".SRC", file_id.in_(lib_file_ids)))
+    )
+    grouped: dict = defaultdict(list)
+    for row_file_id, *values in (await db.execute(query)).all():
+        grouped[row_file_id].append(values[0] if len(values) == 1 else tuple(values))
+    return grouped
+
+
+async def load_section_graph(db: AsyncSession) -> SectionGraph:
+    """Read the adjacency tables and build a finalized ``SectionGraph``."""
+    files = (
+        await db.execute(
+            select(
+                PostFile.id,
+                PostFile.package_id,
+                PostFile.filename,
+                PostFile.file_extension,
+                PostPackage.name,
+            )
+            .join(PostPackage, PostPackage.id == PostFile.package_id)
+            .where(PostPackage.status == "ready")
+            .where(PostFile.file_extension.in_((".SRC", ".LIB")))
+            .order_by(PostFile.created_at.desc())
+        )
+    ).all()
+
+    sources = [f for f in files if f.file_extension == ".SRC"]
+    libraries: dict = {}
+    for f in files:
+        if f.file_extension == ".LIB":
+            libraries.setdefault(f.filename.upper(), f)  # newest copy wins
+    lib_ids = [f.id for f in libraries.values()]
+
+    sections = await _rows_by_file(db, (PostSection.file_id, PostSection.name), lib_ids)
+    calls = await _rows_by_file(
+        db, (SectionCall.file_id, SectionCall.caller, SectionCall.callee), lib_ids
+    )
+    includes = await _rows_by_file(
+        db, (FileLibrary.file_id, FileLibrary.library, FileLibrary.position), lib_ids
+    )
+    includes = {
+        file_id: [lib for lib, _ in sorted(rows, key=lambda row: row[1])]
+        for file_id, rows in includes.items()
+    }
+
+    graph = SectionGraph()
+    for name, f in libraries.items():
+        graph.add_library(name, sections[f.id], calls[f.id], includes.get(f.id, ()))
+    for f in sorted(sources, key=lambda f: f.filename):
+        graph.add_source(
+            str(f.package_id),
+            f.name,
+            f.filename,
+            sections[f.id],
+            calls[f.id],
+            includes.get(f.id, ()),
+        )
+    return graph.finalize()
+
+
+async def get_section_graph() -> SectionGraph:
+    """Return the cached graph, reloading it if the worker has written new rows."""
+    global _graph, _version
+    try:
+        version = await get_redis().get(SECTION_GRAPH_VERSION_KEY)
+    except Exception as exc:
+        logger.warning("Section graph version check failed: %s", exc)
+        version = _version
+    if _graph is not None and version == _version:
+        return _graph
+    async with _lock:
+        if _graph is None or version != _version:
+            start = time.perf_counter()
+            async with async_session() as db:
+                _graph = await load_section_graph(db)
+            _version = version
+            logger.info(
+                "Section graph loaded: %d packages, %d libraries in %.0f ms",
+                _graph.package_count,
+                _graph.library_count,
+                (time.perf_counter() - start) * 1000,
+            )
+    return _graph
@@ -0,0 +1,124 @@
+"""Dependency readiness probes for ``/health/ready``.
+
+All checks run concurrently, each under its own timeout, and the combined
+result is cached for ``health_cache_ttl_seconds``. Concurrent callers that
+arrive while a probe is running await that same run (single flight), so
+orchestrator probing -- however aggressive -- costs the backends at most
+one round of checks per TTL window.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import text
+
+from app.config import Settings, get_settings
+from app.core.constants import WORKER_HEARTBEAT_KEY
+from app.db.database import REPLICA, get_engine, pool_status
+from app.services.redis_client import get_redis
+from app.services.storage import storage
+
+Check = Callable[[], Awaitable[str | None]]
+
+
+@dataclass(slots=True)
+class CheckResult:
+    ok: bool
+    latency_ms: float
+    detail: str | None = None
+
+
+async def check_database() -> str | None:
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    status = pool_status()
+    if REPLICA in status:
+        async with get_engine(REPLICA).connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    return ", ".join(
+        f"{pool} {s['checked_out']}/{s['capacity']} in use" for pool, s in status.items()
+    )
+
+
+async def check_redis() -> str | None:
+    await get_redis().ping()
+    return None
+
+
+async def check_storage() -> str | None:
+    await storage.check_bucket()
+    return None
+
+
+async def check_worker() -> str | None:
+    settings = get_settings()
+    cutoff = time.time() - settings.worker_heartbeat_ttl_seconds
+    alive = await get_redis().zcount(WORKER_HEARTBEAT_KEY, cutoff, "+inf")
+    if not alive:
+        raise RuntimeError(
+            f"no Celery worker heartbeat in the last {settings.worker_heartbeat_ttl_seconds:.0f}s"
+        )
+    return f"{alive} worker(s) alive"
+
+
+DEFAULT_CHECKS: dict[str, Check] = {
+    "database": check_database,
+    "redis": check_redis,
+    "storage": check_storage,
+    "worker": check_worker,
+}
+
+
+class ReadinessProbe:
+    """Concurrent, timeout-bounded, TTL-cached dependency checks."""
+
+    def __init__(self, checks: dict[str, Check], timeout: float, ttl: float) -> None:
+        self.checks = checks
+        self.timeout = timeout
+        self.ttl = ttl
+        self._cached: dict | None = None
+        self._expires = 0.0
+        self._inflight: asyncio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ReadinessProbe":
+        return cls(
+            DEFAULT_CHECKS,
+            timeout=settings.health_check_timeout_seconds,
+            ttl=settings.health_cache_ttl_seconds,
+        )
+
+    async def _run_one(self, check: Check) -> CheckResult:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(check(), self.timeout)
+            ok = True
+        except TimeoutError:
+            ok, detail = False, f"timed out after {self.timeout:.1f}s"
+        except Exception as exc:
+            ok, detail = False, f"{type(exc).__name__}: {exc}"
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        return CheckResult(ok=ok, latency_ms=latency_ms, detail=detail)
+
+    async def _run_all(self) -> dict:
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_one(self.checks[n]) for n in names))
+        report = {
+            "status": "ready" if all(r.ok for r in results) else "not_ready",
+            "checked_at": time.time(),
+            "checks": {name: asdict(result) for name, result in zip(names, results)},
+        }
+        self._cached = report
+        self._expires = time.monotonic() + self.ttl
+        return report
+
+    async def check(self) -> tuple[dict, bool]:
+        """Return ``(report, cached)``."""
+        if self._cached is not None and time.monotonic() < self._expires:
+            return self._cached, True
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._run_all())
+        # shield: a disconnecting prober must not cancel the shared run
+        return await asyncio.shield(self._inflight), False
@@ -0,0 +1,134 @@
+"""Map a customer requirement onto the sections of a package that implement it.
+
+``locate`` ranks the package's sections locally with a
+``locator.LocatorIndex`` and sends only the top ``k`` bodies to the
+copilot, which confirms or rejects each. Without an API key, or when the
+call fails, the local ranking is returned unconfirmed.
+
+The index covers the .SRC and the package's libraries in precedence
+order. It is built in the parse pool and cached per process, keyed by the
+content hashes of those files. Repeated requirements against the same
+package therefore cost one ranking pass and one small prompt each.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core import locator, metrics
+from app.core.ai.copilot import Copilot, CopilotUnavailableError, estimate_tokens
+from app.core.locator import Candidate, LocatorIndex
+from app.core.lru import LRUCache
+from app.core.parsing.executor import ParseExecutor
+from app.db.models import FileLibrary, PostFile, PostPackage
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+INDEXED_EXTENSIONS = (".SRC", ".LIB")
+
+
+@lru_cache
+def get_locator_index_cache() -> LRUCache[LocatorIndex]:
+    """Per-process LRU of ``LocatorIndex`` by the hash of its files' content hashes."""
+    return LRUCache("locator_indexes", get_settings().locator_index_cache_size)
+
+
+@dataclass(slots=True)
+class Location:
+    candidates: list[Candidate]
+    verdicts: dict[str, tuple[bool, str]] = field(default_factory=dict)
+    model_confirmed: bool = False
+    model_error: str | None = None
+    prompt_tokens: int = 0
+    whole_post_tokens: int = 0
+    elapsed_ms: float = 0.0
+
+
+async def namespace_files(db: AsyncSession, package: PostPackage) -> list[PostFile]:
+    """The package's .SRC files, then its libraries in ``:LIBRARY=`` precedence order."""
+    libraries = (
+        await db.execute(
+            select(FileLibrary.library)
+            .where(FileLibrary.package_id == package.id)
+            .order_by(FileLibrary.position)
+        )
+    ).scalars().all()
+    order: dict[str, int] = {}
+    for position, lib in enumerate(libraries):
+        order.setdefault(lib.upper(), position)
+    files = [f for f in package.files if f.file_extension in INDEXED_EXTENSIONS]
+    return sorted(
+        files,
+        key=lambda f: (
+            f.file_extension != ".SRC",
+            order.get(f.filename.upper(), len(order)),
+            f.filename,
+        ),
+    )
+
+
+async def index_of(files: list[PostFile], executor: ParseExecutor) -> LocatorIndex:
+    """The package's index, downloading and parsing its files only on a cache miss."""
+    key = None
+    if all(f.content_hash for f in files):
+        key = hashlib.blake2b(
+            "\n".join(f.content_hash for f in files).encode(), digest_size=16
+        ).hexdigest()
+    cache = get_locator_index_cache()
+    index = cache.get(key) if key else None
+    if index is None:
+        bodies = await asyncio.gather(
+            *(storage.download_file(f.minio_key, f.content_hash) for f in files)
+        )
+        sources = [
+            (f.filename, data.decode("utf-8", errors="replace"))
+            for f, data in zip(files, bodies)
+        ]
+        index = await executor.submit(LocatorIndex.build, sources)
+        if key:
+            cache.put(key, index)
+    return index
+
+
+async def locate(
+    db: AsyncSession,
+    package: PostPackage,
+    requirement: str,
+    executor: ParseExecutor,
+    copilot: Copilot | None,
+    k: int = 5,
+) -> Location | None:
+    """Rank, then confirm with ``copilot`` unless it is None; None without a .SRC."""
+    started = time.perf_counter()
+    files = await namespace_files(db, package)
+    if not any(f.file_extension == ".SRC" for f in files):
+        return None
+    index = await index_of(files, executor)
+    with metrics.timed("locator_rank_duration_seconds"):
+        candidates = index.rank(requirement, k)
+    location = Location(candidates=candidates, whole_post_tokens=index.chars // 4)
+
+    if copilot is not None and candidates:
+        location.prompt_tokens = estimate_tokens(
+            locator.confirm_prompt(requirement, candidates), locator.CONFIRM_QUESTION
+        )
+        try:
+            location.verdicts = await locator.confirm(
+                copilot, requirement, candidates, package.platform
+            )
+            location.model_confirmed = True
+        except CopilotUnavailableError as exc:
+            location.model_error = str(exc)
+        except Exception as exc:
+            logger.warning("Locator confirmation failed for package %s: %s", package.id, exc)
+            location.model_error = f"Copilot error: {exc}"
+    location.elapsed_ms = (time.perf_counter() - started) * 1000
+    return location
@@ -0,0 +1,210 @@
+"""Local, content-addressed disk cache of MinIO object bodies.
+
+Objects are stored as ``<dir>/<sha[:2]>/<sha>``. The key is the SHA-256
+already recorded as ``PostFile.content_hash``, so the copies of
+``MILL_HRS.LIB`` in every package share one entry. The API
+(``StorageService.download_file``) and the Celery worker
+(``app.workers.spool.spooled``) both check the cache before going to MinIO,
+and uploads write through to it. Point ``object_cache_dir`` at a volume
+shared by the API and the worker.
+
+Concurrency across processes:
+
+- Writes go to a temp file in the target directory and are checked against
+  the digest. They are published with ``os.replace``, so readers never see
+  a partial entry, and two processes writing the same digest is harmless.
+- A hit bumps the entry's mtime, which is the LRU clock.
+- Eviction runs under a non-blocking ``flock`` on ``.lock``. One process
+  trims the least recently used entries to a low-water mark while the
+  others carry on. An entry removed between lookup and open is a miss; a
+  file that is already open or mapped stays readable after the unlink.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import get_settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+TEMP_SUFFIX = ".tmp"
+# Evict down to this fraction of max_bytes so a full cache is not rescanned on every write.
+LOW_WATER = 0.9
+# Leftover temp files older than this belong to a crashed writer.
+STALE_TEMP_SECONDS = 3600
+
+
+def _sha256_file(fh: BinaryIO) -> str:
+    fh.seek(0)
+    digest = hashlib.sha256()
+    while chunk := fh.read(1 << 20):
+        digest.update(chunk)
+    fh.seek(0)
+    return digest.hexdigest()
+
+
+class ObjectCache:
+    """Size-bounded LRU of object bodies keyed by SHA-256 (see module docstring)."""
+
+    def __init__(self, directory: str | Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        if max_bytes > 0:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            except OSError as exc:
+                logger.warning("Object cache disabled, %s is not writable: %s", directory, exc)
+                self.max_bytes = 0
+        # Bytes this process has added since it last ran eviction; starts "full"
+        # so the first write checks the cache size.
+        self._written = self._evict_every
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def _evict_every(self) -> int:
+        return max(self.max_bytes // 16, 1)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest
+
+    # -- reads ----------------------------------------------------------------
+
+    def open(self, digest: str) -> BinaryIO | None:
+        """Open the cached body for ``digest`` (caller closes), or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(digest)
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            metrics.inc("cache_requests_total", cache="objects", result="miss")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted after we opened it; the open handle is still valid
+        metrics.inc("cache_requests_total", cache="objects", result="hit")
+        return fh
+
+    def get(self, digest: str) -> bytes | None:
+        fh = self.open(digest)
+        if fh is None:
+            return None
+        with fh:
+            return fh.read()
+
+    # -- writes ---------------------------------------------------------------
+
+    def fetch(self, digest: str, write: Callable[[BinaryIO], object]) -> BinaryIO:
+        """Fill the entry for ``digest`` by calling ``write(fh)`` and return it open.
+
+        ``write`` streams the object into ``fh`` (e.g. boto3
+        ``download_fileobj``). The result is published only if its SHA-256
+        matches ``digest``; otherwise the caller still gets the data, but
+        nothing is cached. Only call this on an enabled cache.
+        """
+        target = self._path(digest)
+        target.parent.mkdir(exist_ok=True)
+        fh = tempfile.NamedTemporaryFile(dir=target.parent, suffix=TEMP_SUFFIX, delete=False)
+        try:
+            write(fh)
+            fh.flush()
+            size = fh.tell()
+            published = _sha256_file(fh) == digest
+            if published:
+                # The open handle follows the inode, so a concurrent eviction
+                # of the published entry cannot pull the data from under us.
+                os.replace(fh.name, target)
+            else:
+                os.unlink(fh.name)
+        except BaseException:
+            fh.close()
+            try:
+                os.unlink(fh.name)
+            except FileNotFoundError:
+                pass
+            raise
+        if published:
+            self._account(size)
+        else:
+            logger.warning("Object cache: content of %s does not match its hash", digest)
+        return fh
+
+    def put(self, digest: str, data: bytes) -> None:
+        """Store ``data`` under ``digest`` (no-op when disabled or already cached)."""
+        if not self.enabled or self._path(digest).exists():
+            return
+        self.fetch(digest, lambda fh: fh.write(data)).close()
+
+    # -- eviction -------------------------------------------------------------
+
+    def _account(self, size: int) -> None:
+        self._written += size
+        if self._written >= self._evict_every:
+            self._written = 0
+            try:
+                self.evict()
+            except OSError as exc:
+                logger.warning("Object cache eviction failed: %s", exc)
+
+    def evict(self) -> int:
+        """Trim least recently used entries to the low-water mark; returns files removed.
+
+        Skipped (returns 0) if another process is already evicting.
+        """
+        with open(self.directory / ".lock", "a+b") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            entries: list[tuple[float, int, str]] = []
+            total = 0
+            stale = time.time() - STALE_TEMP_SECONDS
+            for bucket in os.scandir(self.directory):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    try:
+                        stat = entry.stat()
+                        if entry.name.endswith(TEMP_SUFFIX):
+                            if stat.st_mtime < stale:
+                                os.unlink(entry.path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            target = self.max_bytes * LOW_WATER
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            logger.info("Object cache: evicted %d entries, %d bytes remain", removed, total)
+            return removed
+
+
+@lru_cache
+def get_object_cache() -> ObjectCache:
+    settings = get_settings()
+    return ObjectCache(settings.object_cache_dir, settings.object_cache_max_bytes)
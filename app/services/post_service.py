@@ -4,29 +4,110 @@ All data flows through PostgreSQL (via SQLAlchemy async) and MinIO
 (via StorageService). The in-memory _store is eliminated.
 """
 
+import asyncio
 import hashlib
 import io
 import uuid
 import zipfile
+from collections.abc import AsyncIterator
 from pathlib import Path
+from typing import Any
 
-from sqlalchemy import select
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.constants import VALID_UPG_EXTENSIONS
-from app.db.models import PostFile, PostPackage
+from app.db.database import read_session
+from app.db.models import IngestJob, PostFile, PostPackage, PostSection
+from app.services.atr_registry import AtrIndex, AttributeOverrides, diff, get_atr_registry
+from app.services.result_cache import get_result_cache
 from app.services.storage import storage
 
-
-async def list_packages(db: AsyncSession) -> list[PostPackage]:
-    """List all packages, newest first, with files eagerly loaded."""
-    result = await db.execute(
-        select(PostPackage)
-        .options(selectinload(PostPackage.files))
-        .order_by(PostPackage.created_at.desc())
+PACKAGE_COLUMNS = (
+    PostPackage.id,
+    PostPackage.name,
+    PostPackage.machine_type,
+    PostPackage.controller_type,
+    PostPackage.platform,
+    PostPackage.status,
+    PostPackage.error_message,
+    PostPackage.file_count,
+    PostPackage.section_count,
+    PostPackage.created_at,
+    PostPackage.updated_at,
+)
+FILE_COLUMNS = (PostFile.id, PostFile.filename, PostFile.file_extension, PostFile.size_bytes)
+SECTION_COLUMNS = (
+    PostFile.filename.label("file"),
+    PostSection.name,
+    PostSection.kind,
+    PostSection.start_line,
+    PostSection.end_line,
+    PostSection.template_lines,
+    PostSection.body_hash,
+)
+SECTION_STREAM_BATCH = 1000
+
+
+def to_json(content: Any) -> bytes:
+    """orjson, writing UTC datetimes with ``Z`` as pydantic does."""
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+async def list_package_rows(db: AsyncSession) -> list[dict]:
+    """All packages, newest first, as ``PackageResponse``-shaped dicts.
+
+    Selects only the response columns and builds plain dicts, with no ORM
+    objects and no pydantic models, for ``to_json`` to serialize directly.
+    """
+    packages = [
+        {**row, "files": []}
+        for row in (
+            await db.execute(select(*PACKAGE_COLUMNS).order_by(PostPackage.created_at.desc()))
+        ).mappings()
+    ]
+    by_id = {p["id"]: p["files"] for p in packages}
+    files = await db.execute(
+        select(PostFile.package_id, *FILE_COLUMNS).order_by(PostFile.filename)
     )
-    return list(result.scalars().all())
+    for row in files.mappings():
+        file = dict(row)
+        package_files = by_id.get(file.pop("package_id"))
+        if package_files is not None:
+            package_files.append(file)
+    return packages
+
+
+async def stream_section_rows(
+    package_id: uuid.UUID, name: str | None = None, kind: str | None = None
+) -> AsyncIterator[dict]:
+    """Yield the package's sections in file and line order, straight from the cursor.
+
+    ``name`` matches section names case-insensitively as a substring. Rows
+    are fetched ``SECTION_STREAM_BATCH`` at a time through a server-side
+    cursor, so memory use does not grow with the package. Opens its own
+    session: a streamed response outlives the request's.
+    """
+    stmt = (
+        select(*SECTION_COLUMNS)
+        .select_from(PostSection)
+        .join(PostFile, PostFile.id == PostSection.file_id)
+        .where(PostSection.package_id == package_id)
+        .order_by(PostFile.filename, PostSection.start_line)
+        .execution_options(yield_per=SECTION_STREAM_BATCH)
+    )
+    if name:
+        stmt = stmt.where(PostSection.name.icontains(name, autoescape=True))
+    if kind:
+        stmt = stmt.where(PostSection.kind == kind)
+    async with read_session() as db:
+        result = await db.stream(stmt)
+        async for row in result.mappings():
+            yield dict(row)
 
 
 async def get_package(db: AsyncSession, package_id: uuid.UUID) -> PostPackage | None:
@@ -39,6 +120,82 @@ async def get_package(db: AsyncSession, package_id: uuid.UUID) -> PostPackage |
     return result.scalar_one_or_none()
 
 
+async def cached_response(package_id: uuid.UUID, kind: str) -> tuple[bytes | None, str | None]:
+    """A cached response body, else ``(None, generation)`` to pass to ``cache_response``."""
+    cache = get_result_cache()
+    payload = await cache.get(package_id, kind)
+    if payload is not None:
+        return payload, None
+    return None, await cache.generation(package_id)
+
+
+async def cache_response(
+    package: PostPackage, kind: str, response: BaseModel, generation: str | None
+) -> bytes:
+    """Serialize ``response`` with orjson, caching it if the package is ready."""
+    payload = to_json(response.model_dump(mode="json"))
+    if package.status == "ready":
+        await get_result_cache().put(package.id, kind, payload, generation)
+    return payload
+
+
+async def invalidate_cached_responses(package_id: uuid.UUID) -> None:
+    """Drop the package's cached responses after the API changes its status."""
+    await get_result_cache().invalidate(package_id)
+
+
+async def latest_ingest_job(db: AsyncSession, package_id: uuid.UUID) -> IngestJob | None:
+    """The package's most recent ingest job with its steps eagerly loaded."""
+    result = await db.execute(
+        select(IngestJob)
+        .where(IngestJob.package_id == package_id)
+        .options(selectinload(IngestJob.steps))
+        .order_by(IngestJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def find_file_by_hash(db: AsyncSession, content_hash: str) -> PostFile | None:
+    """Any stored file with the given SHA-256 (contents are interchangeable)."""
+    result = await db.execute(
+        select(PostFile).where(PostFile.content_hash == content_hash).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def load_atr_index(file: PostFile) -> AtrIndex:
+    """Index an ATR file, downloading and parsing it only the first time its hash is seen."""
+    registry = get_atr_registry()
+    index = registry.get(file.content_hash) if file.content_hash else None
+    if index is None:
+        data = await storage.download_file(file.minio_key, file.content_hash)
+        index = await asyncio.to_thread(registry.load, data, file.content_hash)
+    return index
+
+
+async def get_attribute_overrides(
+    db: AsyncSession, package: PostPackage
+) -> tuple[AtrIndex, AtrIndex, AttributeOverrides] | None:
+    """Diff the package's ATR against the master registry.
+
+    Returns None when the package has no ATR or the master (``atr_master_hash``)
+    is unset or not present in any stored package.
+    """
+    atr_file = next((f for f in package.files if f.file_extension == ".ATR"), None)
+    registry = get_atr_registry()
+    if atr_file is None or not registry.master_hash:
+        return None
+    master = registry.master()
+    if master is None:
+        master_file = await find_file_by_hash(db, registry.master_hash)
+        if master_file is None:
+            return None
+        master = await load_atr_index(master_file)
+    index = await load_atr_index(atr_file)
+    return index, master, diff(index, master)
+
+
 async def create_package(
     db: AsyncSession, name: str, platform: str = "camworks"
 ) -> PostPackage:
@@ -65,7 +222,7 @@ async def add_file_to_package(
     minio_key = f"{package.minio_prefix}{filename}"
     content_hash = hashlib.sha256(data).hexdigest()
 
-    await storage.upload_file(minio_key, data)
+    await storage.upload_file(minio_key, data, content_hash=content_hash)
 
     file_record = PostFile(
         package_id=package.id,
@@ -164,6 +321,60 @@ def extract_zip_files(content: bytes) -> list[tuple[str, bytes]]:
     return result
 
 
+def package_name(files: list[tuple[str, bytes]], fallback: str) -> str:
+    """Name a package after its first .SRC file (without the extension)."""
+    src_names = [fn for fn, _ in files if fn.upper().endswith(".SRC")]
+    return src_names[0].rsplit(".", 1)[0] if src_names else fallback
+
+
+def file_row(package_id: uuid.UUID, minio_prefix: str, filename: str, data: bytes) -> dict:
+    """Column values of the ``PostFile`` for one extracted file."""
+    ext = "." + filename.rsplit(".", 1)[-1] if "." in filename else ""
+    return {
+        "package_id": package_id,
+        "filename": filename,
+        "file_extension": ext.upper(),
+        "minio_key": f"{minio_prefix}{filename}",
+        "size_bytes": len(data),
+        "content_hash": hashlib.sha256(data).hexdigest(),
+    }
+
+
+async def bulk_create_packages(
+    db: AsyncSession, packages: list[dict], files: list[dict]
+) -> tuple[set[uuid.UUID], set[uuid.UUID]]:
+    """Insert many ``PostPackage`` rows and their ``PostFile`` rows in one transaction.
+
+    Packages whose id already exists are skipped along with their files, so
+    re-running a batch is harmless. Returns the ids actually inserted, and
+    the ids that already existed but are still ``pending`` (committed by an
+    earlier run that died before enqueueing them).
+    """
+    if not packages:
+        return set(), set()
+    result = await db.execute(
+        pg_insert(PostPackage)
+        .values(packages)
+        .on_conflict_do_nothing(index_elements=[PostPackage.id])
+        .returning(PostPackage.id)
+    )
+    inserted = set(result.scalars().all())
+    existing = [p["id"] for p in packages if p["id"] not in inserted]
+    pending: set[uuid.UUID] = set()
+    if existing:
+        result = await db.execute(
+            select(PostPackage.id).where(
+                PostPackage.id.in_(existing), PostPackage.status == "pending"
+            )
+        )
+        pending = set(result.scalars().all())
+    new_files = [f for f in files if f["package_id"] in inserted]
+    if new_files:
+        await db.execute(insert(PostFile), new_files)
+    await db.commit()
+    return inserted, pending
+
+
 async def create_package_with_files(
     db: AsyncSession,
     package_id: uuid.UUID,
@@ -188,22 +399,12 @@ async def create_package_with_files(
     db.add(package)
 
     for filename, data in files:
-        ext = "." + filename.rsplit(".", 1)[-1] if "." in filename else ""
-        minio_key = f"{minio_prefix}{filename}"
-        content_hash = hashlib.sha256(data).hexdigest()
+        row = file_row(package_id, minio_prefix, filename, data)
 
         # Upload to MinIO
-        await storage.upload_file(minio_key, data)
-
-        file_record = PostFile(
-            package_id=package_id,
-            filename=filename,
-            file_extension=ext.upper(),
-            minio_key=minio_key,
-            size_bytes=len(data),
-            content_hash=content_hash,
-        )
-        db.add(file_record)
+        await storage.upload_file(row["minio_key"], data, content_hash=row["content_hash"])
+
+        db.add(PostFile(**row))
 
     await db.commit()
     await db.refresh(package)
@@ -0,0 +1,29 @@
+"""Shared async Redis client for the API process.
+
+Created lazily on first use (the ``redis`` package is only imported then)
+and closed in the app lifespan. Used by health checks and anything else
+in the API that talks to the broker/cache Redis.
+"""
+
+from typing import Any
+
+from app.config import get_settings
+
+_client: Any = None
+
+
+def get_redis() -> Any:
+    """Return the process-wide ``redis.asyncio.Redis`` client."""
+    global _client
+    if _client is None:
+        import redis.asyncio as aioredis
+
+        _client = aioredis.from_url(get_settings().redis_url)
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
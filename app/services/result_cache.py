@@ -0,0 +1,184 @@
+"""Cache of serialized responses for package-scoped GET endpoints.
+
+A package no longer changes once it is ``ready``, so responses derived
+from it are cached as response-ready orjson bytes. A hit is served without
+SQLAlchemy or pydantic. There are two tiers:
+
+- in process: an LRU of ``result_cache_local_entries`` payloads, each kept
+  for ``result_cache_local_ttl_seconds``
+- Redis, shared by every API replica: one hash per package
+  (``veripost:cache:package:{id}``, a field per response kind) that expires
+  after ``result_cache_ttl_seconds``
+
+Only ready packages are cached. Whenever the ingest worker changes a
+package's status it calls ``invalidate_package_sync``, which bumps the
+package's generation and deletes its hash. API routes that change a
+status (``resume_ingest``) call ``ResultCache.invalidate``, which does the
+same and also drops the replica's own in-process copies. A fill writes only if the
+generation it read before querying the database is still current, so a
+slow request cannot write back a payload that predates the invalidation.
+Other replicas' in-process copies last at most their short TTL.
+
+Redis errors and timeouts count as misses; the caller falls back to the
+database.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from app.config import Settings, get_settings
+from app.core import metrics
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veripost:cache:package"
+
+# KEYS: generation key, payload hash. ARGV: expected generation, field, payload, ttl.
+FILL_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+  return 0
+end
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+
+def payload_key(package_id: uuid.UUID | str) -> str:
+    return f"{KEY_PREFIX}:{package_id}"
+
+
+def generation_key(package_id: uuid.UUID | str) -> str:
+    return f"{KEY_PREFIX}:{package_id}:generation"
+
+
+def invalidate_package_sync(client: Any, package_id: uuid.UUID | str) -> None:
+    """Drop a package's cached responses through a sync ``redis.Redis`` (worker side)."""
+    pipe = client.pipeline()
+    pipe.incr(generation_key(package_id))
+    pipe.delete(payload_key(package_id))
+    pipe.execute()
+
+
+class ResultCache:
+    """Two-tier (in-process, Redis) cache of serialized package responses."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        local_ttl: float = 10.0,
+        ttl: int = 3600,
+        timeout: float = 0.05,
+        enabled: bool = True,
+        redis: Any = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.timeout = timeout
+        self.enabled = enabled
+        self._redis = redis
+        self._fill: Any = None
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResultCache":
+        return cls(
+            max_entries=settings.result_cache_local_entries,
+            local_ttl=settings.result_cache_local_ttl_seconds,
+            ttl=settings.result_cache_ttl_seconds,
+            timeout=settings.result_cache_redis_timeout_ms / 1000,
+            enabled=settings.result_cache_enabled,
+        )
+
+    def _client(self) -> Any:
+        if self._fill is None:
+            self._redis = self._redis or get_redis()
+            self._fill = self._redis.register_script(FILL_SCRIPT)
+        return self._redis
+
+    def _remember(self, key: tuple[str, str], payload: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.local_ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, package_id: uuid.UUID, kind: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        key = (str(package_id), kind)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                metrics.record_cache("results_local", hit=True)
+                return entry[1]
+            del self._entries[key]
+        metrics.record_cache("results_local", hit=False)
+        try:
+            async with asyncio.timeout(self.timeout):
+                payload = await self._client().hget(payload_key(package_id), kind)
+        except Exception as exc:
+            logger.warning("Result cache read failed for %s: %r", package_id, exc)
+            payload = None
+        metrics.record_cache("results", hit=payload is not None)
+        if payload is not None:
+            self._remember(key, payload)
+        return payload
+
+    async def generation(self, package_id: uuid.UUID) -> str | None:
+        """The package's current generation; None (do not fill) if Redis is unavailable."""
+        if not self.enabled:
+            return None
+        try:
+            async with asyncio.timeout(self.timeout):
+                value = await self._client().get(generation_key(package_id))
+        except Exception as exc:
+            logger.warning("Result cache generation read failed for %s: %r", package_id, exc)
+            return None
+        return value.decode() if value is not None else "0"
+
+    async def put(
+        self, package_id: uuid.UUID, kind: str, payload: bytes, generation: str | None
+    ) -> None:
+        """Cache ``payload`` unless the package was invalidated since ``generation``."""
+        if generation is None:
+            return
+        try:
+            self._client()
+            async with asyncio.timeout(self.timeout):
+                stored = await self._fill(
+                    keys=[generation_key(package_id), payload_key(package_id)],
+                    args=[generation, kind, payload, self.ttl],
+                )
+        except Exception as exc:
+            logger.warning("Result cache write failed for %s: %r", package_id, exc)
+            return
+        if stored:
+            self._remember((str(package_id), kind), payload)
+
+    async def invalidate(self, package_id: uuid.UUID) -> None:
+        """Drop a package's cached responses here and in Redis (API side)."""
+        for key in [k for k in self._entries if k[0] == str(package_id)]:
+            del self._entries[key]
+        if not self.enabled:
+            return
+        try:
+            async with asyncio.timeout(self.timeout):
+                pipe = self._client().pipeline()
+                pipe.incr(generation_key(package_id))
+                pipe.delete(payload_key(package_id))
+                await pipe.execute()
+        except Exception as exc:
+            logger.warning("Result cache invalidation failed for %s: %r", package_id, exc)
+
+
+@lru_cache
+def get_result_cache() -> ResultCache:
+    return ResultCache.from_settings(get_settings())
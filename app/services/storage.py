@@ -3,20 +3,37 @@
 Provides async file upload, download, listing, and deletion
 using aiobotocore. All files are stored in the configured bucket
 under package-specific prefixes (packages/{id}/).
+
+aiobotocore (and botocore underneath it) is imported on first use rather
+than at module import, keeping API cold start fast.
+
+Callers that know an object's SHA-256 (``PostFile.content_hash``) pass it
+as ``content_hash``. Downloads are then served from the local
+``ObjectCache`` when possible, and uploads write through to it.
 """
 
-import aiobotocore.session
+import asyncio
+from typing import Any
 
 from app.config import get_settings
+from app.core import metrics
+from app.services.object_cache import get_object_cache
 
 
 class StorageService:
     """Async MinIO client for file operations."""
 
     def __init__(self) -> None:
-        self._session = aiobotocore.session.get_session()
+        self._session: Any = None
         self._settings = get_settings()
 
+    def _get_session(self) -> Any:
+        if self._session is None:
+            import aiobotocore.session
+
+            self._session = aiobotocore.session.get_session()
+        return self._session
+
     def _get_client_kwargs(self) -> dict:
         return {
             "service_name": "s3",
@@ -27,46 +44,75 @@ class StorageService:
 
     async def init_bucket(self) -> None:
         """Create the veripost bucket if it does not exist. Called at app startup."""
-        async with self._session.create_client(**self._get_client_kwargs()) as client:
+        async with self._get_session().create_client(**self._get_client_kwargs()) as client:
             try:
                 await client.head_bucket(Bucket=self._settings.minio_bucket)
             except Exception:
                 await client.create_bucket(Bucket=self._settings.minio_bucket)
 
+    async def check_bucket(self) -> None:
+        """Raise if the bucket is unreachable or missing (readiness probe)."""
+        async with self._get_session().create_client(**self._get_client_kwargs()) as client:
+            await client.head_bucket(Bucket=self._settings.minio_bucket)
+
+    @metrics.timed_call("storage_operation_duration_seconds", operation="upload")
     async def upload_file(
-        self, key: str, data: bytes, content_type: str = "application/octet-stream"
+        self,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        content_hash: str | None = None,
     ) -> None:
         """Upload bytes to MinIO under the given key."""
-        async with self._session.create_client(**self._get_client_kwargs()) as client:
+        async with self._get_session().create_client(**self._get_client_kwargs()) as client:
             await client.put_object(
                 Bucket=self._settings.minio_bucket,
                 Key=key,
                 Body=data,
                 ContentType=content_type,
             )
+        metrics.inc("storage_bytes_total", len(data), operation="upload")
+        cache = get_object_cache()
+        if content_hash and cache.enabled:
+            await asyncio.to_thread(cache.put, content_hash, data)
+
+    async def download_file(self, key: str, content_hash: str | None = None) -> bytes:
+        """Download file bytes by key, from the local object cache when possible."""
+        cache = get_object_cache()
+        if not (content_hash and cache.enabled):
+            return await self._get_object(key)
+        data = await asyncio.to_thread(cache.get, content_hash)
+        if data is None:
+            data = await self._get_object(key)
+            await asyncio.to_thread(cache.put, content_hash, data)
+        return data
 
-    async def download_file(self, key: str) -> bytes:
-        """Download file bytes from MinIO by key."""
-        async with self._session.create_client(**self._get_client_kwargs()) as client:
+    @metrics.timed_call("storage_operation_duration_seconds", operation="download")
+    async def _get_object(self, key: str) -> bytes:
+        async with self._get_session().create_client(**self._get_client_kwargs()) as client:
             resp = await client.get_object(
                 Bucket=self._settings.minio_bucket, Key=key
             )
             async with resp["Body"] as stream:
-                return await stream.read()
+                data = await stream.read()
+        metrics.inc("storage_bytes_total", len(data), operation="download")
+        return data
 
+    @metrics.timed_call("storage_operation_duration_seconds", operation="list")
     async def list_files(self, prefix: str) -> list[str]:
         """List all keys under a prefix (e.g., packages/{id}/)."""
-        async with self._session.create_client(**self._get_client_kwargs()) as client:
+        async with self._get_session().create_client(**self._get_client_kwargs()) as client:
             resp = await client.list_objects_v2(
                 Bucket=self._settings.minio_bucket, Prefix=prefix
             )
             return [obj["Key"] for obj in resp.get("Contents", [])]
 
+    @metrics.timed_call("storage_operation_duration_seconds", operation="delete")
     async def delete_prefix(self, prefix: str) -> None:
         """Delete all objects under a prefix."""
         keys = await self.list_files(prefix)
         if keys:
-            async with self._session.create_client(**self._get_client_kwargs()) as client:
+            async with self._get_session().create_client(**self._get_client_kwargs()) as client:
                 for key in keys:
                     await client.delete_object(
                         Bucket=self._settings.minio_bucket, Key=key
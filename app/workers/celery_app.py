@@ -5,9 +5,20 @@ Variable named ``celery_app`` so Celery auto-discovers it when
 the worker is started with ``-A app.workers.celery_app``.
 """
 
+import logging
 import os
+import socket
+import threading
+import time
 
 from celery import Celery
+from celery.signals import worker_init, worker_shutdown
+
+from app.config import get_settings
+from app.core import metrics
+from app.core.constants import WORKER_HEARTBEAT_KEY
+
+logger = logging.getLogger(__name__)
 
 broker_url = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0")
 result_backend = os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
@@ -28,3 +39,53 @@ celery_app.conf.update(
 
 # Auto-discover tasks in app.workers.tasks
 celery_app.autodiscover_tasks(["app.workers"])
+
+
+@worker_init.connect
+def _start_metrics_server(**_kwargs) -> None:
+    """Serve the worker's Prometheus registry for scraping.
+
+    The worker runs with ``--pool=solo`` (see docker-compose.yml), so tasks
+    execute in this process and share its registry.
+    """
+    settings = get_settings()
+    metrics.configure(settings.metrics_enabled)
+    if settings.metrics_enabled:
+        import prometheus_client
+
+        prometheus_client.start_http_server(settings.metrics_worker_port)
+
+
+_heartbeat_stop = threading.Event()
+
+
+def _heartbeat_loop(hostname: str, interval: float) -> None:
+    import redis
+
+    client = redis.Redis.from_url(get_settings().redis_url)
+    while True:
+        try:
+            client.zadd(WORKER_HEARTBEAT_KEY, {hostname: time.time()})
+        except Exception as exc:
+            logger.warning("Worker heartbeat failed: %s", exc)
+        if _heartbeat_stop.wait(interval):
+            break
+    try:
+        client.zrem(WORKER_HEARTBEAT_KEY, hostname)
+    except Exception:
+        pass
+
+
+@worker_init.connect
+def _start_heartbeat(**_kwargs) -> None:
+    """Publish a liveness heartbeat that the API readiness probe reads."""
+    hostname = f"{socket.gethostname()}:{os.getpid()}"
+    interval = get_settings().worker_heartbeat_interval_seconds
+    threading.Thread(
+        target=_heartbeat_loop, args=(hostname, interval), name="heartbeat", daemon=True
+    ).start()
+
+
+@worker_shutdown.connect
+def _stop_heartbeat(**_kwargs) -> None:
+    _heartbeat_stop.set()
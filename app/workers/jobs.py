@@ -0,0 +1,152 @@
+"""Durable ingest job ledger (sync; used by the Celery worker only).
+
+An ``ingest_jobs`` row is one ingestion run of a package. Its
+``ingest_steps`` rows record each stage that finished, per file for
+per-file stages, along with the stage's duration and output (``detail``).
+
+A stage's database writes and its ``done`` step row commit in the same
+transaction, so a step is either fully applied and recorded, or neither.
+When a run fails and is retried (Celery autoretry) or resumed
+(``POST /packages/{id}/ingest/resume``), ``JobLedger.open`` picks up the
+package's unfinished job. ``run`` then returns the recorded detail of
+completed steps instead of redoing them.
+
+Job status: ``running`` -> ``succeeded`` | ``retrying`` (a transient error,
+another attempt is scheduled) | ``failed``.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import IngestStep
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_STATUSES = ("pending", "running", "retrying", "failed")
+
+
+class JobLedger:
+    """Steps of one ingest job; see the module docstring."""
+
+    def __init__(self, db: Session, job_id: str, done: dict[tuple[str, str], dict]) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.done = done
+        self.skipped = 0
+
+    @classmethod
+    def open(cls, db: Session, package_id: str, task_id: str | None) -> "JobLedger":
+        """Resume the package's latest unfinished job, or start a new one (commits)."""
+        row = db.execute(
+            text(
+                "SELECT id FROM ingest_jobs WHERE package_id = :id AND status = ANY(:statuses) "
+                "ORDER BY created_at DESC LIMIT 1 FOR UPDATE"
+            ),
+            {"id": package_id, "statuses": list(UNFINISHED_STATUSES)},
+        ).first()
+        if row is None:
+            job_id = db.execute(
+                text("INSERT INTO ingest_jobs (package_id) VALUES (:id) RETURNING id"),
+                {"id": package_id},
+            ).scalar_one()
+        else:
+            job_id = row[0]
+        db.execute(
+            text(
+                "UPDATE ingest_jobs SET status = 'running', attempts = attempts + 1, "
+                "task_id = :task_id, error = NULL, started_at = coalesce(started_at, now()) "
+                "WHERE id = :job_id"
+            ),
+            {"job_id": job_id, "task_id": task_id},
+        )
+        done = {
+            (stage, target): detail or {}
+            for stage, target, detail in db.execute(
+                text(
+                    "SELECT stage, target, detail FROM ingest_steps "
+                    "WHERE job_id = :job_id AND status = 'done'"
+                ),
+                {"job_id": job_id},
+            ).all()
+        }
+        db.commit()
+        if done:
+            logger.info("Ingest job %s: resuming with %d completed steps", job_id, len(done))
+        return cls(db, str(job_id), done)
+
+    def _record(
+        self,
+        stage: str,
+        target: str,
+        status: str,
+        started: float,
+        detail: dict | None,
+        error: str | None = None,
+    ) -> None:
+        values = {
+            "job_id": self.job_id,
+            "stage": stage,
+            "target": target,
+            "status": status,
+            "duration_ms": int((time.perf_counter() - started) * 1000),
+            "detail": detail,
+            "error": error,
+        }
+        stmt = pg_insert(IngestStep).values(**values)
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[IngestStep.job_id, IngestStep.stage, IngestStep.target],
+                set_={
+                    **{k: stmt.excluded[k] for k in ("status", "duration_ms", "detail", "error")},
+                    "attempts": IngestStep.attempts + 1,
+                    "finished_at": func.now(),
+                },
+            )
+        )
+
+    def run(self, stage: str, work: Callable[[], dict | None], target: str = "") -> dict:
+        """Run ``work()`` once per job; its recorded result on later attempts.
+
+        ``work`` writes through ``self.db`` without committing and returns a
+        JSON-serializable dict of anything later stages need. On error the
+        transaction is rolled back and the failure recorded.
+        """
+        key = (stage, target)
+        if key in self.done:
+            self.skipped += 1
+            return self.done[key]
+        started = time.perf_counter()
+        try:
+            detail = work() or {}
+            self._record(stage, target, "done", started, detail)
+            self.db.commit()
+        except Exception as exc:
+            self.db.rollback()
+            try:
+                self._record(stage, target, "failed", started, None, str(exc))
+                self.db.commit()
+            except Exception as record_exc:  # the database itself may be what failed
+                self.db.rollback()
+                logger.warning(
+                    "Ingest job %s: could not record failed step: %s", self.job_id, record_exc
+                )
+            raise
+        self.done[key] = detail
+        return detail
+
+
+def finish_job(db: Session, package_id: str, status: str, error: str | None) -> None:
+    """Set the final (or ``retrying``) status of the package's running job; no commit."""
+    db.execute(
+        text(
+            "UPDATE ingest_jobs SET status = :status, error = :error, "
+            "finished_at = CASE WHEN :status = 'retrying' THEN NULL ELSE now() END "
+            "WHERE package_id = :id AND status = 'running'"
+        ),
+        {"id": package_id, "status": status, "error": error},
+    )
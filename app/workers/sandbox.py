@@ -0,0 +1,197 @@
+"""Run the worker's section parse in a child process under resource limits.
+
+A malformed or adversarial file, such as a multi-megabyte line, thousands
+of nested ``:IF`` blocks or a pattern that backtracks, must cost one
+bounded parse and must not stall the worker. ``parse_sandboxed`` forks a
+child that parses the spooled buffer under three limits:
+
+- a wall-clock timeout: the parent waits ``timeout`` seconds for the result,
+  then kills the child. ``RLIMIT_CPU`` backs this up inside the child.
+- an ``RLIMIT_AS`` of ``memory_bytes`` on top of the address space the child
+  inherits, so a runaway allocation fails in the child, not in the worker
+- a maximum line length, checked before tokenizing
+
+The child publishes the line it is on and the last ``:SECTION=`` it entered
+through shared memory. When a limit is hit, ``ParseLimitExceededError`` names
+that location and how much of the file had been parsed. The ingest task
+stores its message as the package's ``error_detail``.
+
+The child is forked rather than spawned, so it shares the parent's ``mmap``
+of the file without copying it. It runs only the parser (no logging, no
+I/O), so locks held by the worker's heartbeat or metrics threads at fork
+time are never touched.
+"""
+
+import math
+import mmap
+import multiprocessing
+import resource
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Connection
+from typing import Any
+
+from app.config import Settings
+from app.core import customization
+from app.core.models.post_processor import ParsedPost
+from app.core.parsing import upg
+
+_FORK = multiprocessing.get_context("fork")
+
+# Shared progress slots written by the child
+LINE, SECTION_LINE, SECTIONS, TOTAL_LINES = range(4)
+EXCERPT_CHARS = 80
+
+
+@dataclass(frozen=True, slots=True)
+class ParseLimits:
+    timeout: float = 60.0
+    memory_bytes: int = 1024 * 1024**2
+    max_line_bytes: int = 64 * 1024
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ParseLimits":
+        return cls(
+            timeout=settings.worker_parse_timeout_seconds,
+            memory_bytes=settings.worker_parse_memory_mb * 1024**2,
+            max_line_bytes=settings.worker_parse_max_line_bytes,
+        )
+
+    def within(self, seconds_left: float | None) -> "ParseLimits":
+        """These limits, with the timeout cut to what is left of the task's budget."""
+        if seconds_left is None or seconds_left >= self.timeout:
+            return self
+        return replace(self, timeout=max(seconds_left, 0.0))
+
+
+class ParseLimitExceededError(Exception):
+    """A file broke a sandbox limit; not retryable, the file itself is the problem."""
+
+    def __init__(
+        self,
+        filename: str,
+        reason: str,
+        line: int,
+        total_lines: int,
+        sections: int,
+        section: str = "",
+        excerpt: str = "",
+    ) -> None:
+        self.filename = filename
+        self.reason = reason
+        self.line = line
+        self.total_lines = total_lines
+        self.sections = sections
+        self.section = section
+        self.excerpt = excerpt
+        where = f"line {line} of {total_lines}" if total_lines else f"line {line}"
+        if section:
+            where += f" in {section}"
+        detail = f"{filename}: {reason} at {where}; {sections} sections parsed before it"
+        if excerpt:
+            detail += f"; line starts {excerpt!r}"
+        super().__init__(detail)
+
+
+def _set_limit(which: int, value: int) -> None:
+    _, hard = resource.getrlimit(which)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(which, (value, hard))
+
+
+def _address_space() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def _tracked(tokens: Iterable[upg.Token], progress: Any) -> Iterator[upg.Token]:
+    for tok in tokens:
+        progress[LINE] = tok.line
+        if tok.kind is upg.Kind.SECTION:
+            progress[SECTION_LINE] = tok.line
+            progress[SECTIONS] += 1
+        yield tok
+
+
+def _child(
+    buffer: bytes | mmap.mmap, limits: ParseLimits, progress: Any, conn: Connection
+) -> None:
+    try:
+        _set_limit(resource.RLIMIT_AS, _address_space() + limits.memory_bytes)
+        _set_limit(resource.RLIMIT_CPU, math.ceil(limits.timeout) + 1)
+        index = upg.LineIndex(buffer)
+        progress[TOTAL_LINES] = len(index)
+        for line, (start, end) in enumerate(zip(index.starts, index.ends), start=1):
+            if end - start > limits.max_line_bytes:
+                progress[LINE] = line
+                reason = f"line of {end - start} bytes exceeds {limits.max_line_bytes}"
+                conn.send(("limit", reason))
+                return
+        tokens = _tracked(upg.tokenize_buffer(buffer, index), progress)
+        parsed = upg.parse_upg("", "", tokens=tokens)
+        hashes = customization.buffer_section_hashes(buffer, index, parsed.sections)
+        conn.send(("ok", (parsed, hashes)))
+    except MemoryError:
+        conn.send(("limit", f"memory use exceeded {limits.memory_bytes // 1024**2} MiB"))
+    except Exception as exc:
+        conn.send(("limit", f"parser failed: {exc!r}"))
+    finally:
+        conn.close()
+
+
+def _line_texts(buffer: bytes | mmap.mmap, *lines: int) -> list[str]:
+    """The start of each 1-based line (empty for 0 or past the end)."""
+    index = upg.LineIndex(buffer)
+    texts = []
+    for line in lines:
+        if not 1 <= line <= len(index):
+            texts.append("")
+            continue
+        start, end = index.span(line)
+        raw = buffer[start : min(end, start + EXCERPT_CHARS * 4)]
+        texts.append(raw.decode("utf-8", errors="replace").strip()[:EXCERPT_CHARS])
+    return texts
+
+
+def parse_sandboxed(
+    buffer: bytes | mmap.mmap, filename: str, limits: ParseLimits
+) -> tuple[ParsedPost, list[str]]:
+    """Parse a UPG buffer in a child; the ``ParsedPost`` and its section body hashes.
+
+    Raises ``ParseLimitExceededError`` when the child times out, runs out of
+    memory, meets an overlong line, fails, or dies.
+    """
+    progress = _FORK.Array("q", 4, lock=False)
+    receiver, sender = _FORK.Pipe(duplex=False)
+    child = _FORK.Process(target=_child, args=(buffer, limits, progress, sender))
+    child.start()
+    sender.close()
+    try:
+        if receiver.poll(limits.timeout):
+            try:
+                status, payload = receiver.recv()
+            except EOFError:
+                status, payload = "died", None
+        else:
+            status, payload = "limit", f"no result within {limits.timeout:g}s"
+    finally:
+        if child.is_alive():
+            child.kill()
+        child.join()
+        receiver.close()
+
+    if status == "ok":
+        return payload
+    if status == "died":
+        payload = f"parser process died (exit code {child.exitcode})"
+    section, excerpt = _line_texts(buffer, progress[SECTION_LINE], progress[LINE])
+    raise ParseLimitExceededError(
+        filename,
+        payload,
+        line=progress[LINE],
+        total_lines=progress[TOTAL_LINES],
+        sections=max(progress[SECTIONS] - 1, 0),
+        section=section,
+        excerpt=excerpt,
+    )
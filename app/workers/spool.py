@@ -0,0 +1,60 @@
+"""Spool MinIO objects to local disk and memory-map them for parsing.
+
+``get_object()["Body"].read()`` materializes a whole object as ``bytes`` on
+the worker heap, and parsing used to decode that into a ``str`` and split
+it into lines as well. ``spooled`` instead yields a read-only ``mmap`` of a
+local file; the mapped pages belong to the OS page cache, not the worker
+process.
+
+When the object's content hash is known, the file is the shared
+``ObjectCache`` entry: a hit needs no MinIO request at all, and a miss is
+streamed (``download_fileobj``) straight into the cache. Otherwise the
+object is streamed into an unlinked scratch file under
+``worker_spool_dir`` that disappears when the block exits.
+
+Pair it with ``upg.parse_upg_buffer`` so the source is never decoded as a
+whole.
+"""
+
+import mmap
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+
+from app.core import metrics
+from app.services.object_cache import get_object_cache
+
+
+def _download(s3, bucket: str, key: str, fh: BinaryIO) -> None:
+    with metrics.timed("storage_operation_duration_seconds", operation="download"):
+        s3.download_fileobj(bucket, key, fh)
+    metrics.inc("storage_bytes_total", fh.tell(), operation="download")
+
+
+@contextmanager
+def spooled(
+    s3, bucket: str, key: str, directory: str = "", digest: str | None = None
+) -> Iterator[bytes | mmap.mmap]:
+    """Yield the object at ``key`` memory-mapped, from the object cache if possible."""
+    cache = get_object_cache()
+    if digest and cache.enabled:
+        fh = cache.open(digest) or cache.fetch(
+            digest, lambda out: _download(s3, bucket, key, out)
+        )
+    else:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fh = tempfile.TemporaryFile(dir=directory or None)
+        try:
+            _download(s3, bucket, key, fh)
+        except BaseException:
+            fh.close()
+            raise
+    with fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b""  # an empty file cannot be mapped
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
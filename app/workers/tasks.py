@@ -9,15 +9,42 @@ Do NOT use async/await in this module.
 
 import logging
 import os
+import time
+from contextlib import contextmanager
 
-import boto3
-from sqlalchemy import create_engine, text
+from botocore.exceptions import ConnectionError as StorageConnectionError
+from botocore.exceptions import HTTPClientError
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import create_engine, delete, insert, text
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
+from app.core import metrics, minhash, profiling
+from app.core.constants import SECTION_GRAPH_VERSION_KEY
+from app.db.models import (
+    FileLibrary,
+    PackageLshBand,
+    PackageSignature,
+    PostSection,
+    SectionCall,
+)
+from app.services.atr_registry import get_atr_registry
+from app.services.result_cache import invalidate_package_sync
 from app.workers.celery_app import celery_app
+from app.workers.jobs import JobLedger, finish_job
+from app.workers.sandbox import ParseLimitExceededError, ParseLimits, parse_sandboxed
+from app.workers.spool import spooled
 
 logger = logging.getLogger(__name__)
 
+# Worth retrying: the database or MinIO was unreachable or dropped the connection.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, StorageConnectionError, HTTPClientError)
+
+
+class MissingObjectsError(Exception):
+    """Files recorded for the package are not in MinIO; retrying will not help."""
+
 
 def get_sync_db_url() -> str:
     """Convert the async DATABASE_URL to a synchronous one for psycopg2."""
@@ -35,6 +62,8 @@ def get_sync_engine():
 
 def get_minio_client():
     """Create a synchronous boto3 S3 client for MinIO access."""
+    import boto3
+
     return boto3.client(
         "s3",
         endpoint_url=f"http://{os.environ.get('MINIO_ENDPOINT', 'minio:9000')}",
@@ -43,82 +72,402 @@ def get_minio_client():
     )
 
 
-@celery_app.task(bind=True, name="ingest_package")
-def ingest_package(self, package_id: str) -> dict:
-    """Skeleton ingestion task. Processes a ZIP package that was already
+def save_profile(sampler: profiling.StackSampler, profile_id: str, **meta: str) -> None:
+    """Upload a task profile to MinIO next to the API request profiles."""
+    s3 = get_minio_client()
+    bucket = os.environ.get("MINIO_BUCKET", "veripost")
+    collapsed_key, meta_key = profiling.profile_keys(profile_id)
+    s3.put_object(
+        Bucket=bucket,
+        Key=collapsed_key,
+        Body=sampler.collapsed(),
+        ContentType=profiling.COLLAPSED_CONTENT_TYPE,
+    )
+    s3.put_object(
+        Bucket=bucket,
+        Key=meta_key,
+        Body=sampler.metadata(profile_id, **meta),
+        ContentType="application/json",
+    )
+
+
+def file_rows(db: Session, package_id: str) -> dict[str, tuple]:
+    """``filename -> (file id, content hash)`` for every file in the package."""
+    rows = db.execute(
+        text("SELECT filename, id, content_hash FROM post_files WHERE package_id = :id"),
+        {"id": package_id},
+    ).all()
+    return {filename: (file_id, digest) for filename, file_id, digest in rows}
+
+
+def list_objects(s3, bucket: str, package_id: str) -> list[dict]:
+    """``{"Key", "Size"}`` of every object under the package's prefix."""
+    with metrics.timed("storage_operation_duration_seconds", operation="list"):
+        resp = s3.list_objects_v2(Bucket=bucket, Prefix=f"packages/{package_id}/")
+    return [{"Key": obj["Key"], "Size": obj.get("Size")} for obj in resp.get("Contents", [])]
+
+
+def verify_objects(db: Session, package_id: str, objects: list[dict]) -> dict:
+    """Check that every file row of the package has its object in MinIO."""
+    stored = {obj["Key"].rsplit("/", 1)[-1] for obj in objects}
+    missing = sorted(set(file_rows(db, package_id)) - stored)
+    if missing:
+        raise MissingObjectsError(f"Missing from storage: {', '.join(missing)}")
+    return {"files": len(stored)}
+
+
+def index_file(
+    db: Session,
+    s3,
+    bucket: str,
+    package_id: str,
+    file_id,
+    key: str,
+    digest: str | None,
+    limits: ParseLimits,
+) -> int:
+    """Parse one .SRC / .LIB and replace its section-graph rows (no commit).
+
+    The file is spooled to disk and parsed from an ``mmap`` (see
+    ``app.workers.spool``), so a large source is never held as bytes + str
+    + line list on the worker heap. Shared libraries already in the local
+    object cache are not downloaded again. The parse runs in a sandboxed
+    child under ``limits`` (see ``app.workers.sandbox``). Each section row
+    carries its normalized body hash, which ``index_signature`` reads back
+    for .SRC files.
+
+    Returns the number of sections written. Re-running for the same file is
+    safe: its existing rows are deleted first in the same transaction.
+    """
+    for model in (PostSection, SectionCall, FileLibrary):
+        db.execute(delete(model).where(model.file_id == file_id))
+
+    filename = key.rsplit("/", 1)[-1]
+    with (
+        profiling.label(f"file:{filename}"),
+        spooled(s3, bucket, key, get_settings().worker_spool_dir, digest) as buffer,
+    ):
+        parsed, body_hashes = parse_sandboxed(buffer, filename, limits)
+
+    owner = {"package_id": package_id, "file_id": file_id}
+    if parsed.sections:
+        db.execute(
+            insert(PostSection),
+            [
+                {
+                    **owner,
+                    "name": s.name,
+                    "kind": s.kind,
+                    "start_line": s.start_line,
+                    "end_line": s.end_line,
+                    "template_lines": s.template_lines,
+                    "body_hash": body_hash,
+                }
+                for s, body_hash in zip(parsed.sections, body_hashes)
+            ],
+        )
+    calls = [
+        {**owner, "caller": s.name, "callee": callee}
+        for s in parsed.sections
+        for callee in dict.fromkeys(s.calls)
+    ]
+    if calls:
+        db.execute(insert(SectionCall), calls)
+    if parsed.libraries:
+        db.execute(
+            insert(FileLibrary),
+            [
+                {**owner, "position": pos, "library": lib.upper()}
+                for pos, lib in enumerate(parsed.libraries)
+            ],
+        )
+    return len(parsed.sections)
+
+
+def src_section_hashes(db: Session, package_id: str) -> dict[str, str]:
+    """``section name -> body hash`` over the package's .SRC files.
+
+    Later definitions of a section name win, as in ``customization.fingerprint``.
+    """
+    rows = db.execute(
+        text(
+            "SELECT s.name, s.body_hash FROM post_sections s "
+            "JOIN post_files f ON f.id = s.file_id "
+            "WHERE s.package_id = :id AND upper(f.filename) LIKE '%.SRC' "
+            "ORDER BY f.filename, s.start_line"
+        ),
+        {"id": package_id},
+    ).all()
+    return {name: body_hash for name, body_hash in rows if body_hash}
+
+
+def index_atr(s3, bucket: str, key: str, digest: str | None) -> dict:
+    """Pre-build the shared ATR index so API override queries never parse."""
+    registry = get_atr_registry()
+    index = registry.get(digest) if digest else None
+    if index is None:
+        with spooled(s3, bucket, key, get_settings().worker_spool_dir, digest) as buffer:
+            index = registry.load(buffer, digest)
+    return {"digest": index.digest, "attributes": len(index)}
+
+
+def index_signature(db: Session, package_id: str, sections: dict[str, str]) -> int:
+    """Replace the package's MinHash signature and LSH buckets (no commit).
+
+    ``sections`` maps .SRC section names to body hashes; a package without
+    any gets no signature and never joins a post family. Returns the
+    number of shingles.
+    """
+    for model in (PackageSignature, PackageLshBand):
+        db.execute(delete(model).where(model.package_id == package_id))
+    if not sections:
+        return 0
+    signature = minhash.signature(minhash.shingle(n, h) for n, h in sections.items())
+    db.execute(
+        insert(PackageSignature),
+        {
+            "package_id": package_id,
+            "signature": signature.tobytes(),
+            "shingle_count": len(sections),
+        },
+    )
+    db.execute(
+        insert(PackageLshBand),
+        [
+            {"package_id": package_id, "band": band, "bucket": bucket}
+            for band, bucket in enumerate(minhash.bands(signature))
+        ],
+    )
+    return len(sections)
+
+
+def bump_graph_version() -> None:
+    """Tell API processes to reload their cached section graph."""
+    import redis
+
+    try:
+        redis.Redis.from_url(get_settings().redis_url).incr(SECTION_GRAPH_VERSION_KEY)
+    except Exception as exc:
+        logger.warning("Could not bump section graph version: %s", exc)
+
+
+def invalidate_cached_responses(package_id: str) -> None:
+    """Drop the API's cached responses for a package whose status changed."""
+    import redis
+
+    try:
+        invalidate_package_sync(redis.Redis.from_url(get_settings().redis_url), package_id)
+    except Exception as exc:
+        logger.warning("Package %s: could not invalidate cached responses: %s", package_id, exc)
+
+
+@celery_app.task(
+    bind=True,
+    name="ingest_package",
+    autoretry_for=TRANSIENT_ERRORS,
+    max_retries=get_settings().ingest_max_retries,
+    retry_backoff=True,
+    retry_backoff_max=get_settings().ingest_retry_backoff_max_seconds,
+    retry_jitter=True,
+    soft_time_limit=get_settings().ingest_soft_time_limit_seconds,
+    time_limit=get_settings().ingest_time_limit_seconds,
+)
+def ingest_package(self, package_id: str, profile: bool = False) -> dict:
+    """Ingestion task. Processes a ZIP package that was already
     uploaded to MinIO by the API route.
 
-    Status flow: pending -> validating -> storing -> parsing (stub) -> ready | error
+    Status flow: pending -> validating -> storing -> parsing -> ready | error
+    Each change drops the package's cached API responses (``result_cache``).
+
+    The parse step writes sections, ``CALL`` edges and ``:LIBRARY=`` edges
+    for every .SRC / .LIB (see ``index_file``) and pre-builds the ATR index.
 
-    The parse step is a stub -- Phase 2 will implement real UPG parsing.
+    Every stage, and every file within the parse stage, is recorded in the
+    package's ingest job (``app.workers.jobs``). On a transient DB or MinIO
+    error the task is retried with exponential backoff, and a retry (or a
+    later resume) skips the steps that already completed. The package is
+    marked ``error`` only when the error is permanent or retries run out.
+
+    Each file is parsed in a sandboxed child process with a timeout, a
+    memory limit and a maximum line length. A file that breaks one fails
+    the package, and the location it reached is stored as ``error_detail``.
+    The per-file timeout is cut to what is left of ``soft_time_limit``, and
+    no file is started once it is spent. The worker runs with
+    ``--pool=solo``, where Celery enforces neither ``soft_time_limit`` nor
+    ``time_limit``. This per-file cut is therefore the only limit there, and
+    it does not bound the download, store or DB stages.
+
+    With ``profile=True`` (propagated from a profiled upload request) or a
+    winning ``profiling_sample_rate`` draw, the run is sampled and the
+    profile stored under ``profiles/``; stages appear as ``[stage:...]``.
     """
+    final_attempt = self.request.retries >= self.max_retries
+    deadline = time.monotonic() + self.soft_time_limit if self.soft_time_limit else None
+    if not profiling.wanted(profile):
+        return _ingest_package(package_id, self.request.id, final_attempt, deadline)
+
+    profile_id = profiling.new_profile_id("ingest")
+    interval = get_settings().profiling_interval_ms / 1000
+    try:
+        with profiling.StackSampler(interval=interval) as sampler:
+            return _ingest_package(package_id, self.request.id, final_attempt, deadline)
+    finally:
+        try:
+            save_profile(sampler, profile_id, task="ingest_package", package_id=package_id)
+            logger.info("Package %s: profile stored as %s", package_id, profile_id)
+        except Exception as exc:
+            logger.warning("Package %s: could not store profile - %s", package_id, exc)
+
+
+@contextmanager
+def _stage(db: Session, package_id: str, name: str):  # type: ignore[no-untyped-def]
+    """Set the package status to ``name`` and time/label the stage."""
+    with (
+        metrics.timed("ingest_stage_duration_seconds", stage=name),
+        profiling.label(f"stage:{name}"),
+    ):
+        db.execute(
+            text("UPDATE post_packages SET status = :status WHERE id = :id"),
+            {"id": package_id, "status": name},
+        )
+        db.commit()
+        invalidate_cached_responses(package_id)
+        logger.info("Package %s: %s", package_id, name)
+        yield
+
+
+def _seconds_left(deadline: float | None, filename: str) -> float | None:
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise SoftTimeLimitExceeded(f"time limit reached before parsing {filename}")
+    return left
+
+
+def _ingest_package(
+    package_id: str,
+    task_id: str | None = None,
+    final_attempt: bool = True,
+    deadline: float | None = None,
+) -> dict:
     engine = get_sync_engine()
+    limits = ParseLimits.from_settings(get_settings())
     try:
         with Session(engine) as db:
-            # -- validating: verify files exist in MinIO --
-            db.execute(
-                text("UPDATE post_packages SET status = 'validating' WHERE id = :id"),
-                {"id": package_id},
-            )
-            db.commit()
-            logger.info("Package %s: validating", package_id)
-
+            ledger = JobLedger.open(db, package_id, task_id)
             s3 = get_minio_client()
-            prefix = f"packages/{package_id}/"
             bucket = os.environ.get("MINIO_BUCKET", "veripost")
-            resp = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            files = resp.get("Contents", [])
-            logger.info("Package %s: found %d files in MinIO", package_id, len(files))
 
-            # -- storing: confirm file integrity (already in MinIO from upload) --
-            db.execute(
-                text("UPDATE post_packages SET status = 'storing' WHERE id = :id"),
-                {"id": package_id},
-            )
-            db.commit()
-            logger.info("Package %s: storing (files verified in MinIO)", package_id)
+            # -- validating: list the package's files in MinIO --
+            with _stage(db, package_id, "validating"):
+                objects = ledger.run(
+                    "validating", lambda: {"objects": list_objects(s3, bucket, package_id)}
+                )["objects"]
+                logger.info("Package %s: found %d files in MinIO", package_id, len(objects))
 
-            # -- parsing: STUB -- Phase 2 will implement real parsing --
-            db.execute(
-                text("UPDATE post_packages SET status = 'parsing' WHERE id = :id"),
-                {"id": package_id},
-            )
-            db.commit()
-            logger.info(
-                "Package %s: parsing (stub - Phase 2 will implement real parsing)",
-                package_id,
-            )
+            # -- storing: confirm every file row has its object (uploaded by the API) --
+            with _stage(db, package_id, "storing"):
+                ledger.run("storing", lambda: verify_objects(db, package_id, objects))
+
+            # -- parsing: per-file sections and graph edges, signature, ATR index --
+            with _stage(db, package_id, "parsing"):
+                files = file_rows(db, package_id)
+                section_count = 0
+                for obj in objects:
+                    filename = obj["Key"].rsplit("/", 1)[-1]
+                    if filename not in files:
+                        continue
+                    file_id, digest = files[filename]
+                    if filename.upper().endswith((".SRC", ".LIB")):
+                        file_limits = limits.within(_seconds_left(deadline, filename))
+                        section_count += ledger.run(
+                            "parsing",
+                            lambda: {
+                                "sections": index_file(
+                                    db, s3, bucket, package_id, file_id, obj["Key"], digest,
+                                    file_limits,
+                                )
+                            },
+                            target=filename,
+                        )["sections"]
+                    elif filename.upper().endswith(".ATR"):
+                        atr = ledger.run(
+                            "atr_index",
+                            lambda: index_atr(s3, bucket, obj["Key"], digest),
+                            target=filename,
+                        )
+                        logger.info(
+                            "Package %s: %s indexed as %s (%d attributes)",
+                            package_id, filename, atr["digest"][:12], atr["attributes"],
+                        )
+                ledger.run(
+                    "signature",
+                    lambda: {
+                        "shingles": index_signature(
+                            db, package_id, src_section_hashes(db, package_id)
+                        )
+                    },
+                )
+                logger.info("Package %s: %d sections indexed", package_id, section_count)
 
             # -- ready: mark package as successfully ingested --
+            finish_job(db, package_id, "succeeded", None)
             db.execute(
                 text(
                     "UPDATE post_packages SET status = 'ready', "
-                    "file_count = :fc, section_count = 0 "
+                    "file_count = :fc, section_count = :sc "
                     "WHERE id = :id"
                 ),
-                {"id": package_id, "fc": len(files)},
+                {"id": package_id, "fc": len(objects), "sc": section_count},
             )
             db.commit()
-            logger.info("Package %s: ready", package_id)
+            invalidate_cached_responses(package_id)
+            bump_graph_version()
+            logger.info(
+                "Package %s: ready (%d completed steps skipped)", package_id, ledger.skipped
+            )
 
-        return {"package_id": package_id, "status": "ready", "file_count": len(files)}
+        return {
+            "package_id": package_id,
+            "status": "ready",
+            "file_count": len(objects),
+            "job_id": ledger.job_id,
+        }
 
     except Exception as exc:
-        logger.error("Package %s: error - %s", package_id, exc)
-        with Session(engine) as db:
-            db.execute(
-                text(
-                    "UPDATE post_packages SET status = 'error', "
-                    "error_message = :msg, error_detail = :detail "
-                    "WHERE id = :id"
-                ),
-                {
-                    "id": package_id,
-                    "msg": "Something went wrong while processing your package.",
-                    "detail": str(exc),
-                },
-            )
-            db.commit()
+        retrying = isinstance(exc, TRANSIENT_ERRORS) and not final_attempt
+        detail = str(exc) or type(exc).__name__
+        logger.error(
+            "Package %s: %s - %s", package_id, "will retry" if retrying else "error", detail
+        )
+        if isinstance(exc, ParseLimitExceededError):
+            message = "A file in your package could not be parsed within the server's limits."
+        elif isinstance(exc, SoftTimeLimitExceeded):
+            message = "Processing your package took too long."
+        else:
+            message = "Something went wrong while processing your package."
+        try:
+            with Session(engine) as db:
+                finish_job(db, package_id, "retrying" if retrying else "failed", detail)
+                if not retrying:
+                    db.execute(
+                        text(
+                            "UPDATE post_packages SET status = 'error', "
+                            "error_message = :msg, error_detail = :detail "
+                            "WHERE id = :id"
+                        ),
+                        {
+                            "id": package_id,
+                            "msg": message,
+                            "detail": detail,
+                        },
+                    )
+                db.commit()
+            if not retrying:
+                invalidate_cached_responses(package_id)
+        except Exception as record_exc:  # e.g. the database is what went away
+            logger.warning("Package %s: could not record failure - %s", package_id, record_exc)
         raise
     finally:
         engine.dispose()
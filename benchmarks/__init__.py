@@ -0,0 +1 @@
+"""Performance benchmarks (run explicitly; not part of the default test suite)."""
@@ -0,0 +1,91 @@
+"""Benchmark fixtures and regression budgets.
+
+Run with::
+
+    pytest benchmarks                       # all CPU benchmarks
+    VERIPOST_BENCH_SERVICES=1 pytest benchmarks   # + Postgres/MinIO stand-ins
+
+Every benchmark checks its mean time against an absolute budget from
+``BUDGETS`` so regressions fail the run rather than hiding in a report.
+Budgets are deliberately loose (several times the observed mean on a
+laptop); scale them for slower CI hosts with ``VERIPOST_BENCH_BUDGET_SCALE``.
+Relative comparisons against a saved baseline still work through
+pytest-benchmark's own ``--benchmark-autosave`` / ``--benchmark-compare-fail``.
+
+Service benchmarks need the docker compose Postgres and MinIO reachable
+through ``DATABASE_URL`` / ``MINIO_ENDPOINT`` (e.g. localhost:5432 / :9000).
+"""
+
+import os
+
+import pytest
+
+from benchmarks import synthetic
+
+# Mean-time budgets in seconds, keyed by benchmark name.
+BUDGETS: dict[str, float] = {
+    "tokenize_large_src": 0.15,
+    "parse_large_src": 0.40,
+    "parse_large_src_mmap": 0.40,
+    "parse_medium_src": 0.08,
+    "detect_large_src": 0.002,
+    "parse_master_atr": 0.05,
+    "graph_impact_query": 0.05,
+    "incremental_edit_large_src": 0.002,
+    "atr_lookup": 0.005,
+    "parse_master_atr_kin_lng": 0.06,
+    "validate_zip": 0.02,
+    "extract_zip": 0.05,
+    "bulk_insert_files": 0.50,
+    "storage_roundtrip": 0.25,
+    "cold_start": 1.0,
+    "first_request": 1.0,
+    "locator_build_large": 1.5,
+    "locator_rank_large": 0.05,
+    "serialize_package_list_models": 0.5,
+    "serialize_package_list_rows": 0.025,
+    "serialize_section_stream": 0.01,
+}
+
+BUDGET_SCALE = float(os.environ.get("VERIPOST_BENCH_BUDGET_SCALE", "1.0"))
+
+requires_services = pytest.mark.skipif(
+    os.environ.get("VERIPOST_BENCH_SERVICES") != "1",
+    reason="set VERIPOST_BENCH_SERVICES=1 with Postgres and MinIO running",
+)
+
+
+@pytest.fixture
+def budget(benchmark):
+    """Call ``budget(name)`` after ``benchmark(...)`` to enforce the regression budget."""
+
+    def check(name: str) -> None:
+        limit = BUDGETS[name] * BUDGET_SCALE
+        mean = benchmark.stats.stats.mean
+        assert mean <= limit, (
+            f"{name}: mean {mean * 1000:.2f} ms exceeds budget {limit * 1000:.2f} ms"
+        )
+
+    return check
+
+
+@pytest.fixture(scope="session")
+def medium_package() -> dict[str, bytes]:
+    return synthetic.generate_package("SYNTH_MEDIUM", sections=300)
+
+
+@pytest.fixture(scope="session")
+def large_package() -> dict[str, bytes]:
+    # Roughly twice the size of HAAS_ST-15Y (745 sections).
+    return synthetic.generate_package("SYNTH_LARGE", sections=1500)
+
+
+@pytest.fixture(scope="session")
+def large_zip(large_package) -> bytes:
+    return synthetic.package_zip(large_package, folder="SYNTH_LARGE")
+
+
+@pytest.fixture(scope="session")
+def master_atr() -> str:
+    # A full registry: every ATTRID from 18000 to IDHIGH-1.
+    return synthetic.generate_atr(attributes=1000, seed=1)
@@ -0,0 +1,82 @@
+"""Event-loop latency under parse load: inline parsing vs. ParseExecutor.
+
+A heartbeat coroutine sleeps for 1 ms in a loop and records how late it
+wakes up. While it runs, N parses are started either directly on the loop
+(the old ``async def parse`` behaviour) or through the process pool. The
+lateness distribution is what every other request on the API would see.
+
+Usage::
+
+    python -m benchmarks.event_loop_latency --parses 16 --sections 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.parsing import get_parser
+from app.core.parsing.executor import ParseExecutor
+from benchmarks.synthetic import generate_src
+
+TICK = 0.001
+
+
+async def heartbeat(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(mode: str, parses: int, content: str, executor: ParseExecutor) -> list[float]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0.05)
+
+    parser = get_parser("camworks")
+
+    async def inline(i: int) -> None:
+        parser.parse(content, f"bench-{i}")
+
+    async def pooled(i: int) -> None:
+        await executor.parse("camworks", content, f"bench-{i}")
+
+    job = inline if mode == "inline" else pooled
+    await asyncio.gather(*(job(i) for i in range(parses)))
+    stop.set()
+    await beat
+    return lags
+
+
+def report(mode: str, lags: list[float]) -> None:
+    ms = sorted(lag * 1000 for lag in lags)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(
+        f"{mode:>7}: ticks={len(ms):5d}  p50={statistics.median(ms):7.2f} ms  "
+        f"p99={p99:7.2f} ms  max={ms[-1]:7.2f} ms"
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--parses", type=int, default=16)
+    ap.add_argument("--sections", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=2)
+    args = ap.parse_args()
+
+    content = generate_src("BENCH", sections=args.sections)
+    executor = ParseExecutor(max_workers=args.workers, max_queue=args.parses, timeout=300)
+    executor.start()
+    try:
+        # Warm the pool so process start-up is not billed to the first parse.
+        await executor.parse("camworks", "[WARMUP]", "warmup")
+        for mode in ("inline", "pooled"):
+            report(mode, await run(mode, args.parses, content, executor))
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,272 @@
+"""Offline evaluation of the requirement-to-section locator.
+
+``EVAL_SECTIONS`` is a small hand-written mill post whose sections do what
+their names say. It is wrapped in synthetic noise, about 650 sections in
+all: a machine library and the shared HRS libraries from
+``benchmarks.synthetic``, whose same-named sections are shadowed and whose
+numbered variants are not. Each of ``CASES`` is a customer requirement and
+the sections an engineer would change for it.
+
+The model is ``StubModel``. It confirms every section it is shown after a
+fixed delay, so runs are free and repeatable, and the numbers measure the
+local ranking plus the confirmation round trip:
+
+- recall@k: the share of expected sections found in the top ``k``;
+- latency: rank plus confirmation, per requirement;
+- prompt size: the estimated tokens sent, against the whole post's.
+
+Usage::
+
+    python -m benchmarks.locator_eval --model-latency 0.8
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from dataclasses import dataclass
+
+from app.core import locator
+from app.core.ai.copilot import Completion, estimate_tokens
+from benchmarks import synthetic
+
+EVAL_POST = "EVAL_MILL"
+KS = (1, 3, 5, 10)
+
+EVAL_SECTIONS: dict[str, list[str]] = {
+    "PROGRAM_ID": [":T: O<PROGRAM_NUMBER> (<PROGRAM_NAME>) <EOL>"],
+    "START_OF_TAPE": [
+        "* safety line at program start",
+        ":T: % <EOL>",
+        ":T: G<G_ABS> G<G_XY_PLANE> G<G_CANCEL_CUTTER_COMP> G<G_CANCEL_CYCLE> <EOL>",
+        ":T: G<G_UNITS> <EOL>",
+    ],
+    "END_OF_TAPE": [
+        ":T: M<M_COOLANT_OFF> <EOL>",
+        ":T: G<G_HOME> G91 Z0. <EOL>",
+        ":T: M<M_END_PROGRAM> <EOL>",
+        ":T: % <EOL>",
+    ],
+    "INIT_TOOL_CHANGE_MILL": [
+        ":T: T<TOOL_NUMBER> M<M_TOOL_CHANGE> <EOL>",
+        ":T: G<G_WORK_OFFSET> G<G_RAPID> X<X_POS> Y<Y_POS> S<SPINDLE_SPEED> M<M_SPINDLE_CW> <EOL>",
+        ":T: G<G_LENGTH_COMP> H<TOOL_NUMBER> Z<CLEARANCE_PLANE> <EOL>",
+    ],
+    "SUB_TOOL_CHANGE_MILL": [
+        ":T: M<M_SPINDLE_STOP> <EOL>",
+        ":T: G<G_HOME> G91 Z0. <EOL>",
+        ":T: M<M_OPTIONAL_STOP> <EOL>",
+        ":T: T<TOOL_NUMBER> M<M_TOOL_CHANGE> <EOL>",
+    ],
+    "RAPID_MOVE_MILL": [":T: G<G_RAPID> X<X_POS> Y<Y_POS> <EOL>"],
+    "FEED_Z_MOVE_DOWN_MILL": [":T: G<G_FEED> Z<Z_POS> F<FEED_RATE> <EOL>"],
+    "ARC_MOVE_MILL": [
+        ":T: G<G_ARC_CW> X<X_POS> Y<Y_POS> I<ARC_I> J<ARC_J> F<FEED_RATE> <EOL>",
+    ],
+    "DRILLING_CYCLE": [
+        ":T: G<G_DRILL> X<X_POS> Y<Y_POS> Z<Z_POS> R<RETRACT_PLANE> F<FEED_RATE> <EOL>",
+    ],
+    "PECKING_CYCLE": [
+        ":T: G<G_PECK> X<X_POS> Y<Y_POS> Z<Z_POS> R<RETRACT_PLANE> Q<PECK_DEPTH> "
+        "F<FEED_RATE> <EOL>",
+    ],
+    "TAPPING_CYCLE": [
+        "* tap feed = pitch x spindle rpm",
+        ":T: G<G_TAP> X<X_POS> Y<Y_POS> Z<Z_POS> R<RETRACT_PLANE> F<TAP_FEED> <EOL>",
+    ],
+    "RIGID_TAPPING_CYCLE": [
+        ":T: M<M_RIGID_TAP> S<SPINDLE_SPEED> <EOL>",
+        ":T: G<G_TAP> X<X_POS> Y<Y_POS> Z<Z_POS> R<RETRACT_PLANE> F<TAP_FEED> <EOL>",
+    ],
+    "BORING_CYCLE": [
+        ":T: G<G_BORE> X<X_POS> Y<Y_POS> Z<Z_POS> R<RETRACT_PLANE> F<FEED_RATE> <EOL>",
+        ":T: IF DWELL_TIME > 0 THEN P<DWELL_TIME> ENDIF",
+    ],
+    "CANCEL_DRILL_CYCLE": [":T: G<G_CANCEL_CYCLE> <EOL>"],
+    "ROTATE_X": ["* 4th axis rotary move", ":T: G<G_RAPID> A<A_POS> <EOL>"],
+    "INDEX_POSITION": [
+        ":T: M<M_UNCLAMP_ROTARY> <EOL>",
+        ":T: G<G_RAPID> A<A_POS> <EOL>",
+        ":T: M<M_CLAMP_ROTARY> <EOL>",
+    ],
+    "SPINDLE_ON": [":T: S<SPINDLE_SPEED> M<M_SPINDLE_DIRECTION> <EOL>"],
+    "SPINDLE_OFF": [":T: M<M_SPINDLE_STOP> <EOL>"],
+    "OUTPUT_COOLANT": [
+        ":T: IF COOLANT_TYPE = 1 THEN M<M_COOLANT_FLOOD> ENDIF",
+        ":T: IF COOLANT_TYPE = 2 THEN M<M_COOLANT_MIST> ENDIF",
+        ":T: IF COOLANT_TYPE = 3 THEN M<M_COOLANT_THROUGH> ENDIF <EOL>",
+    ],
+    "PROBE_SURFACE_X_TOOLPATH": ["* Renishaw surface probe", ":T: G65 P9811 X<X_POS> <EOL>"],
+    "OUTPUT_DWELL": ["* dwell in milliseconds", ":T: G<G_DWELL> P<DWELL_TIME> <EOL>"],
+    "FEED_TYPE": [
+        ":T: IF INVERSE_TIME = 1 THEN G<G_INVERSE_TIME> ELSE G<G_FEED_PER_MIN> ENDIF",
+    ],
+    "BLANK_LINE": [":T: <EOL>"],
+    "CALC_INITIALIZE": ["  CALL(CALC_INIT_GCODES)", "  CALL(CALC_INIT_MCODES)"],
+    "CALC_INIT_GCODES": [
+        "  G_RAPID = 0", "  G_FEED = 1", "  G_ARC_CW = 2", "  G_DWELL = 4", "  G_UNITS = 20",
+        "  G_HOME = 28", "  G_LENGTH_COMP = 43", "  G_WORK_OFFSET = 54", "  G_DRILL = 81",
+        "  G_PECK = 83", "  G_TAP = 84", "  G_BORE = 85", "  G_CANCEL_CYCLE = 80",
+        "  G_INVERSE_TIME = 93", "  G_FEED_PER_MIN = 94",
+    ],
+    "CALC_INIT_MCODES": [
+        "* M03 spindle, M06 tool change, M07 mist, M08 flood, M88 through-spindle coolant",
+        "  M_SPINDLE_CW = 3", "  M_SPINDLE_STOP = 5", "  M_TOOL_CHANGE = 6",
+        "  M_COOLANT_MIST = 7", "  M_COOLANT_FLOOD = 8", "  M_COOLANT_OFF = 9",
+        "  M_COOLANT_THROUGH = 88", "  M_RIGID_TAP = 29", "  M_END_PROGRAM = 30",
+        "  M_CLAMP_ROTARY = 10", "  M_UNCLAMP_ROTARY = 11",
+    ],
+    "CALC_DRILL_CNFG": [
+        ":IF CNFG_PECK_DEPTH = 0 THEN",
+        "  PECK_DEPTH = 0.1 * TOOL_DIAMETER",
+        ":ENDIF",
+        ":IF CNFG_RETRACT = 1 THEN",
+        "  RETRACT_PLANE = CLEARANCE_PLANE",
+        ":ENDIF",
+    ],
+    "CALC_START_OPERATION": [
+        "  M_SPINDLE_DIRECTION = M_SPINDLE_CW",
+        "  CALL(CALC_DRILL_CNFG)",
+    ],
+}
+
+CASES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("Output M29 with the spindle speed before the rigid tap cycle", ("RIGID_TAPPING_CYCLE",)),
+    (
+        "Customer wants through-spindle coolant M88 instead of flood",
+        ("OUTPUT_COOLANT", "CALC_INIT_MCODES"),
+    ),
+    ("Dwell at the bottom of bored holes in seconds, not milliseconds",
+     ("BORING_CYCLE", "OUTPUT_DWELL")),
+    ("Send Z home with G28 before every tool change", ("SUB_TOOL_CHANGE_MILL",)),
+    ("Peck depth should default to a quarter of the tool diameter",
+     ("CALC_DRILL_CNFG", "PECKING_CYCLE")),
+    ("Unclamp the rotary table before indexing and clamp it after", ("INDEX_POSITION",)),
+    ("Use inverse time feed G93 on 4th axis moves", ("FEED_TYPE",)),
+    ("Program must end with M30 and a percent sign", ("END_OF_TAPE",)),
+    ("Start every program with G20 inch units on the safety line", ("START_OF_TAPE",)),
+    ("Put the program name in a comment after the O number", ("PROGRAM_ID",)),
+    ("Spindle must run in reverse M04 for left-hand taps", ("SPINDLE_ON", "CALC_START_OPERATION")),
+    ("Cancel the canned cycle with G80 after the last hole", ("CANCEL_DRILL_CYCLE",)),
+    ("Tapping feed must be pitch times RPM", ("TAPPING_CYCLE",)),
+    ("Tool length offset H on the first Z move after the tool change",
+     ("INIT_TOOL_CHANGE_MILL",)),
+    ("Arcs should output R instead of I and J", ("ARC_MOVE_MILL",)),
+    ("Turn coolant off before the spindle stops at program end", ("END_OF_TAPE",)),
+    ("Change the mist coolant code to M07", ("CALC_INIT_MCODES", "OUTPUT_COOLANT")),
+    ("Drilling retract plane R should come from the clearance plane",
+     ("DRILLING_CYCLE", "CALC_DRILL_CNFG")),
+    ("Probe the X surface with the Renishaw G65 P9811 macro", ("PROBE_SURFACE_X_TOOLPATH",)),
+    ("Rapid moves stay in G00 with X and Y on one line", ("RAPID_MOVE_MILL",)),
+    ("Work offset G54 must be output with the first rapid after the tool change",
+     ("INIT_TOOL_CHANGE_MILL",)),
+    ("Feed moves down in Z should use the plunge feed rate", ("FEED_Z_MOVE_DOWN_MILL",)),
+    ("COOLANT_TYPE 4 should turn on both flood and mist", ("OUTPUT_COOLANT",)),
+    ("CALC_DRILL_CNFG must not override PECK_DEPTH when the operation sets it",
+     ("CALC_DRILL_CNFG", "CALC_START_OPERATION")),
+)
+
+
+def eval_src() -> str:
+    lines = [
+        f"* File: {EVAL_POST}.SRC",
+        ":SYSTEM=MILL",
+        *(f":LIBRARY=C:\\Posts\\Library Files\\{lib}"
+          for lib in (f"{EVAL_POST}.LIB", *synthetic.SHARED_LIBRARIES)),
+    ]
+    for name, body in EVAL_SECTIONS.items():
+        lines += [f":SECTION={name}", *body]
+    return synthetic.EOL.join(lines) + synthetic.EOL
+
+
+def eval_files() -> list[tuple[str, str]]:
+    """The evaluation post in namespace order: .SRC, machine library, shared libraries."""
+    return [
+        (f"{EVAL_POST}.SRC", eval_src()),
+        (f"{EVAL_POST}.LIB", synthetic.generate_lib(f"{EVAL_POST}.LIB", sections=600, seed=1)),
+        *((lib, synthetic.generate_lib(lib)) for lib in synthetic.SHARED_LIBRARIES),
+    ]
+
+
+class StubModel:
+    """Stands in for ``Copilot``: waits ``latency`` seconds and confirms every section shown."""
+
+    SECTION = re.compile(r":SECTION=(\w+)")
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.prompts: list[str] = []
+
+    async def complete(
+        self, context: str, question: str, platform: str = "camworks", subject: str = ""
+    ) -> Completion:
+        self.prompts.append(context)
+        await asyncio.sleep(self.latency)
+        names = self.SECTION.findall(context)
+        return Completion(
+            "\n".join(f"{name}: yes - shown to the stub" for name in names),
+            input_tokens=estimate_tokens(context, question),
+        )
+
+
+@dataclass(slots=True)
+class EvalReport:
+    sections: int
+    build_seconds: float
+    recall: dict[int, float]
+    latency_p50: float
+    latency_p95: float
+    prompt_tokens: float
+    whole_post_tokens: int
+
+
+async def evaluate(k: int = 5, model_latency: float = 0.0) -> EvalReport:
+    files = eval_files()
+    started = time.perf_counter()
+    index = locator.LocatorIndex.build(files)
+    build_seconds = time.perf_counter() - started
+
+    model = StubModel(model_latency)
+    found: dict[int, list[float]] = {n: [] for n in KS}
+    latencies, prompt_tokens = [], []
+    for requirement, expected in CASES:
+        started = time.perf_counter()
+        ranked = index.rank(requirement, max(KS))
+        verdicts = await locator.confirm(model, requirement, ranked[:k])
+        latencies.append(time.perf_counter() - started)
+        prompt_tokens.append(estimate_tokens(model.prompts[-1], locator.CONFIRM_QUESTION))
+        assert len(verdicts) <= k
+        names = [c.entry.name for c in ranked]
+        for n in KS:
+            found[n].append(len(set(expected) & set(names[:n])) / len(expected))
+
+    latencies.sort()
+    return EvalReport(
+        sections=len(index.entries),
+        build_seconds=build_seconds,
+        recall={n: statistics.fmean(hits) for n, hits in found.items()},
+        latency_p50=statistics.median(latencies),
+        latency_p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        prompt_tokens=statistics.fmean(prompt_tokens),
+        whole_post_tokens=index.chars // 4,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Evaluate the requirement-to-section locator.")
+    ap.add_argument("--k", type=int, default=5, help="sections sent to the model")
+    ap.add_argument("--model-latency", type=float, default=0.0, help="stub model delay (s)")
+    args = ap.parse_args()
+    report = asyncio.run(evaluate(args.k, args.model_latency))
+    print(f"{len(CASES)} requirements over {report.sections} sections "
+          f"(index built in {report.build_seconds * 1000:.0f} ms)")
+    print("  " + "  ".join(f"recall@{n} {r:.2f}" for n, r in report.recall.items()))
+    print(f"  latency p50 {report.latency_p50 * 1000:.1f} ms, "
+          f"p95 {report.latency_p95 * 1000:.1f} ms")
+    print(f"  prompt ~{report.prompt_tokens:.0f} tokens vs ~{report.whole_post_tokens} "
+          "for the whole post")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Synthetic UPG package generator.
+
+Produces realistic-looking post processor packages following the anatomy
+in the UPG structure catalog (``.planning/phases/01-foundation/01-RESEARCH.md``):
+a ``.SRC`` with header banner, ``Created From:`` header, ``:DEFINE`` block,
+descriptor ``:ATTRNAME`` blocks, ``:LIBRARY=`` declarations, ``:OPERID``
+posting-tab blocks, template sections with ``:T:`` lines and CALC sections
+with ``:IF``/``CALL()`` logic; plus machine and shared ``.LIB`` files and
+``.KIN``, ``.ATR``, ``.PINF``, ``.LNG`` and ``.CTL`` companions.
+
+Output is deterministic for a given seed. Shared HRS libraries are seeded
+by their own name, so every generated package carries byte-identical copies
+the way real deliveries do.
+
+Usage::
+
+    python -m benchmarks.synthetic --out corpus/camworks --packages 20 --sections 300
+"""
+
+import argparse
+import io
+import random
+import zipfile
+from pathlib import Path
+
+EOL = "\r\n"
+
+SHARED_LIBRARIES = ("MILL_HRS.LIB", "HEADERS-MILL.LIB", "PROBE_MILL_HRS.LIB")
+
+SECTION_STEMS = (
+    "PROGRAM_ID", "START_OF_TAPE", "END_OF_TAPE", "INIT_TOOL_CHANGE_MILL",
+    "SUB_TOOL_CHANGE_MILL", "RAPID_MOVE_MILL", "FEED_Z_MOVE_DOWN_MILL",
+    "RAPID_Z_MOVE_UP_MILL", "FIRST_RAPID_Z_MOVE_DOWN_MILL", "ARC_MOVE_MILL",
+    "DRILLING_CYCLE", "PECKING_CYCLE", "TAPPING_CYCLE", "RIGID_TAPPING_CYCLE",
+    "BORING_CYCLE", "CANCEL_DRILL_CYCLE", "BEG_MACRO_MILL", "MACRO_CALL_MILL",
+    "ROTATE_X", "INDEX_POSITION", "SPINDLE_ON", "SPINDLE_OFF", "OUTPUT_COOLANT",
+    "PROBE_SURFACE_X_TOOLPATH", "BLANK_LINE", "OUTPUT_DWELL", "FEED_TYPE",
+)
+CALC_STEMS = (
+    "CALC_INITIALIZE", "CALC_CNFG_CODES", "CALC_INIT_CODES", "CALC_INIT_GCODES",
+    "CALC_INIT_MCODES", "CALC_DRILL_CNFG", "CALC_START_OPERATION", "CALC_END_OPERATION",
+)
+VARIABLES = (
+    "X_POS", "Y_POS", "Z_POS", "FEED_RATE", "SPINDLE_SPEED", "TOOL_NUMBER",
+    "WORK_OFFSET", "CLEARANCE_PLANE", "PECK_DEPTH", "DWELL_TIME", "COOLANT_TYPE",
+)
+OPER_TYPES = (
+    "MILL_OPER_SETUP", "MILL_OPER_ROUGH", "MILL_OPER_FINISH", "MILL_OPER_DRILL",
+    "MILL_OPER_TAP", "MILL_OPER_BORE", "MILL_OPER_PROBE", "MILL_OPER_ENGRAVE",
+)
+LNG_OPERATIONS = (
+    "program stop", "optional stop", "DRILLING", "PECKING", "TAPPING", "BORING",
+    "REAMING", "MILL_LACE", "MILL_POCKET", "MILL_CONTOUR", "MILL_FACE", "THREAD_MILL",
+)
+
+
+def _lines(lines: list[str]) -> str:
+    return EOL.join(lines) + EOL
+
+
+def _banner(title: str, name: str) -> list[str]:
+    return [
+        "*" + "#" * 70,
+        "* PROPRIETARY AND CONFIDENTIAL -- HawkRidge Systems",
+        "*" + "#" * 70,
+        "*",
+        f"* ~~ {' '.join(title)} ~~",
+        f"* File: {name}",
+        "*",
+    ]
+
+
+def section_names(count: int) -> list[str]:
+    """Deterministic, unique template section names."""
+    names = []
+    for i in range(count):
+        stem = SECTION_STEMS[i % len(SECTION_STEMS)]
+        names.append(stem if i < len(SECTION_STEMS) else f"{stem}_{i // len(SECTION_STEMS)}")
+    return names
+
+
+def calc_names(count: int) -> list[str]:
+    names = []
+    for i in range(count):
+        stem = CALC_STEMS[i % len(CALC_STEMS)]
+        names.append(stem if i < len(CALC_STEMS) else f"{stem}_{i // len(CALC_STEMS)}")
+    return names
+
+
+def _template_section(rng: random.Random, name: str, lines: int) -> list[str]:
+    out = [f":SECTION={name}"]
+    for _ in range(lines):
+        var = rng.choice(VARIABLES)
+        shape = rng.random()
+        if shape < 0.5:
+            out.append(f":T: <G:G_RAPID> X<{var}> Y<Y_POS> <EOL>")
+        elif shape < 0.8:
+            out.append(f":T: IF {var} > 0 THEN <M:M_COOLANT_ON> ENDIF")
+        else:
+            out.append(f":T: IF {var} = 1 THEN <{var}!> ELSE <BLANK> ENDIF")
+    return out
+
+
+def _calc_section(rng: random.Random, name: str, callees: list[str], lines: int) -> list[str]:
+    out = [f":SECTION={name}", f"* {name.replace('_', ' ').lower()} logic"]
+    for i in range(lines):
+        var = rng.choice(VARIABLES)
+        out.append(f":IF CNFG_{var} = {i % 3} THEN")
+        out.append(f"  {var} = {rng.randint(0, 500)}")
+        if callees and rng.random() < 0.6:
+            out.append(f"  CALL({rng.choice(callees)})")
+        out.append(":ENDIF")
+    return out
+
+
+def _attr_block(rng: random.Random, name: str, attr_type: str) -> list[str]:
+    return [
+        f":ATTRNAME={name}",
+        f":ATTRTYPE={attr_type}",
+        f":ATTRVTYPE={rng.choice(('CHARACTER', 'INTEGER', 'DECIMAL', 'SELECT'))}",
+        f":ATTRSHORT={name.title()}",
+        f":ATTRDEFAULT={rng.randint(0, 9)}",
+        ":ATTREND",
+    ]
+
+
+def generate_src(
+    name: str,
+    sections: int = 300,
+    calc_sections: int | None = None,
+    lines_per_section: int = 6,
+    defines: int = 200,
+    attributes: int = 40,
+    operations: int = 8,
+    created_from: str = "HAAS_VF-4.SRC",
+    libraries: tuple[str, ...] = SHARED_LIBRARIES,
+    seed: int = 0,
+) -> str:
+    """Generate a ``.SRC`` with ``sections`` template sections plus CALC sections."""
+    rng = random.Random(seed)
+    calc_count = calc_sections if calc_sections is not None else max(2, sections // 20)
+    lines = _banner("FILE DESCRIPTION", f"{name}.SRC")
+    lines += [f"* Revision {i}: adjusted output for customer request" for i in range(20)]
+    lines += [
+        "*",
+        "* Controller: HAAS NGC",
+        f"* Machine: {name}",
+        "* Company: HawkRidge Systems",
+        "* Version: 3.2",
+        "* Date: 2025-11-04",
+        "* Programmer: synthetic",
+        f"* Created From: {created_from}",
+        "*",
+        ":SYSTEM=MILL",
+        ":LEADING=FALSE",
+        ":TRAILING=TRUE",
+        ":DECIMAL=4",
+        ":MAXIMUM_LINE=100",
+    ]
+    lines += [f":DEFINE DEF_{i}={rng.randint(0, 999)}" for i in range(defines)]
+    for i in range(attributes):
+        lines += _attr_block(rng, f"SETUP_VAR_{i}", "DESCRIPTOR" if i < 8 else "POST")
+    lines += [f":LIBRARY=C:\\Posts\\Library Files\\{lib}" for lib in (f"{name}.LIB", *libraries)]
+    for i in range(operations):
+        lines += [f":OPERID={OPER_TYPES[i % len(OPER_TYPES)]}", ":OPERSUB=0"]
+        lines += [f":OPERLIST=SETUP_VAR_{j}" for j in range(i % 4 + 1)]
+        lines.append(":OPEREND")
+    for section in section_names(sections):
+        lines += _template_section(rng, section, lines_per_section)
+    calcs = calc_names(calc_count)
+    for idx, section in enumerate(calcs):
+        lines += _calc_section(rng, section, calcs[idx + 1 :], lines_per_section // 2 + 1)
+    return _lines(lines)
+
+
+def generate_lib(name: str, sections: int = 60, defines: int = 120, seed: int | None = None) -> str:
+    """Generate a ``.LIB`` with G/M-code defines and shared sections."""
+    rng = random.Random(seed if seed is not None else name)
+    lines = _banner("LIBRARY", name)
+    lines += [f":DEFINE G_{i}={i}" for i in range(defines)]
+    for section in section_names(sections):
+        lines += _template_section(rng, section, 3)
+    calcs = [f"{c}_{Path(name).stem.replace('-', '_')}" for c in calc_names(max(2, sections // 15))]
+    for idx, section in enumerate(calcs):
+        lines += _calc_section(rng, section, calcs[idx + 1 :], 2)
+    return _lines(lines)
+
+
+def generate_kin(seed: int = 0) -> str:
+    rng = random.Random(seed)
+    entries = [
+        ("0", "5 Axis Type 0-TABLE_TABLE,1-HEAD_HEAD,2-HEAD_TABLE"),
+        ("0", "XYZ Coordinate Type 0-Part, 1-Machine"),
+    ]
+    for axis in ("Spindle Direction", "1st Rotary Axis Direction", "2nd Rotary Axis Direction"):
+        for comp in "XYZ":
+            entries.append((f"{rng.choice((0.0, 0.0, 1.0, -1.0)):.6f}", f"{axis} {comp}"))
+    for axis in ("1st Rotary Axis Center", "2nd Rotary Axis Center"):
+        for comp in "XYZ":
+            entries.append((f"{rng.uniform(-500, 500):.6f}", f"{axis} {comp}"))
+    entries += [
+        ("-100000.000000", "1st Rotation Axis Limit Min"),
+        ("100000.000000", "1st Rotation Axis Limit Max"),
+        (f"{-rng.randint(20, 120):.6f}", "2nd Rotation Axis Limit Min"),
+        (f"{rng.randint(90, 130):.6f}", "2nd Rotation Axis Limit Max"),
+        ("table table", "Default Machine Simulation Name"),
+    ]
+    return _lines([f"{value} * {desc}" for value, desc in entries])
+
+
+def generate_atr(attributes: int = 1000, seed: int = 0) -> str:
+    """Generate a ``MASTER.ATR`` registry with ATTRIDs from 18000 upwards."""
+    rng = random.Random(seed)
+    lines = _banner("ATTRIBUTE REGISTRY", "MASTER.ATR") + [":IDHIGH=19000"]
+    for i in range(attributes):
+        attr_type = rng.choice(("SELECT", "VALUE", "DESCRIPTOR", "POST", "LIST"))
+        lines += [f":ATTRID={18000 + i}"]
+        lines += _attr_block(rng, f"HRS_ATTR_{i}", attr_type)[:-1]
+        if attr_type in ("SELECT", "LIST"):
+            lines.append(f":ATTRSEL={rng.randint(1, 6)}")
+        lines.append(":ATTREND")
+    return _lines(lines)
+
+
+def generate_pinf(name: str) -> str:
+    return _lines(
+        [
+            f"PostName = {name}",
+            "PostExtension = NC",
+            f"ShortInfo = {name}_S.RTF",
+            f"LongInfo = {name}_L.RTF",
+        ]
+    )
+
+
+def generate_lng(entries: int = 120) -> str:
+    lines = []
+    for i in range(entries):
+        label = LNG_OPERATIONS[i % len(LNG_OPERATIONS)]
+        if i >= len(LNG_OPERATIONS):
+            label = f"{label} {i // len(LNG_OPERATIONS)}"
+        lines.append(f"{label:<70}:{i + 1:04d}:")
+    return _lines(lines)
+
+
+def generate_ctl(name: str) -> str:
+    return _lines([f"* {name} control file", f"POST={name}.SRC", "UNITS=INCH"])
+
+
+def generate_package(
+    name: str, sections: int = 300, atr_attributes: int = 400, seed: int = 0
+) -> dict[str, bytes]:
+    """Generate one complete package as ``{filename: bytes}``."""
+    files = {
+        f"{name}.SRC": generate_src(name, sections=sections, seed=seed),
+        f"{name}.LIB": generate_lib(f"{name}.LIB", sections=max(10, sections // 10), seed=seed),
+        f"{name}.CTL": generate_ctl(name),
+        f"{name}.KIN": generate_kin(seed),
+        f"{name}.PINF": generate_pinf(name),
+        f"{name}.LNG": generate_lng(),
+        "MASTER.ATR": generate_atr(atr_attributes),
+    }
+    for lib in SHARED_LIBRARIES:
+        files[lib] = generate_lib(lib)
+    return {fn: text.encode("ascii") for fn, text in files.items()}
+
+
+def package_zip(files: dict[str, bytes], folder: str | None = None) -> bytes:
+    """Zip a generated package, optionally nested under ``folder/`` like Windows zips."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for filename, data in files.items():
+            zf.writestr(f"{folder}/{filename}" if folder else filename, data)
+    return buf.getvalue()
+
+
+def write_corpus(
+    out: Path, packages: int, sections: int, seed: int = 0, zipped: bool = False
+) -> int:
+    """Write ``packages`` generated packages under ``out``; returns files written."""
+    out.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for i in range(packages):
+        name = f"SYNTH_{i:04d}"
+        files = generate_package(name, sections=sections, seed=seed + i)
+        if zipped:
+            (out / f"{name}.zip").write_bytes(package_zip(files, folder=name))
+            written += 1
+            continue
+        pkg_dir = out / name
+        pkg_dir.mkdir(exist_ok=True)
+        for filename, data in files.items():
+            (pkg_dir / filename).write_bytes(data)
+            written += 1
+    return written
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Generate a synthetic UPG corpus.")
+    ap.add_argument("--out", type=Path, default=Path("corpus/camworks/synthetic"))
+    ap.add_argument("--packages", type=int, default=10)
+    ap.add_argument("--sections", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--zip", action="store_true", help="write delivery ZIPs instead of folders")
+    args = ap.parse_args()
+    count = write_corpus(args.out, args.packages, args.sections, args.seed, args.zip)
+    print(f"Wrote {count} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
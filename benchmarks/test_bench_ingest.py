@@ -0,0 +1,80 @@
+"""ZIP validation/extraction, bulk DB insert and MinIO round-trip benchmarks."""
+
+import asyncio
+import uuid
+
+from app.services import post_service
+from benchmarks.conftest import requires_services
+
+
+def test_validate_zip(benchmark, budget, large_zip):
+    errors = benchmark(post_service.validate_zip_contents, large_zip)
+    assert errors == []
+    budget("validate_zip")
+
+
+def test_extract_zip(benchmark, budget, large_zip, large_package):
+    files = benchmark(post_service.extract_zip_files, large_zip)
+    assert len(files) == len(large_package)
+    budget("extract_zip")
+
+
+@requires_services
+def test_bulk_insert_files(benchmark, budget):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+
+    from app.db.models import PostFile, PostPackage
+    from app.workers.tasks import get_sync_engine
+
+    engine = get_sync_engine()
+    rows = 500
+
+    def insert_batch() -> None:
+        package_id = uuid.uuid4()
+        with Session(engine) as db:
+            db.execute(
+                insert(PostPackage),
+                [{"id": package_id, "name": "bench", "minio_prefix": f"packages/{package_id}/"}],
+            )
+            db.execute(
+                insert(PostFile),
+                [
+                    {
+                        "package_id": package_id,
+                        "filename": f"F{i}.LIB",
+                        "file_extension": ".LIB",
+                        "minio_key": f"packages/{package_id}/F{i}.LIB",
+                        "size_bytes": 1024,
+                    }
+                    for i in range(rows)
+                ],
+            )
+            db.rollback()
+
+    try:
+        benchmark(insert_batch)
+    finally:
+        engine.dispose()
+    budget("bulk_insert_files")
+
+
+@requires_services
+def test_storage_roundtrip(benchmark, budget, large_package):
+    from app.services.storage import StorageService
+
+    storage = StorageService()
+    data = large_package["SYNTH_LARGE.SRC"]
+    key = f"bench/{uuid.uuid4()}/SYNTH_LARGE.SRC"
+
+    async def roundtrip() -> bytes:
+        await storage.upload_file(key, data)
+        return await storage.download_file(key)
+
+    asyncio.run(storage.init_bucket())
+    try:
+        result = benchmark(lambda: asyncio.run(roundtrip()))
+        assert result == data
+    finally:
+        asyncio.run(storage.delete_prefix(key.rsplit("/", 1)[0] + "/"))
+    budget("storage_roundtrip")
@@ -0,0 +1,30 @@
+"""Requirement-to-section locator: index build, ranking, and the offline eval gate."""
+
+import asyncio
+
+from app.core.locator import LocatorIndex
+from benchmarks import locator_eval
+
+
+def test_locator_build_large_package(benchmark, budget, large_package):
+    files = [(fn, large_package[fn].decode()) for fn in ("SYNTH_LARGE.SRC", "SYNTH_LARGE.LIB")]
+    index = benchmark(LocatorIndex.build, files)
+    assert len(index.entries) > 1500
+    budget("locator_build_large")
+
+
+def test_locator_rank_large_package(benchmark, budget, large_package):
+    files = [(fn, large_package[fn].decode()) for fn in ("SYNTH_LARGE.SRC", "SYNTH_LARGE.LIB")]
+    index = LocatorIndex.build(files)
+    ranked = benchmark(index.rank, "Output M29 before the rigid tapping cycle", 5)
+    assert len(ranked) == 5
+    budget("locator_rank_large")
+
+
+def test_locator_eval_recall_and_prompt_size():
+    """Regression gate on the offline eval set (stub model, no network)."""
+    report = asyncio.run(locator_eval.evaluate(k=5))
+    assert report.recall[5] >= 0.8
+    assert report.recall[10] >= report.recall[5] >= report.recall[1]
+    assert report.prompt_tokens < 0.05 * report.whole_post_tokens
+    assert report.latency_p95 < 0.1
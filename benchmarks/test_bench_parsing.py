@@ -0,0 +1,162 @@
+"""Tokenizer, parser, platform-detection and dependency-graph benchmarks."""
+
+import mmap
+import tracemalloc
+
+from app.core.models.post_processor import ParsedPost, TextEdit
+from app.core.parsing import companion, detect_parser, get_parser, upg
+from app.core.parsing.incremental import IncrementalDocument
+from app.core.section_graph import SectionGraph
+
+
+def test_tokenize_large_src(benchmark, budget, large_package):
+    content = large_package["SYNTH_LARGE.SRC"].decode()
+    tokens = benchmark(upg.tokenize, content)
+    assert len(tokens) == len(content.splitlines())
+    budget("tokenize_large_src")
+
+
+def test_parse_large_src(benchmark, budget, large_package):
+    content = large_package["SYNTH_LARGE.SRC"].decode()
+    parser = get_parser("camworks")
+    parsed = benchmark(parser.parse, content, "bench")
+    assert len(parsed.sections) > 1500
+    assert not parsed.errors
+    budget("parse_large_src")
+
+
+def _mapped_parse(path) -> ParsedPost:
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return upg.parse_upg_buffer(buf, "bench")
+
+
+def _read_parse(path) -> ParsedPost:
+    with open(path, "rb") as fh:
+        body = fh.read()
+    return upg.parse_upg(body.decode("utf-8", errors="replace"), "bench")
+
+
+def test_parse_large_src_mmap(benchmark, budget, large_package, tmp_path):
+    """Worker path: parse straight from a memory-mapped spool file."""
+    path = tmp_path / "SYNTH_LARGE.SRC"
+    path.write_bytes(large_package["SYNTH_LARGE.SRC"])
+    assert len(benchmark(_mapped_parse, path).sections) > 1500
+    budget("parse_large_src_mmap")
+
+
+def test_parse_large_src_peak_memory(large_package, tmp_path, record_property):
+    """Python heap of read+decode+parse vs mmap+parse_upg_buffer (tracemalloc).
+
+    Both paths return the same ~1575 ``ParsedSection`` models (about 2 MB
+    of pydantic objects), so the gate is on the transient heap: the peak
+    minus what the returned ``ParsedPost`` still holds. Measured on Python
+    3.11 for the 530 KB source: peaks 5.46 MB vs 2.26 MB, transient
+    2.87 MB (the read bytes, line list and tokens) vs 0.20 MB.
+    """
+    path = tmp_path / "SYNTH_LARGE.SRC"
+    path.write_bytes(large_package["SYNTH_LARGE.SRC"])
+    peaks, transient = {}, {}
+    for fn in (_read_parse, _mapped_parse):
+        fn(path)  # warm imports and regex caches outside the trace
+        tracemalloc.start()
+        try:
+            parsed = fn(path)
+            retained, peaks[fn.__name__] = tracemalloc.get_traced_memory()
+            transient[fn.__name__] = peaks[fn.__name__] - retained
+        finally:
+            tracemalloc.stop()
+        assert len(parsed.sections) > 1500
+    for name in ("read_parse", "mapped_parse"):
+        record_property(f"peak_bytes_{name}", peaks[f"_{name}"])
+        record_property(f"transient_bytes_{name}", transient[f"_{name}"])
+    assert transient["_mapped_parse"] < 0.2 * transient["_read_parse"]
+    assert peaks["_mapped_parse"] < 0.5 * peaks["_read_parse"]
+
+
+def test_incremental_edit_large_src(benchmark, budget, large_package):
+    """One keystroke in the middle of a 1500-section file (vs parse_large_src)."""
+    doc = IncrementalDocument.from_text(large_package["SYNTH_LARGE.SRC"].decode(), "bench")
+    middle = doc.text().count("\n") // 2
+    edit = TextEdit(start_line=middle, start_column=1, end_line=middle, end_column=1, text=" ")
+    delta = benchmark(doc.apply, edit)
+    assert delta.old_line_count < 50
+    budget("incremental_edit_large_src")
+
+
+def test_parse_medium_src(benchmark, budget, medium_package):
+    content = medium_package["SYNTH_MEDIUM.SRC"].decode()
+    parser = get_parser("camworks")
+    benchmark(parser.parse, content, "bench")
+    budget("parse_medium_src")
+
+
+def test_detect_large_src(benchmark, budget, large_package):
+    content = large_package["SYNTH_LARGE.SRC"].decode()
+    parser = benchmark(detect_parser, content, "SYNTH_LARGE.SRC")
+    assert parser is not None and parser.platform == "camworks"
+    budget("detect_large_src")
+
+
+def test_parse_master_atr(benchmark, budget, master_atr):
+    registry = benchmark(companion.parse_atr, master_atr)
+    assert len(registry) == 1000
+    assert not registry.errors
+    budget("parse_master_atr")
+
+
+def test_atr_lookup(benchmark, budget, master_atr):
+    registry = companion.parse_atr(master_atr)
+
+    def lookups() -> int:
+        found = 0
+        for attr_id in range(18000, 19000):
+            found += registry.row_of(attr_id) is not None
+        found += registry.by_name("HRS_ATTR_999") is not None
+        return found
+
+    assert benchmark(lookups) == 1001
+    budget("atr_lookup")
+
+
+def test_parse_master_atr_kin_lng(benchmark, budget, master_atr, large_package):
+    """All companion tables of one package, as the ingest worker would parse them."""
+    parser = get_parser("camworks")
+    files = {
+        "MASTER.ATR": master_atr,
+        "SYNTH_LARGE.KIN": large_package["SYNTH_LARGE.KIN"].decode(),
+        "SYNTH_LARGE.LNG": large_package["SYNTH_LARGE.LNG"].decode(),
+        "SYNTH_LARGE.PINF": large_package["SYNTH_LARGE.PINF"].decode(),
+    }
+
+    def parse_all() -> int:
+        return sum(len(parser.parse(text, fn, fn).errors) for fn, text in files.items())
+
+    assert benchmark(parse_all) == 0
+    budget("parse_master_atr_kin_lng")
+
+
+def test_graph_impact_query(benchmark, budget, medium_package):
+    """Reverse reachability from one shared-library section across 1000 packages."""
+    parsed = {
+        fn: upg.parse_upg(data.decode(), fn)
+        for fn, data in medium_package.items()
+        if fn.endswith((".SRC", ".LIB"))
+    }
+
+    def unit(post):
+        calls = [(s.name, c) for s in post.sections for c in dict.fromkeys(s.calls)]
+        return [s.name for s in post.sections], calls, post.libraries
+
+    graph = SectionGraph()
+    for fn, post in parsed.items():
+        if fn.endswith(".LIB"):
+            graph.add_library(fn, *unit(post))
+    src = unit(parsed["SYNTH_MEDIUM.SRC"])
+    for i in range(1000):
+        graph.add_source(f"pkg-{i}", f"SYNTH_{i:04d}", "SYNTH_MEDIUM.SRC", *src)
+    graph.finalize()
+
+    impacts = benchmark(graph.affected, "MILL_HRS.LIB", "CALC_INIT_GCODES_MILL_HRS")
+    assert len(impacts) == 1000
+    assert len(impacts[0].sections) > 1
+    budget("graph_impact_query")
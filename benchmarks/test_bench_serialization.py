@@ -0,0 +1,114 @@
+"""Response serialization: ORM objects through pydantic versus SQL rows straight to orjson."""
+
+import json
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from app.core.models.post_processor import PackageListResponse, PackageResponse
+from app.services.post_service import to_json
+
+PACKAGES = 2000
+FILES_PER_PACKAGE = 7
+SECTIONS = 5000
+
+
+def _package_rows() -> list[dict]:
+    created = datetime(2024, 1, 1, tzinfo=UTC)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"PKG_{i:05d}",
+            "machine_type": "mill",
+            "controller_type": "HAAS",
+            "platform": "camworks",
+            "status": "ready",
+            "error_message": None,
+            "file_count": FILES_PER_PACKAGE,
+            "section_count": 745,
+            "created_at": created + timedelta(minutes=i),
+            "updated_at": created + timedelta(minutes=i, seconds=30),
+            "files": [
+                {
+                    "id": uuid.uuid4(),
+                    "filename": f"PKG_{i:05d}{ext}",
+                    "file_extension": ext,
+                    "size_bytes": 1000 * (n + 1),
+                }
+                for n, ext in enumerate((".SRC", ".LIB", ".CTL", ".KIN", ".ATR", ".PINF", ".LNG"))
+            ],
+        }
+        for i in range(PACKAGES)
+    ]
+
+
+def _orm_like(rows: list[dict]) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(**{**row, "files": [SimpleNamespace(**f) for f in row["files"]]})
+        for row in rows
+    ]
+
+
+def _serialize_models(packages: list[SimpleNamespace]) -> bytes:
+    """The previous ``GET /posts/`` path: validate every object, encode with json."""
+    response = PackageListResponse(
+        packages=[PackageResponse.model_validate(p) for p in packages], count=len(packages)
+    )
+    return json.dumps(response.model_dump(mode="json")).encode()
+
+
+def _serialize_rows(rows: list[dict]) -> bytes:
+    return to_json({"packages": rows, "count": len(rows)})
+
+
+def _section_rows() -> list[dict]:
+    return [
+        {
+            "file": "SYNTH_LARGE.SRC" if i % 3 else "SYNTH_LARGE.LIB",
+            "name": f"SECTION_{i:05d}",
+            "kind": "section",
+            "start_line": i * 20,
+            "end_line": i * 20 + 18,
+            "template_lines": 12,
+            "body_hash": f"{i:064x}",
+        }
+        for i in range(SECTIONS)
+    ]
+
+
+def test_serialize_package_list_models(benchmark, budget):
+    packages = _orm_like(_package_rows())
+    payload = benchmark(_serialize_models, packages)
+    assert json.loads(payload)["count"] == PACKAGES
+    budget("serialize_package_list_models")
+
+
+def test_serialize_package_list_rows(benchmark, budget):
+    rows = _package_rows()
+    payload = benchmark(_serialize_rows, rows)
+    assert json.loads(payload)["count"] == PACKAGES
+    budget("serialize_package_list_rows")
+
+
+def test_serialize_section_stream(benchmark, budget):
+    rows = _section_rows()
+    payload = benchmark(lambda: b"".join(to_json(row) + b"\n" for row in rows))
+    assert payload.count(b"\n") == SECTIONS
+    budget("serialize_section_stream")
+
+
+def test_row_path_matches_models_and_is_faster():
+    rows = _package_rows()
+    packages = _orm_like(rows)
+    assert json.loads(_serialize_rows(rows)) == json.loads(_serialize_models(packages))
+
+    def best(fn, arg) -> float:
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            fn(arg)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    assert best(_serialize_rows, rows) * 5 < best(_serialize_models, packages)
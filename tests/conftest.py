@@ -3,11 +3,97 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from app.main import app
+from app.main import create_app
 
 
 @pytest.fixture
 async def client():
-    transport = ASGITransport(app=app)
+    transport = ASGITransport(app=create_app())
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+
+
+class FakeRedis:
+    """Just enough of ``redis.asyncio.Redis`` for the admission controller and result cache.
+
+    Lua is not run: a registered script calls the Python stand-in in
+    ``scripts`` for its source, else returns the next entry of ``replies``
+    (raising it if it is an exception). ``sync()`` is a view of the same
+    data through the worker's synchronous client.
+    """
+
+    def __init__(self) -> None:
+        self.strings: dict[str, bytes] = {}
+        self.hashes: dict[str, dict] = {}
+        self.scripts: dict = {}
+        self.replies: list = []
+        self.calls: list = []
+        self.released: list[str] = []
+        self.reads = 0
+
+    def register_script(self, source):
+        async def script(keys, args):
+            self.calls.append((keys, args))
+            if source in self.scripts:
+                return self.scripts[source](keys, args)
+            reply = self.replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        return script
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def hget(self, key, field):
+        self.reads += 1
+        return self.hashes.get(key, {}).get(field)
+
+    async def zrem(self, key, *members):
+        self.released.extend(members)
+
+    def pipeline(self):
+        return _FakePipeline(self, run=_run_async)
+
+    def sync(self):
+        """The worker's ``redis.Redis`` on the same data."""
+        return _FakeSyncRedis(self)
+
+
+class _FakeSyncRedis:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+
+    def pipeline(self):
+        return _FakePipeline(self.redis, run=_run)
+
+
+class _FakePipeline:
+    def __init__(self, redis: FakeRedis, run) -> None:
+        self.redis, self.run, self.ops = redis, run, []
+
+    def incr(self, key):
+        strings = self.redis.strings
+        self.ops.append(
+            lambda: strings.__setitem__(key, str(int(strings.get(key, b"0")) + 1).encode())
+        )
+
+    def delete(self, key):
+        self.ops.append(lambda: self.redis.hashes.pop(key, None))
+
+    def execute(self):
+        return self.run(self.ops)
+
+
+def _run(ops):
+    return [op() for op in ops]
+
+
+async def _run_async(ops):
+    return _run(ops)
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
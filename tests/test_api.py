@@ -1,6 +1,23 @@
 """API endpoint tests."""
 
+import json
+import logging
+import subprocess
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
 import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import ProfilingMiddleware
+from app.api.routes import packages
+from app.core import metrics, profiling
+from app.db.database import get_read_db
+from app.main import create_app
+from app.services import admission, post_service
+from app.services.storage import storage
 
 
 @pytest.mark.asyncio
@@ -19,3 +36,154 @@ async def test_list_posts_empty(client):
     data = response.json()
     assert data["count"] == 0
     assert data["posts"] == []
+
+
+def test_metrics_disabled_helpers_are_noops():
+    was_enabled = metrics.is_enabled()
+    metrics.configure(False)
+    try:
+        with metrics.timed("parse_duration_seconds", parser="camworks"):
+            pass
+        metrics.inc("parse_bytes_total", 10, parser="camworks")
+        metrics.record_cache("packages", hit=True)
+    finally:
+        metrics.configure(was_enabled)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "veripost_http_request_duration_seconds" in response.text
+
+
+def test_stack_sampler_collapsed_output():
+    assert profiling.label("idle") is profiling.label("idle")  # shared no-op when not sampling
+
+    with profiling.StackSampler(interval=0.001) as sampler:
+        with profiling.label("stage:parsing"):
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+    lines = sampler.collapsed().decode().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any(line.startswith("[stage:parsing];") for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_profiling_middleware_survives_storage_outage(monkeypatch, caplog):
+    async def inner(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("minio went away")
+
+    monkeypatch.setattr(profiling, "wanted", lambda forced: forced)
+    monkeypatch.setattr(storage, "upload_file", unavailable)
+    transport = ASGITransport(app=ProfilingMiddleware(inner, interval=0.001))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        with caplog.at_level(logging.WARNING, logger="app.api.middleware"):
+            response = await ac.get("/", headers={profiling.PROFILE_HEADER: "1"})
+    assert response.status_code == 200 and response.text == "ok"
+    assert response.headers["x-veripost-profile-id"] in caplog.text
+
+
+def test_app_factory_defers_heavy_imports():
+    code = (
+        "import sys; from app.main import create_app; create_app(); "
+        "heavy = {'anthropic', 'boto3', 'botocore', 'aiobotocore', 'celery', 'sqlalchemy'}; "
+        "print(sorted(heavy & {m.split('.')[0] for m in sys.modules}))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert out == "[]"
+
+
+@pytest.mark.asyncio
+async def test_liveness(client):
+    response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+
+@pytest.mark.asyncio
+async def test_stream_sections_filters_and_chunks_ndjson(monkeypatch):
+    package_id = uuid.uuid4()
+    rows = [
+        {
+            "file": "P.SRC" if i < 30 else "MILL_HRS.LIB",
+            "name": f"{'TAP' if i % 2 else 'CALC'}_{i:02d}",
+            "kind": "calc" if i % 2 == 0 else "template",
+            "start_line": i * 10,
+            "end_line": i * 10 + 9,
+            "template_lines": i % 7,
+            "body_hash": f"{i:064x}",
+        }
+        for i in range(40)
+    ]
+    queries = []
+
+    async def get_package(db, pid):
+        return SimpleNamespace(id=pid) if pid == package_id else None
+
+    async def stream_section_rows(pid, name=None, kind=None):
+        queries.append((pid, name, kind))
+        for row in rows:
+            if (not name or name.lower() in row["name"].lower()) and kind in (None, row["kind"]):
+                yield row
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(post_service, "get_package", get_package)
+    monkeypatch.setattr(post_service, "stream_section_rows", stream_section_rows)
+    monkeypatch.setattr(packages, "STREAM_CHUNK_BYTES", 1000)
+    app = create_app()
+    app.dependency_overrides[get_read_db] = no_db
+    chunks: list[bytes] = []
+
+    async def recording(scope, receive, send):
+        async def record(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"])
+            await send(message)
+
+        await app(scope, receive, record)
+
+    transport = ASGITransport(app=recording)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        url = f"/api/v1/packages/{package_id}/sections"
+        response = await ac.get(url, params={"q": "tap", "kind": "template"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [row for row in rows if row["kind"] == "template"]
+        assert queries[-1] == (package_id, "tap", "template")
+
+        chunks.clear()
+        everything = await ac.get(url)
+        assert everything.text.count("\n") == len(rows)
+        assert 1 < len(chunks) < len(rows)  # flushed in ~1000 byte chunks, not per line
+        assert b"".join(chunks) == everything.content
+
+        missing = await ac.get(f"/api/v1/packages/{uuid.uuid4()}/sections")
+        assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_admission_rejections_carry_cors_headers(monkeypatch, fake_redis):
+    monkeypatch.setattr(admission, "get_redis", lambda: fake_redis)
+    fake_redis.replies = [[0, 2500]]
+    transport = ASGITransport(app=create_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/api/v1/packages/upload", headers={"Origin": "http://viewer.example"}
+        )
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    assert response.headers["access-control-allow-origin"] == "http://viewer.example"
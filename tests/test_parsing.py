@@ -1,8 +1,22 @@
 """Parser unit tests."""
 
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+
+from app.cli import corpus_accuracy
+from app.core import customization, locator, minhash
+from app.core.models.post_processor import TextEdit
+from app.core.parsing import companion, detect_parser, rank_parsers, upg
 from app.core.parsing.camworks import CAMWorksParser
-from app.core.parsing import detect_parser
+from app.core.parsing.detection import DETECT_PREFIX_CHARS
+from app.core.parsing.executor import ParseExecutor, ParserSaturatedError, ParseTimeoutError
+from app.core.parsing.incremental import EditRangeError, IncrementalDocument
+from app.core.section_graph import SectionGraph
+from app.services.atr_registry import AtrRegistry, content_hash
 
 
 @pytest.fixture
@@ -29,9 +43,8 @@ def test_camworks_detect(camworks_parser):
     assert camworks_parser.detect("random text content") is False
 
 
-@pytest.mark.asyncio
-async def test_camworks_parse(camworks_parser):
-    result = await camworks_parser.parse(SAMPLE_UPG, post_id="test-001")
+def test_camworks_parse(camworks_parser):
+    result = camworks_parser.parse(SAMPLE_UPG, post_id="test-001")
     assert result.post_id == "test-001"
     assert "GENERAL" in result.section_names
     assert "FORMAT" in result.section_names
@@ -48,3 +61,436 @@ def test_auto_detect():
 def test_auto_detect_unknown():
     parser = detect_parser("nothing recognizable here")
     assert parser is None
+
+
+def test_rank_parsers_orders_by_confidence():
+    ranked = rank_parsers(SAMPLE_UPG)
+    assert ranked[0].parser.platform == "camworks"
+    assert 0.9 < ranked[0].confidence <= 1.0
+
+
+def test_ctl_mention_alone_is_not_camworks():
+    content = "DELMIA 3DEXPERIENCE output; see machine.ctl for reference"
+    parser = detect_parser(content)
+    assert parser is not None
+    assert parser.platform == "delmia"
+    assert detect_parser("see machine.ctl for reference") is None
+
+
+def test_section_header_alone_is_camworks():
+    for header in ("[GENERAL]", "[FORMAT]"):
+        parser = detect_parser(f"{header}\nPrecision = 4\n")
+        assert parser is not None
+        assert parser.platform == "camworks"
+
+
+def test_detect_uses_extension_hint():
+    content = ":DEFINE G_RAPID=0\n"
+    assert detect_parser(content) is None
+    parser = detect_parser(content, filename="MILL_HRS.LIB")
+    assert parser is not None
+    assert parser.platform == "camworks"
+
+
+def test_detect_scans_bounded_prefix():
+    content = "x" * DETECT_PREFIX_CHARS + "Universal Post Generator"
+    assert detect_parser(content) is None
+
+
+def _thread_pool(max_workers):
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+@pytest.mark.asyncio
+async def test_parse_executor_rejects_when_saturated():
+    executor = ParseExecutor(max_workers=1, max_queue=0, timeout=5, pool_factory=_thread_pool)
+    executor.start()
+    gate = threading.Event()
+    try:
+        first = asyncio.create_task(executor.submit(gate.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(ParserSaturatedError):
+            await executor.submit(gate.wait, 5)
+        gate.set()
+        assert await first is True
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_parse_executor_recycles_a_hung_worker_and_frees_its_slot():
+    executor = ParseExecutor(max_workers=2, max_queue=0, timeout=10)
+    executor.start()
+    try:
+        assert await executor.submit(abs, -1) == 1  # spawn a worker before timing anything
+        executor.timeout = 1.0
+        hung = asyncio.create_task(executor.submit(time.sleep, 60))
+        await asyncio.sleep(0)
+        executor.timeout = 10
+        innocent = asyncio.create_task(executor.submit(time.sleep, 1.5))
+        with pytest.raises(ParseTimeoutError):
+            await hung
+        assert await innocent is None  # killed with the old pool, then resubmitted
+        for _ in range(100):
+            if executor.in_flight == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
+
+
+UPG_SRC = """\
+* Controller: HAAS NGC
+* Created From: HAAS_VF-4.SRC
+:SYSTEM=MILL
+:DEFINE G_RAPID=0
+:ATTRNAME=CUSTOMER
+:ATTRTYPE=DESCRIPTOR
+:ATTREND
+:LIBRARY=C:\\Posts\\Library Files\\MILL_HRS.LIB
+:OPERID=MILL_OPER_SETUP
+:OPERLIST=CUSTOMER
+:OPEREND
+:SECTION=RAPID_MOVE_MILL
+:T: <G:G_RAPID> X<X_POS> Y<Y_POS> <EOL>
+:SECTION=CALC_INITIALIZE
+:IF CNFG_COOLANT = 1 THEN
+  COOLANT_TYPE = 8
+  CALL(CALC_INIT_CODES)
+:ENDIF
+:SECTION=CALC_INIT_CODES
+:IF G_RAPID = 0 THEN
+"""
+
+
+def test_upg_parse_structure(camworks_parser):
+    result = camworks_parser.parse(UPG_SRC, post_id="upg")
+    assert result.section_names == ["RAPID_MOVE_MILL", "CALC_INITIALIZE", "CALC_INIT_CODES"]
+    rapid, init, codes = result.sections
+    assert (rapid.kind, rapid.start_line, rapid.end_line, rapid.template_lines) == (
+        "template", 12, 13, 1,
+    )
+    assert init.kind == "calc"
+    assert init.calls == ["CALC_INIT_CODES"]
+    assert result.defines == {"G_RAPID": "0"}
+    assert result.libraries == ["MILL_HRS.LIB"]
+    assert result.settings["SYSTEM"] == "MILL"
+    assert result.metadata["Created From"] == "HAAS_VF-4.SRC"
+    assert [a.name for a in result.attributes] == ["CUSTOMER"]
+    assert result.operations == ["MILL_OPER_SETUP"]
+    assert result.errors == ["Line 20: :IF has no matching :ENDIF"]
+
+
+def test_companion_tables():
+    kin = companion.parse_kin(
+        "0 * 5 Axis Type 0-TABLE_TABLE,1-HEAD_HEAD,2-HEAD_TABLE\n"
+        "0.000000 * Spindle Direction X\n0.000000 * Spindle Direction Y\n"
+        "1.000000 * Spindle Direction Z\n"
+        "-30.000000 * 2nd Rotation Axis Limit Min\n120.000000 * 2nd Rotation Axis Limit Max\n"
+        "table table * Default Machine Simulation Name\n"
+    )
+    assert kin.vector("Spindle Direction").tolist() == [0.0, 0.0, 1.0]
+    assert kin.limits().tolist() == [-30.0, 120.0]
+    assert kin.get("default machine simulation name") == "table table"
+
+    lng = companion.parse_lng(f"{'DRILLING':<70}:0002:\n{'program stop':<70}:0001:\n")
+    assert list(lng.ids) == [1, 2]
+    assert lng.label(2) == "DRILLING"
+    assert lng.id_of("program stop") == 1
+
+    atr = companion.parse_atr(
+        ":IDHIGH=19000\n"
+        ":ATTRID=18001\n:ATTRNAME=HRS_B\n:ATTRTYPE=VALUE\n:ATTREND\n"
+        ":ATTRID=18000\n:ATTRNAME=HRS_A\n:ATTREND\n"
+        ":ATTRID=18000\n:ATTRNAME=HRS_DUP\n:ATTREND\n"
+        ":ATTRID=19500\n:ATTRNAME=HRS_HIGH\n:ATTREND\n"
+    )
+    assert list(atr.ids) == [18000, 18001, 19500]
+    assert atr.by_id(18001).fields == {"ATTRTYPE": "VALUE"}
+    assert atr.by_name("hrs_a").attr_id == 18000
+    assert atr.errors == [
+        "Line 9: duplicate ATTRID 18000 (first defined on line 6)",
+        "Line 12: ATTRID 19500 outside 18000-18999",
+    ]
+
+
+def test_atr_block_missing_attrend_is_reported_and_skipped():
+    atr = companion.parse_atr(
+        ":ATTRID=18000\n:ATTRNAME=HRS_A\n:ATTRDEFAULT=0\n"
+        ":ATTRID=18001\n:ATTRNAME=HRS_B\n:ATTREND\n"
+        ":ATTRID=18002\n:ATTREND\n:ATTRID=18003\n"
+    )
+    assert list(atr.ids) == [18001, 18002]
+    assert atr.by_id(18001).name == "HRS_B"
+    assert atr.by_id(18001).fields == {}
+    assert atr.errors == [
+        "Line 1: attribute 'HRS_A' has no matching :ATTREND",
+        "Line 9: attribute ATTRID 18003 has no matching :ATTREND",
+    ]
+
+
+def test_camworks_routes_companion_files_by_extension(camworks_parser):
+    result = camworks_parser.parse("PostName = HAAS\nPostExtension = NC\n", "p", "HAAS.PINF")
+    assert result.settings == {"PostName": "HAAS", "PostExtension": "NC"}
+    assert result.sections == []
+
+
+def test_atr_registry_shares_index_and_diffs_against_master(tmp_path):
+    master = (
+        b":IDHIGH=19000\n"
+        b":ATTRID=18000\n:ATTRNAME=HRS_A\n:ATTRDEFAULT=0\n:ATTREND\n"
+        b":ATTRID=18001\n:ATTRNAME=HRS_B\n:ATTREND\n"
+    )
+    package = master.replace(b":ATTRDEFAULT=0", b":ATTRDEFAULT=1") + (
+        b":ATTRID=18002\n:ATTRNAME=HRS_C\n:ATTREND\n"
+    )
+    registry = AtrRegistry(tmp_path, master_hash=content_hash(master))
+    registry.load(master)
+    index = registry.load(package)
+
+    overrides = registry.overrides(index)
+    assert (overrides.added, overrides.changed, overrides.removed) == ((18002,), (18000,), ())
+    assert registry.overrides(registry.master()).identical
+
+    # A second process maps the file written by the first instead of re-parsing.
+    shared = AtrRegistry(tmp_path).get(index.digest)
+    assert shared is not None and shared.id_of("hrs_c") == 18002
+    assert shared.by_id(18000).fields == {"ATTRDEFAULT": "1"}
+
+
+def test_section_graph_impact_respects_overrides():
+    graph = SectionGraph()
+    graph.add_library(
+        "MILL_HRS.LIB",
+        ["CALC_A", "CALC_B", "SPINDLE_ON"],
+        [("CALC_A", "CALC_B"), ("SPINDLE_ON", "CALC_A")],
+        ["HEADERS.LIB"],
+    )
+    graph.add_library("HEADERS.LIB", ["PROGRAM_ID"], [("PROGRAM_ID", "CALC_B")], [])
+    # P1 uses the library as-is; P2 overrides CALC_A; P3 overrides CALC_B itself.
+    graph.add_source("p1", "P1", "P1.SRC", ["START"], [("START", "SPINDLE_ON")], ["MILL_HRS.LIB"])
+    graph.add_source("p2", "P2", "P2.SRC", ["CALC_A"], [], ["MILL_HRS.LIB"])
+    graph.add_source("p3", "P3", "P3.SRC", ["CALC_B"], [], ["mill_hrs.lib"])
+    graph.add_source("p4", "P4", "P4.SRC", ["START"], [], ["OTHER.LIB"])
+    graph.finalize()
+
+    assert graph.packages_using("headers.lib") == {"p1", "p2", "p3"}
+    impacts = {i.package_id: set(i.sections) for i in graph.affected("mill_hrs.lib", "CALC_B")}
+    assert impacts["p1"] == {
+        ("MILL_HRS.LIB", "CALC_B"),
+        ("MILL_HRS.LIB", "CALC_A"),
+        ("MILL_HRS.LIB", "SPINDLE_ON"),
+        ("P1.SRC", "START"),
+        ("HEADERS.LIB", "PROGRAM_ID"),
+    }
+    assert impacts["p2"] == {("MILL_HRS.LIB", "CALC_B"), ("HEADERS.LIB", "PROGRAM_ID")}
+    assert set(impacts) == {"p1", "p2"}
+
+
+def test_incremental_edit_matches_full_parse():
+    doc = IncrementalDocument.from_text(UPG_SRC, "upg")
+    edits = [
+        # rename a section and add a CALL inside it
+        TextEdit(start_line=12, start_column=10, end_line=12, end_column=25, text="RAPID_XY"),
+        TextEdit(start_line=13, start_column=1, end_line=13, end_column=1, text="CALL(X)\n"),
+        # delete the :SECTION=CALC_INIT_CODES line so its body merges upward
+        TextEdit(start_line=20, start_column=1, end_line=21, end_column=1, text=""),
+        # insert a define into the header
+        TextEdit(start_line=1, start_column=1, end_line=1, end_column=1, text=":DEFINE NEW=1\n"),
+    ]
+    deltas = [doc.apply(edit) for edit in edits]
+
+    assert deltas[0].removed_sections == ["RAPID_MOVE_MILL"]
+    assert [s.name for s in deltas[0].sections] == ["RAPID_XY"]
+    assert deltas[1].line_shift == 1
+    assert "CALC_INIT_CODES" in deltas[2].removed_sections
+    assert deltas[3].defines == {"NEW": "1"}
+    assert doc.version == 4
+
+    full = upg.parse_upg(doc.text(), "upg")
+    incremental = doc.to_parsed()
+    assert incremental.section_names == full.section_names
+    assert [(s.start_line, s.end_line, s.calls) for s in incremental.sections] == [
+        (s.start_line, s.end_line, s.calls) for s in full.sections
+    ]
+    assert incremental.defines == full.defines
+    assert incremental.errors == full.errors
+
+
+def test_incremental_edit_at_end_of_document():
+    def at(line, column, text):
+        return TextEdit(
+            start_line=line, start_column=column, end_line=line, end_column=column, text=text
+        )
+
+    # Typing on the empty line after the final newline appends.
+    doc = IncrementalDocument.from_text("A\n:SECTION=S1\nb\nc\n", "upg")
+    doc.apply(at(5, 1, "NEW = 1"))
+    assert doc.text() == "A\n:SECTION=S1\nb\nc\nNEW = 1\n"
+    doc.apply(at(6, 1, ":SECTION=S2\n"))
+    assert doc.text() == "A\n:SECTION=S1\nb\nc\nNEW = 1\n:SECTION=S2\n"
+    assert doc.to_parsed().section_names == upg.parse_upg(doc.text(), "upg").section_names
+
+    # Without a final newline the last line is extended in place.
+    doc = IncrementalDocument.from_text("A\n:SECTION=S1\nb", "upg")
+    doc.apply(at(3, 2, "c"))
+    assert doc.text() == "A\n:SECTION=S1\nbc\n"
+
+    for edit in (
+        at(6, 1, "x"),  # past the empty last line
+        at(4, 2, "x"),  # the empty last line has only column 1
+        at(3, 4, "x"),  # past the end of "bc"
+        TextEdit(start_line=3, start_column=2, end_line=2, end_column=1, text=""),
+    ):
+        with pytest.raises(EditRangeError):
+            doc.apply(edit)
+    assert doc.version == 1 and doc.text() == "A\n:SECTION=S1\nbc\n"
+
+
+def test_corpus_accuracy_scores_and_caches(tmp_path):
+    src = tmp_path / "corpus" / "camworks" / "PKG"
+    src.mkdir(parents=True)
+    (src / "GOOD.SRC").write_text(UPG_SRC + ":ENDIF\n")
+    (src / "BAD.SRC").write_text(":SECTION=CALC_A\n:IF X = 1\n:BOGUS\n")
+    (src / "notes.txt").write_text("ignored")
+    cache = tmp_path / "cache.json"
+
+    report = corpus_accuracy.run(tmp_path / "corpus", jobs=1, cache_path=cache)
+    files = {f["path"]: f for f in report["files"]}
+    assert set(files) == {"camworks/PKG/BAD.SRC", "camworks/PKG/GOOD.SRC"}
+    assert files["camworks/PKG/GOOD.SRC"]["passed"]
+    bad = files["camworks/PKG/BAD.SRC"]
+    assert (bad["sections"], bad["unbalanced_if"], bad["unknown_directives"]) == (1, 1, 1)
+    assert not bad["passed"]
+    assert report["summary"]["pass_rate"] == 0.5
+    assert not report["summary"]["gate_passed"]
+
+    (src / "BAD.SRC").write_text(":SECTION=CALC_A\n:IF X = 1\n:ENDIF\n")
+    rerun = corpus_accuracy.run(tmp_path / "corpus", jobs=1, cache_path=cache)
+    assert (rerun["summary"]["parsed"], rerun["summary"]["cached"]) == (1, 1)
+    assert rerun["summary"]["gate_passed"]
+
+
+def test_corpus_accuracy_cached_scores_follow_the_criteria(tmp_path):
+    src = tmp_path / "corpus" / "camworks" / "PKG"
+    src.mkdir(parents=True)
+    (src / "ODD.SRC").write_text(":SECTION=CALC_A\n:BOGUS\n")  # 1 of 2 directives unknown
+    cache = tmp_path / "cache.json"
+
+    strict = corpus_accuracy.run(
+        tmp_path / "corpus", jobs=1, cache_path=cache, max_unknown_ratio=0.0
+    )
+    assert strict["summary"]["passed"] == 0
+    lenient = corpus_accuracy.run(
+        tmp_path / "corpus", jobs=1, cache_path=cache, max_unknown_ratio=1.0
+    )
+    assert lenient["summary"]["cached"] == 1
+    assert lenient["summary"]["passed"] == 1
+
+
+def test_parse_upg_buffer_matches_str_parse():
+    data = (UPG_SRC.replace("\n", "\r\n") + "* Version: 2\r\nÄX = 1").encode()
+    index = upg.LineIndex(data)
+    assert len(index) == len(data.decode().splitlines())
+    assert data[slice(*index.span(2))] == b"* Created From: HAAS_VF-4.SRC"
+
+    expected = upg.parse_upg(data.decode(), "upg")
+    parsed = upg.parse_upg_buffer(data, "upg")
+    assert parsed.raw_content == ""
+    assert parsed.model_dump(exclude={"raw_content"}) == expected.model_dump(
+        exclude={"raw_content"}
+    )
+
+
+def test_customization_delta_against_template():
+    template_src = UPG_SRC.replace("* Created From: HAAS_VF-4.SRC\n", "") + ":ENDIF\n"
+    post_src = (
+        template_src.replace(":DEFINE G_RAPID=0", ":DEFINE G_RAPID=00\n:DEFINE G_TAP=84")
+        .replace("  COOLANT_TYPE = 8", "  * customer coolant\n  COOLANT_TYPE  =  88")
+        .replace(":SYSTEM=MILL", "* Created From: C:\\HRS\\HAAS_VF-4\n:SYSTEM=MILL")
+        + ":SECTION=RIGID_TAP\n:T: G<G_TAP> <EOL>\n"
+    )
+    template = customization.fingerprint(template_src, "HAAS_VF-4.SRC")
+    post = customization.fingerprint(post_src, "ACME_VF4.SRC")
+    assert customization.template_filename(post.created_from) == "HAAS_VF-4.SRC"
+
+    delta = customization.diff(post, template)
+    assert delta.sections_added == ["RIGID_TAP"]
+    assert [c.name for c in delta.sections_changed] == ["CALC_INITIALIZE"]
+    assert delta.sections_changed[0].diff == ["-COOLANT_TYPE = 8", "+COOLANT_TYPE = 88"]
+    assert delta.sections_unchanged == 2  # comment/whitespace edits do not count
+    assert delta.defines_added == {"G_TAP": "84"}
+    assert delta.defines_changed["G_RAPID"].model_dump() == {"old": "0", "new": "00"}
+    assert not delta.attributes_changed and not delta.libraries_added
+
+    assert customization.similarity(post, template) == 2 / 5
+    assert customization.similarity(template, template) == 1.0
+    prompt = customization.render(delta)
+    assert "Define changed: G_RAPID: 0 -> 00" in prompt and "+COOLANT_TYPE = 88" in prompt
+    assert len(prompt) < len(post_src) + len(template_src)
+
+
+def test_minhash_signatures_find_near_duplicates():
+    src = UPG_SRC + ":ENDIF\n:SECTION=TOOL_CHANGE\n* note\n:T: T<TOOL> M6 <EOL>\n"
+    fp = customization.fingerprint(src, "POST.SRC")
+    data = src.encode()
+    index = upg.LineIndex(data)
+    parsed = upg.parse_upg_buffer(data, "POST.SRC", index)
+    hashes = customization.buffer_section_hashes(data, index, parsed.sections)
+    assert dict(zip(parsed.section_names, hashes)) == fp.sections
+
+    base = {f"SECTION_{i}": f"hash{i}" for i in range(100)}
+    copy = {**base, **{f"SECTION_{i}": f"edited{i}" for i in range(10)}}  # J = 90/110
+    other = {f"OTHER_{i}": f"hash{i}" for i in range(100)}
+
+    def sig(sections):
+        return minhash.signature(minhash.shingle(n, h) for n, h in sections.items())
+
+    a, b, c = sig(base), sig(copy), sig(other)
+    assert abs(minhash.estimate(a, b) - 90 / 110) < 0.1
+    assert minhash.estimate(a, c) < 0.1
+    assert minhash.from_bytes(a.tobytes()) == a
+    assert set(minhash.bands(a)) & set(minhash.bands(b))
+    assert not set(minhash.bands(a)) & set(minhash.bands(c))
+
+    families = minhash.UnionFind()
+    families.union("a", "b")
+    families.union("c", "d")
+    families.union("b", "d")
+    families.find("e")
+    assert sorted(map(sorted, families.groups())) == [["a", "b", "c", "d"], ["e"]]
+
+
+def test_locator_ranks_sections_for_a_requirement():
+    src = UPG_SRC + (
+        ":ENDIF\n"
+        ":SECTION=OUTPUT_COOLANT\n"
+        ":T: IF COOLANT_TYPE = 3 THEN M<M_COOLANT_THROUGH> ENDIF <EOL>\n"
+        ":SECTION=RIGID_TAPPING_CYCLE\n"
+        ":T: M<M_RIGID_TAP> S<SPINDLE_SPEED> <EOL>\n"
+    )
+    lib = ":SECTION=OUTPUT_COOLANT\n:T: M08 <EOL>\n:SECTION=SPINDLE_ON\n:T: S<SPINDLE_SPEED>\n"
+    index = locator.LocatorIndex.build([("POST.SRC", src), ("MILL_HRS.LIB", lib)])
+    # the library's OUTPUT_COOLANT is shadowed by the post's
+    assert [(e.file, e.name) for e in index.entries][-2:] == [
+        ("POST.SRC", "RIGID_TAPPING_CYCLE"), ("MILL_HRS.LIB", "SPINDLE_ON"),
+    ]
+    assert locator.terms("Tapping M8") == ["TAP", "M08", "COOLANT"]
+
+    ranked = index.rank("Customer wants through-spindle coolant M88", k=3)
+    assert ranked[0].entry.name == "OUTPUT_COOLANT"
+    assert {"COOLANT", "THROUGH"} <= set(ranked[0].matched)
+    assert index.rank("Output M29 for rigid tapping", k=1)[0].entry.name == "RIGID_TAPPING_CYCLE"
+    # an exact identifier hits the section, and its caller comes along through the call graph
+    names = [c.entry.name for c in index.rank("CALC_INIT_CODES sets G_RAPID", k=3)]
+    assert names[:2] == ["CALC_INIT_CODES", "CALC_INITIALIZE"]
+
+    prompt = locator.confirm_prompt("coolant", ranked, limit=120)
+    assert prompt.startswith("Requirement: coolant\n\n--- [1] POST.SRC :SECTION=OUTPUT_COOLANT")
+    assert len(prompt) <= 120
+    verdicts = locator.parse_verdicts(
+        "- **OUTPUT_COOLANT**: yes - add M88\nSPINDLE_ON: No\nOTHER: yes",
+        ["OUTPUT_COOLANT", "SPINDLE_ON"],
+    )
+    assert verdicts == {"OUTPUT_COOLANT": (True, "add M88"), "SPINDLE_ON": (False, "")}
@@ -0,0 +1,275 @@
+"""Service-layer tests: health, sessions, caches, admission, scheduling, bulk import."""
+
+import asyncio
+import io
+import time
+import uuid
+import zipfile
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import AdmissionMiddleware
+from app.cli.bulk_import import BulkImporter, Checkpoint, discover
+from app.config import get_settings
+from app.core.ai.scheduler import CallScheduler, TokenBucket
+from app.db import database
+from app.services.admission import AdmissionController, Policy
+from app.services.analysis_service import rank_sections
+from app.services.health import ReadinessProbe
+from app.services.result_cache import FILL_SCRIPT, ResultCache, invalidate_package_sync
+
+
+@pytest.mark.asyncio
+async def test_readiness_probe_concurrent_cached_and_timed_out():
+    calls = {"fast": 0}
+
+    async def fast():
+        calls["fast"] += 1
+        return None
+
+    async def hangs():
+        await asyncio.sleep(10)
+
+    probe = ReadinessProbe({"fast": fast, "slow": hangs}, timeout=0.05, ttl=60)
+    (first, cached_first), (second, cached_second) = await asyncio.gather(
+        probe.check(), probe.check()
+    )
+    assert first is second  # single flight
+    assert first["status"] == "not_ready"
+    assert first["checks"]["fast"]["ok"] is True
+    assert first["checks"]["slow"]["detail"].startswith("timed out")
+    assert first["checks"]["slow"]["latency_ms"] < 1000
+
+    third, cached_third = await probe.check()
+    assert cached_third is True
+    assert calls["fast"] == 1
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_route_to_replica(monkeypatch):
+    monkeypatch.setenv("DATABASE_REPLICA_URL", "postgresql+asyncpg://ro@replica/veripost")
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+    get_settings.cache_clear()
+    await database.dispose_engine()
+    try:
+        database.init_engine()
+        assert database.read_session().bind is database.get_engine(database.REPLICA)
+        assert database.async_session().bind is database.get_engine()
+        status = database.pool_status()
+        assert set(status) == {"primary", "replica"}
+        assert status["replica"]["capacity"] == 5
+        assert status["primary"]["checked_out"] == 0
+    finally:
+        await database.dispose_engine()
+        get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_admission_middleware_rejects_fast_and_releases_slots(fake_redis):
+    async def inner(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    redis = fake_redis
+    controller = AdmissionController(
+        {"upload": Policy("upload", 10, 0), "copilot": Policy("copilot", 20, 100)},
+        client_header="X-Forwarded-For",
+        redis=redis,
+    )
+    transport = ASGITransport(app=AdmissionMiddleware(inner, controller))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        redis.replies = [[1, 0], [0, 2500], [-1, 0], ConnectionError("redis down")]
+        headers = {"X-Forwarded-For": "10.0.0.7, 10.0.0.1"}
+        assert (await ac.post("/api/v1/packages/upload", headers=headers)).status_code == 200
+        keys, args = redis.calls[0]
+        # Only the per-client bucket (the route-wide limit is 0) and the semaphore.
+        assert keys == ["veripost:admission:upload:client:10.0.0.7", "veripost:admission:expensive"]
+        assert args[:2] == [1, 10] and redis.released == [args[-1]]
+
+        limited = await ac.post("/api/v1/packages/upload", headers=headers)
+        assert limited.status_code == 429 and limited.headers["retry-after"] == "3"
+        assert limited.json()["detail"]["code"] == "RATE_LIMITED"
+        busy = await ac.post("/api/v1/analysis/batches")
+        assert busy.status_code == 503 and busy.json()["detail"]["code"] == "SERVER_BUSY"
+        assert len(redis.released) == 1  # rejected requests hold no slot
+
+        # Redis unavailable: fail open.
+        assert (await ac.post("/api/v1/posts/upload")).status_code == 200
+        # Unlimited routes and cheap variants never reach Redis.
+        await ac.get("/api/v1/packages/p1/customizations?summarize=false")
+        await ac.get("/api/v1/posts/")
+        assert len(redis.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_result_cache_tiers_and_generation_guarded_fills(fake_redis):
+    def fill(keys, args):
+        generation, field, payload, _ttl = args
+        if fake_redis.strings.get(keys[0], b"0").decode() != generation:
+            return 0
+        fake_redis.hashes.setdefault(keys[1], {})[field] = payload
+        return 1
+
+    redis = fake_redis
+    redis.scripts[FILL_SCRIPT] = fill
+    cache = ResultCache(local_ttl=60, redis=redis)
+    package_id = uuid.uuid4()
+    assert await cache.get(package_id, "detail") is None
+    generation = await cache.generation(package_id)
+    await cache.put(package_id, "detail", b'{"v":1}', generation)
+
+    # A second process (empty local tier) is served from Redis, then locally.
+    other = ResultCache(local_ttl=60, redis=redis)
+    reads = redis.reads
+    assert await other.get(package_id, "detail") == b'{"v":1}'
+    assert await other.get(package_id, "detail") == b'{"v":1}'
+    assert redis.reads == reads + 1
+
+    # The worker invalidates while a request is between its DB read and its fill.
+    stale_generation = await cache.generation(package_id)
+    invalidate_package_sync(redis.sync(), package_id)
+    await cache.put(package_id, "detail", b'{"v":1}', stale_generation)
+    assert await ResultCache(redis=redis).get(package_id, "detail") is None
+
+    # The API invalidates too (resume_ingest), dropping its own local copy as well.
+    await cache.put(package_id, "detail", b'{"v":2}', await cache.generation(package_id))
+    assert await cache.get(package_id, "detail") == b'{"v":2}'
+    await cache.invalidate(package_id)
+    assert await cache.get(package_id, "detail") is None
+
+
+@pytest.mark.asyncio
+async def test_call_scheduler_overlaps_calls_and_retries_rate_limits():
+    class RateLimitedError(Exception):
+        status_code = 429
+
+        def __init__(self):
+            self.response = type("Response", (), {"headers": {"retry-after": "0.1"}})()
+
+    class BadRequestError(Exception):
+        status_code = 400
+
+    scheduler = CallScheduler(concurrency=8, max_attempts=3, base_delay=0.01)
+    in_flight = peak = 0
+    attempts: dict[int, int] = {}
+    started: dict[int, list[float]] = {}
+
+    async def model_call(i):
+        nonlocal in_flight, peak
+        attempts[i] = attempts.get(i, 0) + 1
+        started.setdefault(i, []).append(time.perf_counter())
+        if i == 0 and attempts[i] == 1:
+            raise RateLimitedError()
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return i
+
+    begin = time.perf_counter()
+    results = await asyncio.gather(
+        *(scheduler.call(lambda i=i: model_call(i)) for i in range(24))
+    )
+    elapsed = time.perf_counter() - begin
+    assert results == list(range(24))
+    assert peak == 8
+    assert elapsed < 0.6  # ~3 rounds plus the 429 pause, not 24 x 50ms
+    assert attempts[0] == 2
+    assert started[0][1] - started[0][0] >= 0.1  # honoured retry-after
+
+    calls = 0
+
+    async def bad():
+        nonlocal calls
+        calls += 1
+        raise BadRequestError()
+
+    with pytest.raises(BadRequestError):
+        await scheduler.call(bad)
+    assert calls == 1
+
+    bucket = TokenBucket(per_minute=1200, capacity=2)  # 20/s after a burst of 2
+    begin = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    assert time.perf_counter() - begin >= 0.18
+
+
+def test_rank_sections_matches_question_words():
+    names = ["START", "TAP_CYCLE", "RIGID_TAP", "TOOL_CHANGE", "RIGID_TAP", "COOLANT_ON"]
+    question = "Summarize how each HAAS post handles rigid tapping"
+    assert rank_sections(question, names) == ["RIGID_TAP", "TAP_CYCLE"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_batches_and_resumes_from_checkpoint(tmp_path):
+    def make_zip(path, name):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr(f"{name}/{name}.SRC", f":SECTION=START\n* {name}\n")
+            zf.writestr(f"{name}/MILL_HRS.LIB", ":SECTION=CALC_A\n")
+        path.write_bytes(buf.getvalue())
+
+    archive = tmp_path / "archive"
+    (archive / "2019").mkdir(parents=True)
+    for i in range(5):
+        make_zip(archive / "2019" / f"pkg{i}.zip", f"POST_{i}")
+    (archive / "copy-of-pkg0.zip").write_bytes((archive / "2019" / "pkg0.zip").read_bytes())
+    (archive / "broken.zip").write_bytes(b"not a zip")
+
+    uploaded: list[str] = []
+    db: dict = {}
+    enqueued: list = []
+    calls = {"commit": 0, "enqueue": 0}
+
+    async def upload(key, data, content_hash):
+        uploaded.append(key)
+
+    async def commit(packages, files, fail_on=None):
+        calls["commit"] += 1
+        if calls["commit"] == fail_on:
+            raise ConnectionError("database went away")
+        new = {p["id"] for p in packages} - db.keys()
+        pending = {p["id"] for p in packages if db.get(p["id"], {}).get("status") == "pending"}
+        db.update({p["id"]: dict(p) for p in packages if p["id"] in new})
+        return new, pending
+
+    async def enqueue(ids, fail_on=None):
+        calls["enqueue"] += 1
+        if calls["enqueue"] == fail_on:
+            raise ConnectionError("broker went away")
+        enqueued.extend(ids)
+        for package_id in ids:
+            db[package_id]["status"] = "validating"  # the worker picks it up
+
+    def importer(concurrency, commit=commit, enqueue=enqueue):
+        return BulkImporter(
+            Checkpoint(tmp_path / "checkpoint.jsonl"),
+            concurrency=concurrency,
+            batch_size=2,
+            upload=upload,
+            commit=commit,
+            enqueue=enqueue,
+        )
+
+    # The second batch fails to commit.
+    with pytest.raises(ConnectionError):
+        await importer(1, commit=lambda p, f: commit(p, f, fail_on=2)).run(discover(archive))
+    assert len(db) == 2 and len(enqueued) == 2
+
+    # The retried batch commits, then the broker fails before it is enqueued.
+    with pytest.raises(ConnectionError):
+        await importer(1, enqueue=lambda ids: enqueue(ids, fail_on=2)).run(discover(archive))
+    assert len(db) == 4 and len(enqueued) == 2
+
+    stats = await importer(3).run(discover(archive))
+    assert len(db) == 5
+    assert sorted(map(str, enqueued)) == sorted(map(str, db))  # each exactly once
+    assert all(p["status"] == "validating" for p in db.values())
+    assert stats.skipped == 2  # the committed first batch
+    assert (stats.imported, stats.requeued, stats.duplicate, stats.invalid) == (1, 2, 1, 1)
+    assert {p["name"] for p in db.values()} == {f"POST_{i}" for i in range(5)}
+    # Re-uploads overwrite the same keys: the two retried batches, and pkg0 via its copy.
+    assert len(set(uploaded)) == 10 and len(uploaded) == 20
@@ -0,0 +1,107 @@
+"""Ingest worker tests: object-cache spooling, the job ledger and the parse sandbox."""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.core.parsing import upg
+from app.services.object_cache import ObjectCache
+from app.workers import spool
+from app.workers.jobs import JobLedger
+from app.workers.sandbox import ParseLimitExceededError, ParseLimits, parse_sandboxed
+
+
+def test_object_cache_dedupes_downloads_and_evicts_lru(tmp_path, monkeypatch):
+    shared = {f"packages/{p}/MILL_HRS.LIB": b":SECTION=CALC_A\n" * 50 for p in range(10)}
+    objects = {**shared, **{f"packages/{p}/P{p}.SRC": f"* {p}\n".encode() for p in range(10)}}
+    gets = []
+
+    class FakeS3:
+        def download_fileobj(self, bucket, key, fh):
+            gets.append(key)
+            fh.write(objects[key])
+
+    cache = ObjectCache(tmp_path / "objects", max_bytes=10_000)
+    monkeypatch.setattr(spool, "get_object_cache", lambda: cache)
+    for key, body in objects.items():
+        with spool.spooled(FakeS3(), "bucket", key, digest=hashlib.sha256(body).hexdigest()) as buf:
+            assert buf[:] == body
+    assert len(gets) == 11  # one download per distinct content
+
+    # A body that does not match its hash is returned but never cached.
+    with spool.spooled(FakeS3(), "bucket", "packages/0/P0.SRC", digest="0" * 64) as buf:
+        assert buf[:] == objects["packages/0/P0.SRC"]
+    assert cache.get("0" * 64) is None
+
+    small = ObjectCache(tmp_path / "small", max_bytes=250)
+    bodies = [bytes([i]) * 100 for i in range(3)]
+    digests = [hashlib.sha256(body).hexdigest() for body in bodies]
+    for i in range(2):
+        small.put(digests[i], bodies[i])
+        os.utime(small._path(digests[i]), (1000 + i, 1000 + i))
+    small.open(digests[0]).close()  # touch: now the most recently used
+    small.put(digests[2], bodies[2])  # 300 bytes > 250: evicts the LRU entry
+    assert small.get(digests[0]) is not None
+    assert small.get(digests[1]) is None
+    assert small.get(digests[2]) is not None
+
+
+def test_ingest_job_ledger_skips_completed_steps_and_records_failures():
+    class FakeSession:
+        def __init__(self):
+            self.statements, self.commits, self.rollbacks = [], 0, 0
+
+        def execute(self, stmt, params=None):
+            self.statements.append(stmt)
+
+        def commit(self):
+            self.commits += 1
+
+        def rollback(self):
+            self.rollbacks += 1
+
+    db = FakeSession()
+    listed = {"objects": [{"Key": "packages/p/A.SRC", "Size": 10}]}
+    ledger = JobLedger(db, "job-1", {("validating", ""): listed})
+    calls = []
+    assert ledger.run("validating", lambda: calls.append("list")) == listed
+    assert calls == [] and ledger.skipped == 1 and db.commits == 0
+
+    # The step row is written in the same transaction as the stage's own writes.
+    assert ledger.run("parsing", lambda: {"sections": 3}, target="A.SRC") == {"sections": 3}
+    assert (db.commits, len(db.statements)) == (1, 1)
+
+    def unreachable():
+        raise ConnectionError("minio went away")
+
+    with pytest.raises(ConnectionError):
+        ledger.run("parsing", unreachable, target="B.SRC")
+    assert db.rollbacks == 1 and db.commits == 2  # failure recorded after the rollback
+    assert ("parsing", "B.SRC") not in ledger.done
+    assert ledger.run("parsing", unreachable, target="A.SRC") == {"sections": 3}
+
+
+def test_parse_sandbox_limits_report_the_failing_location(monkeypatch):
+    source = b":SECTION=START\n:T:G0 X0\nCALL(TOOL)\n:SECTION=TOOL\n:T:T1 M6\n:T:M1\n"
+    parsed, hashes = parse_sandboxed(source, "A.SRC", ParseLimits(timeout=10))
+    assert [s.name for s in parsed.sections] == ["START", "TOOL"]
+    assert parsed.sections[0].calls == ["TOOL"] and len(hashes) == 2
+
+    with pytest.raises(ParseLimitExceededError) as long_line:
+        parse_sandboxed(source + b"X" * 200 + b"\n", "A.SRC", ParseLimits(max_line_bytes=100))
+    assert long_line.value.line == 7 and "200 bytes" in str(long_line.value)
+
+    def stuck(content, post_id, tokens=None):
+        for tok in tokens:
+            if tok.line == 5:
+                time.sleep(60)
+
+    monkeypatch.setattr(upg, "parse_upg", stuck)
+    started = time.perf_counter()
+    with pytest.raises(ParseLimitExceededError) as timed_out:
+        parse_sandboxed(source, "A.SRC", ParseLimits(timeout=0.5))
+    assert time.perf_counter() - started < 5
+    assert (timed_out.value.line, timed_out.value.section) == (5, ":SECTION=TOOL")
+    assert timed_out.value.sections == 1 and "no result within" in str(timed_out.value)